@@ -1,14 +1,27 @@
+import time
+import click
 from flask import Flask
+from .commands import grade_recordings_command
 from .config import Config
 from .extensions import db, migrate, socketio
+from .routes.admin_routes import admin_bp
 from .routes.auth_routes import auth_bp
-from .routes.hr_routes import hr_bp
+from .routes.health_routes import health_bp
+from .routes.hr_routes import hr_bp, init_hr
 from .routes.live_hr_routes import live_hr_bp, init_live_hr
+from .services import admission, asr, db_engine, intents, llm, long_audio, profiler, transcription_scheduler, warmup
 from flask_cors import CORS
 
-def create_app():
+def _loaded_by_cli_command():
+    """True when the flask CLI creates the app to run a command other than `flask run`."""
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.info_name != 'run'
+
+def create_app(config_class=Config):
+    started = time.perf_counter()
+
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
 
     # Initialize CORS with the app
     CORS(app)
@@ -16,15 +29,45 @@ def create_app():
     # Initialize SocketIO with the app
     socketio.init_app(app, cors_allowed_origins="*")
 
+    db_engine.configure(app)
     db.init_app(app)
     migrate.init_app(app, db)
-    
-    # Initialize Live HR module
+
+    # Heavy subsystems are never loaded here; they are warmed in the background
+    # (or lazily on first use) so that boot stays within the startup budget.
+    warmup.register_subsystem('llm', llm.configure_llm)
+    asr.configure(app.config)
+    warmup.register_subsystem('asr', asr.get_backend)
+    transcription_scheduler.configure(app.config)
+    long_audio.configure(app.config)
+    admission.configure(app.config)
+    intents.configure(app.config)
+    profiler.init_app(app)
+
+    # Initialize HR modules
+    init_hr(app)
     init_live_hr(app)
-    
+
     # Register blueprints with the application instance
+    app.register_blueprint(health_bp)
+    app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(hr_bp, url_prefix='/api/hr')
     app.register_blueprint(live_hr_bp, url_prefix='/live_hr_voice_analysis')
 
-    return app
\ No newline at end of file
+    app.cli.add_command(grade_recordings_command)
+
+    # Warm-up is for serving. CLI commands (grade-recordings, db ...) load what
+    # they need themselves; grade-recordings would otherwise load Whisper in the
+    # parent process on top of every pool worker.
+    if app.config['WARMUP_ON_STARTUP'] and not _loaded_by_cli_command():
+        warmup.start_background_warmup()
+
+    app.config['STARTUP_SECONDS'] = time.perf_counter() - started
+    if app.config['STARTUP_SECONDS'] > app.config['STARTUP_TIME_BUDGET_SECONDS']:
+        app.logger.warning(
+            f"create_app() took {app.config['STARTUP_SECONDS']:.2f}s, over the "
+            f"{app.config['STARTUP_TIME_BUDGET_SECONDS']:.2f}s startup budget."
+        )
+
+    return app
@@ -0,0 +1,170 @@
+# app/commands.py
+import json
+import os
+import time
+from concurrent.futures import as_completed
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .extensions import db
+from .models.hr_models import PracticeSession, QuestionBank
+from .routes.hr_routes import analyze_text_with_gemini, local_feedback
+from .services import bulk_grading
+
+DEFAULT_CHECKPOINT = 'grade-recordings.checkpoint'
+
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {json.loads(line)['key'] for line in f if line.strip()}
+
+
+def _grade_with_llm(result):
+    """Gemini feedback for a transcribed result, or None."""
+    feedback = analyze_text_with_gemini(
+        result['transcription'], result['question'], result['audioDurationSeconds'],
+        result['pauseStatistics'], result['speechMetrics'], result.get('contentRelevance')
+    )
+    if feedback:
+        feedback['analysisSource'] = 'gemini'
+    return feedback
+
+
+@click.command('grade-recordings')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--question', help='Interview question for files that do not name their own.')
+@click.option('--jsonl', 'jsonl_path', type=click.Path(dir_okay=False), help='Append one JSON result per recording here.')
+@click.option('--db', 'save_to_db', is_flag=True, help='Save scored recordings as PracticeSession rows.')
+@click.option('--user-id', type=int, default=1, show_default=True, help='Owner of the rows when the manifest has no user_id.')
+@click.option('--llm', 'use_llm', is_flag=True, help='Also grade with Gemini (default: local relevance score only).')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: one per CPU core).')
+@click.option('--checkpoint', 'checkpoint_path', type=click.Path(dir_okay=False), default=None,
+              help=f'Progress file (default: <jsonl>.checkpoint or {DEFAULT_CHECKPOINT}).')
+@click.option('--commit-every', type=int, default=25, show_default=True, help='Results written per checkpoint.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and grade everything again.')
+@with_appcontext
+def grade_recordings_command(source, question, jsonl_path, save_to_db, user_id, use_llm, workers,
+                             checkpoint_path, commit_every, restart):
+    """
+    Grade a directory or manifest (.csv/.jsonl with path, question, user_id)
+    of recordings offline. Progress is checkpointed, so an interrupted run
+    continues where it stopped when started again with the same arguments.
+    """
+    if not jsonl_path and not save_to_db:
+        raise click.UsageError('Choose an output: --jsonl PATH and/or --db.')
+
+    checkpoint_path = checkpoint_path or (jsonl_path + '.checkpoint' if jsonl_path else DEFAULT_CHECKPOINT)
+    done = set() if restart else _load_checkpoint(checkpoint_path)
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    items = bulk_grading.find_recordings(source, question)
+    for item in items:
+        item['key'] = bulk_grading.recording_key(item['path'])
+    pending = [item for item in items if item['key'] not in done]
+    click.echo(f"{len(items)} recordings, {len(items) - len(pending)} already graded, {len(pending)} to go.")
+    if not pending:
+        return
+    if any(not item['question'] for item in pending):
+        click.echo("Warning: some recordings have no question; they are transcribed but not scored.")
+
+    model_answers = {
+        q.question_text: q.model_answer for q in QuestionBank.query.all()
+        if q.model_answer and q.model_answer.strip()
+    }
+    pool, workers, threads = bulk_grading.create_pool(workers, current_app.config, model_answers)
+    click.echo(f"Grading with {workers} worker processes x {threads} threads" + (" and Gemini." if use_llm else "."))
+
+    stage_seconds = dict.fromkeys(bulk_grading.STAGES + ('llm', 'write'), 0.0)
+    audio_seconds = 0.0
+    graded = errors = 0
+    buffered = []
+
+    def flush():
+        if not buffered:
+            return
+        started = time.perf_counter()
+        # Database first: if the commit fails nothing is written or checkpointed,
+        # so a resumed run grades these recordings again without duplicates.
+        if save_to_db:
+            try:
+                db.session.add_all(row for _, row in buffered if row is not None)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        if jsonl_path:
+            with open(jsonl_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(result) + '\n' for result, _ in buffered)
+        # Checkpoint only what has been written.
+        with open(checkpoint_path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps({'key': result['key'], 'path': result['path']}) + '\n' for result, _ in buffered)
+        buffered.clear()
+        stage_seconds['write'] += time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        futures = {pool.submit(bulk_grading.grade_file, item): item for item in pending}
+        for n, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            result = future.result()
+            result['key'] = item['key']
+            for stage, seconds in result.pop('timings').items():
+                stage_seconds[stage] += seconds
+            audio_seconds += result.get('audioDurationSeconds', 0.0)
+
+            feedback = None
+            if 'error' not in result and result['question']:
+                if use_llm:
+                    llm_started = time.perf_counter()
+                    feedback = _grade_with_llm(result)
+                    stage_seconds['llm'] += time.perf_counter() - llm_started
+                if feedback is None and result.get('contentRelevance'):
+                    feedback = local_feedback(result['transcription'], result['contentRelevance'])
+            if feedback:
+                for field in ('overallScore', 'scores', 'tutoringPlan', 'analysisSource'):
+                    result[field] = feedback.get(field)
+
+            row = None
+            if 'error' in result:
+                errors += 1
+                click.echo(f"[{n}/{len(pending)}] {item['path']}: error: {result['error']}")
+            else:
+                graded += 1
+                click.echo(f"[{n}/{len(pending)}] {item['path']}: {result.get('overallScore', 'not scored')}")
+                # Like /analyze, only scored answers become PracticeSession rows;
+                # the rest are in the JSONL output only.
+                if save_to_db and result.get('overallScore') is not None:
+                    row = PracticeSession(
+                        user_id=item['user_id'] or user_id,
+                        question=result['question'],
+                        transcription=result['transcription'],
+                        audio_url=os.path.abspath(item['path']),
+                        overall_score=result['overallScore'],
+                        scores_json=result.get('scores') or {},
+                        tutoring_plan_json=result.get('tutoringPlan') or {},
+                        speech_metrics_json=dict(result['speechMetrics'] or {}, pauseStatistics=result['pauseStatistics'])
+                    )
+            buffered.append((result, row))
+            if len(buffered) >= commit_every:
+                flush()
+    except KeyboardInterrupt:
+        click.echo("Interrupted; saving finished results. Run the same command again to resume.")
+        pool.shutdown(wait=False, cancel_futures=True)
+    finally:
+        flush()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    processed = graded + errors
+    click.echo(f"\n{processed} recordings ({graded} graded, {errors} errors) in {elapsed:.1f}s: "
+               f"{processed / elapsed * 60:.1f} files/min, {audio_seconds / 60:.1f} min of audio.")
+    click.echo("Time per stage (summed over workers):")
+    total = sum(stage_seconds.values()) or 1.0
+    for stage, seconds in stage_seconds.items():
+        per_file = seconds / processed * 1000 if processed else 0.0
+        click.echo(f"  {stage:<11}{seconds:>9.1f}s {seconds / total * 100:>5.1f}% {per_file:>9.0f} ms/file")
@@ -4,7 +4,200 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_int(name, default=None):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_floats(name, default):
+    value = os.getenv(name)
+    if not value:
+        return default
+    return tuple(float(v) for v in value.split(","))
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.getenv("SECRET_KEY")
\ No newline at end of file
+    SECRET_KEY = os.getenv("SECRET_KEY")
+
+    # --- Database engine (turned into SQLALCHEMY_ENGINE_OPTIONS) ---
+    # Pool settings apply to server databases (PostgreSQL), not SQLite.
+    DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+    DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+    # Wait this long for a free connection before failing the request.
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    # Replace connections older than this (below typical server idle timeouts).
+    DB_POOL_RECYCLE_SECONDS = _env_int("DB_POOL_RECYCLE_SECONDS", 1800)
+    DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+    DB_CONNECT_TIMEOUT_SECONDS = _env_int("DB_CONNECT_TIMEOUT_SECONDS", 10)
+    # PostgreSQL statement_timeout; 0 disables it.
+    DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 30000)
+    # Commit finished /analyze results from a background writer (with retry)
+    # instead of on the request thread.
+    PRACTICE_SESSION_ASYNC_WRITES = _env_bool("PRACTICE_SESSION_ASYNC_WRITES", False)
+    PRACTICE_SESSION_WRITE_RETRIES = _env_int("PRACTICE_SESSION_WRITE_RETRIES", 5)
+    # First retry delay; doubles per failure.
+    PRACTICE_SESSION_WRITE_RETRY_BACKOFF_SECONDS = float(os.getenv("PRACTICE_SESSION_WRITE_RETRY_BACKOFF_SECONDS", "1.0"))
+
+    # --- Startup / warm-up ---
+    # Load Whisper and configure Gemini on a background thread after boot.
+    # Never started for flask CLI commands other than `flask run`; disable it
+    # for tests too. Subsystems then load on first use.
+    WARMUP_ON_STARTUP = _env_bool("WARMUP_ON_STARTUP", True)
+    # create_app() must finish within this many seconds (see benchmarks/bench_startup.py).
+    STARTUP_TIME_BUDGET_SECONDS = float(os.getenv("STARTUP_TIME_BUDGET_SECONDS", "2.0"))
+
+    # --- Speech recognition ---
+    # Backend: "whisper" (openai-whisper), "faster-whisper" (CTranslate2) or "onnx".
+    ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")
+    ASR_MODEL_NAME = os.getenv("ASR_MODEL_NAME", "base")
+    # Weight precision on CPU: "int8" (quantized) or "float32".
+    ASR_COMPUTE_TYPE = os.getenv("ASR_COMPUTE_TYPE", "int8")
+    ASR_THREADS = _env_int("ASR_THREADS")
+    # Fixing the language skips Whisper's language-detection pass.
+    ASR_LANGUAGE = os.getenv("ASR_LANGUAGE", "en") or None
+    # Unset = greedy decoding, the fastest option.
+    ASR_BEAM_SIZE = _env_int("ASR_BEAM_SIZE")
+    # Temperature fallback schedule; a single "0" disables fallback re-decodes.
+    ASR_TEMPERATURES = _env_floats("ASR_TEMPERATURES", (0.0, 0.2, 0.4, 0.6, 0.8, 1.0))
+    # Word-level timings feed the local speech metrics (pauses, articulation rate).
+    ASR_WORD_TIMESTAMPS = _env_bool("ASR_WORD_TIMESTAMPS", True)
+    # Dynamic batching of concurrent transcriptions (see benchmarks/bench_batching.py).
+    # Tradeoff: batched clips are decoded without word timestamps, so batching
+    # applies only with ASR_WORD_TIMESTAMPS off, which makes the pause and
+    # articulation metrics fall back to transcript-only estimates. Clips over
+    # 30 s and batched results that fail the quality checks are transcribed
+    # unbatched (with the full temperature fallback) in the request thread.
+    ASR_BATCHING_ENABLED = _env_bool("ASR_BATCHING_ENABLED", False)
+    ASR_MAX_BATCH_SIZE = _env_int("ASR_MAX_BATCH_SIZE", 8)
+    ASR_MAX_WAIT_MS = _env_int("ASR_MAX_WAIT_MS", 50)
+    # Recordings longer than the threshold are split at silences and the
+    # chunks transcribed in parallel in a process pool.
+    LONG_AUDIO_ENABLED = _env_bool("LONG_AUDIO_ENABLED", True)
+    LONG_AUDIO_THRESHOLD_SECONDS = float(os.getenv("LONG_AUDIO_THRESHOLD_SECONDS", "120"))
+    LONG_AUDIO_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_CHUNK_SECONDS", "30"))
+    LONG_AUDIO_OVERLAP_SECONDS = float(os.getenv("LONG_AUDIO_OVERLAP_SECONDS", "1.0"))
+    # Defaults to one worker per CPU core.
+    LONG_AUDIO_WORKERS = _env_int("LONG_AUDIO_WORKERS")
+
+    # --- Voice activity detection (before transcription) ---
+    VAD_ENABLED = _env_bool("VAD_ENABLED", True)
+    # Pauses longer than this are shortened to this length before ASR.
+    VAD_MAX_PAUSE_SECONDS = float(os.getenv("VAD_MAX_PAUSE_SECONDS", "0.8"))
+    # Recordings with less detected speech than this are rejected up front.
+    VAD_MIN_SPEECH_SECONDS = float(os.getenv("VAD_MIN_SPEECH_SECONDS", "0.5"))
+
+    # --- Prompt token budgets (tiktoken cl100k estimates) ---
+    HR_ANALYSIS_PROMPT_TOKEN_BUDGET = _env_int("HR_ANALYSIS_PROMPT_TOKEN_BUDGET", 4000)
+    # Shared by all answers of one /analyze/batch call.
+    HR_BATCH_ANALYSIS_PROMPT_TOKEN_BUDGET = _env_int("HR_BATCH_ANALYSIS_PROMPT_TOKEN_BUDGET", 16000)
+    LIVE_TURN_PROMPT_TOKEN_BUDGET = _env_int("LIVE_TURN_PROMPT_TOKEN_BUDGET", 4000)
+    # Large enough for the complete transcript of an hour-long interview.
+    LIVE_ANALYSIS_PROMPT_TOKEN_BUDGET = _env_int("LIVE_ANALYSIS_PROMPT_TOKEN_BUDGET", 32000)
+    # Resume text sent to the optional LLM profile pass is cut to this size.
+    RESUME_MAX_TOKENS = _env_int("RESUME_MAX_TOKENS", 2000)
+    # Cap on the compact resume profile injected into every live turn.
+    RESUME_PROFILE_MAX_TOKENS = _env_int("RESUME_PROFILE_MAX_TOKENS", 400)
+    # Refine new resume profiles with one Gemini call (local parser only when off).
+    RESUME_PROFILE_LLM_ENABLED = _env_bool("RESUME_PROFILE_LLM_ENABLED", False)
+
+    # --- Request deadlines ---
+    # Total time /api/hr/analyze may take, queueing included. Stages past it are
+    # cut short (subprocesses killed, the Gemini call timed out) and the answer
+    # is a partial result. 0 disables the deadline.
+    HR_ANALYZE_DEADLINE_SECONDS = float(os.getenv("HR_ANALYZE_DEADLINE_SECONDS", "45"))
+
+    # --- Admin endpoints (/admin/...) ---
+    # Unset disables them; otherwise sent as the X-Admin-Token header.
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+    # --- Sampling profiler ---
+    # Random sampling is off by default. When enabled, this fraction of
+    # requests and Socket.IO jobs is profiled. Admins can always profile the
+    # next N via POST /admin/profiler, or one request with "X-Profile: 1"
+    # plus X-Admin-Token.
+    PROFILER_ENABLED = _env_bool("PROFILER_ENABLED", False)
+    PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0.01"))
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    # Finished profiles kept in memory (oldest are dropped).
+    PROFILER_MAX_PROFILES = _env_int("PROFILER_MAX_PROFILES", 20)
+
+    # --- Batch analysis (/api/hr/analyze/batch) ---
+    HR_BATCH_MAX_ANSWERS = _env_int("HR_BATCH_MAX_ANSWERS", 10)
+    # Recordings of one batch decoded and transcribed concurrently.
+    HR_BATCH_TRANSCRIBE_WORKERS = _env_int("HR_BATCH_TRANSCRIBE_WORKERS", 4)
+
+    # --- Live interview memory ---
+    # "rolling": running summary + recent turns (constant-size prompts).
+    # "window": the last 12 turns verbatim (previous behaviour).
+    LIVE_MEMORY_MODE = os.getenv("LIVE_MEMORY_MODE", "rolling")
+    # Turns always sent verbatim in rolling mode (6 = three exchanges).
+    LIVE_RECENT_TURNS = _env_int("LIVE_RECENT_TURNS", 6)
+    # Summarize once this many turns have aged out of the recent window.
+    LIVE_SUMMARY_TRIGGER_TURNS = _env_int("LIVE_SUMMARY_TRIGGER_TURNS", 4)
+    LIVE_SUMMARY_MAX_TOKENS = _env_int("LIVE_SUMMARY_MAX_TOKENS", 400)
+
+    # --- Live interview persistence ---
+    # Turns are buffered and written by a background thread (write-behind),
+    # flushed every interval, once this many items are pending, or on disconnect.
+    LIVE_PERSIST_ENABLED = _env_bool("LIVE_PERSIST_ENABLED", True)
+    LIVE_PERSIST_FLUSH_INTERVAL_SECONDS = float(os.getenv("LIVE_PERSIST_FLUSH_INTERVAL_SECONDS", "2.0"))
+    LIVE_PERSIST_FLUSH_MAX_ITEMS = _env_int("LIVE_PERSIST_FLUSH_MAX_ITEMS", 10)
+
+    # --- Admission control ---
+    # Per-endpoint limits: concurrent requests overall ("global") and per
+    # caller ("per_user", keyed by client IP), plus how many may wait for a
+    # slot ("queue") and for how long before a 503.
+    ADMISSION_ENABLED = _env_bool("ADMISSION_ENABLED", True)
+    # Key per-user limits on X-User-Id instead of the IP. Only enable this
+    # behind a trusted proxy that sets the header itself; clients can forge it.
+    ADMISSION_TRUST_USER_HEADER = _env_bool("ADMISSION_TRUST_USER_HEADER", False)
+    ADMISSION_LIMITS = {
+        'hr_analyze': {
+            'global': _env_int("ADMISSION_HR_ANALYZE_GLOBAL", 4),
+            'per_user': _env_int("ADMISSION_HR_ANALYZE_PER_USER", 2),
+            'queue': _env_int("ADMISSION_HR_ANALYZE_QUEUE", 8),
+            'queue_timeout_seconds': float(os.getenv("ADMISSION_HR_ANALYZE_QUEUE_TIMEOUT", "15")),
+        },
+        'live_turn': {
+            'global': _env_int("ADMISSION_LIVE_TURN_GLOBAL", 16),
+            'per_user': _env_int("ADMISSION_LIVE_TURN_PER_USER", 2),
+            'queue': _env_int("ADMISSION_LIVE_TURN_QUEUE", 32),
+            'queue_timeout_seconds': float(os.getenv("ADMISSION_LIVE_TURN_QUEUE_TIMEOUT", "5")),
+        },
+        'live_analysis': {
+            'global': _env_int("ADMISSION_LIVE_ANALYSIS_GLOBAL", 4),
+            'per_user': _env_int("ADMISSION_LIVE_ANALYSIS_PER_USER", 2),
+            'queue': _env_int("ADMISSION_LIVE_ANALYSIS_QUEUE", 8),
+            'queue_timeout_seconds': float(os.getenv("ADMISSION_LIVE_ANALYSIS_QUEUE_TIMEOUT", "30")),
+        },
+    }
+
+    # --- Live interview intent fast path ---
+    # Answer trivial turns (acknowledgements, repeat/clarify, meta, skip) from
+    # a rules file without calling Gemini. Defaults to app/services/intent_rules.json.
+    INTENT_FAST_PATH_ENABLED = _env_bool("INTENT_FAST_PATH_ENABLED", True)
+    INTENT_RULES_PATH = os.getenv("INTENT_RULES_PATH")
+
+    # --- Live interview speculative replies ---
+    # Opt-in: clients that send user_partial_input (interim speech results)
+    # get Eva's reply generated from a stable prefix before they finish speaking.
+    LIVE_SPECULATION_ENABLED = _env_bool("LIVE_SPECULATION_ENABLED", False)
+    # Start once this many words are stable across two partial results.
+    LIVE_SPECULATION_MIN_WORDS = _env_int("LIVE_SPECULATION_MIN_WORDS", 6)
+    # Reuse the speculative reply when the final text's leading words are at
+    # least this similar to its prefix (same number of words compared).
+    LIVE_SPECULATION_SIMILARITY = float(os.getenv("LIVE_SPECULATION_SIMILARITY", "0.85"))
+    # Cost caps: speculative Gemini calls per user turn and per session.
+    LIVE_SPECULATION_MAX_PER_TURN = _env_int("LIVE_SPECULATION_MAX_PER_TURN", 2)
+    LIVE_SPECULATION_MAX_PER_SESSION = _env_int("LIVE_SPECULATION_MAX_PER_SESSION", 20)
+    LIVE_SPECULATION_WAIT_SECONDS = float(os.getenv("LIVE_SPECULATION_WAIT_SECONDS", "30"))
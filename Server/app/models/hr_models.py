@@ -16,6 +16,7 @@ class PracticeSession(db.Model):
     overall_score = db.Column(db.Float)
     scores_json = db.Column(db.JSON)
     tutoring_plan_json = db.Column(db.JSON)
+    speech_metrics_json = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -33,3 +34,77 @@ class QuestionBank(db.Model):
 
     def __repr__(self):
         return f'<QuestionBank {self.question_text}>'
+
+class ResumeProfile(db.Model):
+    """
+    Model to store the compact profile extracted from an uploaded resume,
+    keyed by a hash of its text so each resume is only processed once.
+    """
+    __tablename__ = 'resume_profiles'
+
+    id = db.Column(db.Integer, primary_key=True)
+    resume_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    profile_json = db.Column(db.JSON, nullable=False)
+    source = db.Column(db.String(16), nullable=False, default='local')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ResumeProfile {self.resume_hash[:12]}>'
+
+class LiveInterview(db.Model):
+    """
+    Model to store one live (Socket.IO) mock interview with Eva.
+    """
+    __tablename__ = 'live_interviews'
+
+    id = db.Column(db.Integer, primary_key=True)
+    public_id = db.Column(db.String(32), unique=True, nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    resume_hash = db.Column(db.String(64))
+    resume_profile = db.Column(db.Text)
+    metrics_json = db.Column(db.JSON)
+    analysis = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    ended_at = db.Column(db.DateTime)
+
+    turns = db.relationship('LiveTurn', backref='interview', lazy=True,
+                            order_by='LiveTurn.turn_index', cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<LiveInterview {self.public_id}>'
+
+class LiveTurn(db.Model):
+    """
+    Model to store a single turn ('User' or 'AI') of a live interview.
+    """
+    __tablename__ = 'live_turns'
+    __table_args__ = (db.UniqueConstraint('interview_id', 'turn_index'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    interview_id = db.Column(db.Integer, db.ForeignKey('live_interviews.id'), nullable=False, index=True)
+    turn_index = db.Column(db.Integer, nullable=False)
+    role = db.Column(db.String(8), nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<LiveTurn {self.interview_id}:{self.turn_index}>'
+
+class LiveAnalysis(db.Model):
+    """
+    Model to store Eva's end-of-interview report, keyed by a fingerprint of
+    the interview content so the same conversation is only analyzed once.
+    """
+    __tablename__ = 'live_analyses'
+
+    id = db.Column(db.Integer, primary_key=True)
+    public_id = db.Column(db.String(32), unique=True, nullable=False, index=True)
+    fingerprint = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    interview_public_id = db.Column(db.String(32), index=True)
+    metrics_json = db.Column(db.JSON)
+    analysis = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<LiveAnalysis {self.id}>'
@@ -0,0 +1,47 @@
+import functools
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from app.services import profiler
+
+admin_bp = Blueprint('admin', __name__)
+
+def admin_required(fn):
+    # Admin endpoints only exist when ADMIN_TOKEN is set, and need it in X-Admin-Token.
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('ADMIN_TOKEN'):
+            return jsonify({'error': 'Not found'}), 404
+        if not profiler.is_admin(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Invalid admin token.'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/profiler', methods=['GET'])
+@admin_required
+def profiler_status():
+    return jsonify(dict(profiler.status(), profiles=profiler.profiles())), 200
+
+@admin_bp.route('/profiler', methods=['POST'])
+@admin_required
+def profiler_toggle():
+    """
+    Body: {"enabled": bool, "sampleRate": 0..1, "profileNext": N}, all optional.
+    `profileNext` profiles the next N requests / Socket.IO jobs regardless of the rate.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        state = profiler.set_toggle(data.get('enabled'), data.get('sampleRate'), data.get('profileNext'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'sampleRate must be a number and profileNext an integer.'}), 400
+    return jsonify(state), 200
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def profile_folded(profile_id):
+    """Folded stacks (flamegraph.pl / speedscope input); ?format=json for the summary too."""
+    profile = profiler.get_profile(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found (it may have been evicted from the ring).'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(dict(profile.summary(), stacks=dict(profile.stacks))), 200
+    return Response(profile.folded(), mimetype='text/plain')
@@ -0,0 +1,33 @@
+from flask import Blueprint, jsonify
+from app.extensions import db
+from app.services import admission, db_engine, metrics, warmup
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness only: the process is up and serving requests.
+    return jsonify({'status': 'ok'}), 200
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    ready = warmup.is_ready()
+    subsystems = warmup.status()
+    if ready:
+        state = 'ready'
+    elif any(s['state'] == warmup.FAILED for s in subsystems.values() if s['required']):
+        state = 'degraded'
+    else:
+        state = 'warming'
+    body = {'status': state, 'subsystems': subsystems}
+    return jsonify(body), 200 if ready else 503
+
+@health_bp.route('/metrics', methods=['GET'])
+def metrics_snapshot():
+    rates = {
+        # Share of live turns answered by the intent fast path (LLM calls avoided).
+        'intentFastPathHitRate': metrics.ratio('intent.hit', 'intent.checked'),
+        # Share of speculative replies that were used for the final answer.
+        'speculationHitRate': metrics.ratio('speculation.hit', 'speculation.started'),
+    }
+    return jsonify(dict(metrics.snapshot(), admission=admission.status(), database=db_engine.pool_status(db.engine), rates=rates)), 200
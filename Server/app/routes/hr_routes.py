@@ -1,26 +1,229 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, request, jsonify, send_from_directory, current_app, Response, stream_with_context
 from werkzeug.utils import secure_filename
-import google.generativeai as genai
-import whisper
+import functools
 import time
 import os
-import ffmpeg
-from dotenv import load_dotenv
 import json
 import re
+import string
+import subprocess
 import tempfile
-import google.auth
-import google.auth.transport.requests
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from app.models.hr_models import PracticeSession, QuestionBank
 from app.extensions import db
+from app.services import admission, asr, llm, long_audio, profiler, prompt_builder, relevance, speech_metrics, streaming, transcription_scheduler, vad, write_behind
+from app.services.audio import SAMPLE_RATE, load_audio
+from app.services.deadline import Deadline, DeadlineExceeded
 from flask_cors import cross_origin
 
+# NOTE: ffmpeg, whisper (torch) and google.generativeai are imported lazily
+# inside the functions that need them so that importing this blueprint is cheap.
+
 hr_bp = Blueprint('hr', __name__)
 
+GEMINI_MODEL_NAME = 'gemini-2.5-flash-preview-05-20'
+
 UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'hr_voice_analyzer_uploads')
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
+# --- Prompt template and response schema (built once at import) ---
+ANALYSIS_PROMPT_TEMPLATE = string.Template("""
+    You are an expert AI HR Interview Coach and Tutor. Your goal is to provide comprehensive, actionable feedback for a candidate's interview response.
+
+    Analyze the following transcribed response in the context of the **given interview question**.
+    Evaluate the response based on clarity, relevance, confidence, fluency, and speaking rate.
+    Provide a detailed tutoring plan with what the candidate did well, areas for improvement, and how to practice for each metric.
+
+    ---
+    **Candidate Response Analysis**
+
+    **Interview Question:**
+    "$interview_question"
+
+    **Candidate's Transcribed Response:**
+    "$text"
+    $wpm_info
+    ---
+
+    Your response must be a JSON object that strictly adheres to the provided schema.
+    Calculate an overall score out of 10 based on all metrics.
+    If WPM information is not available (i.e., audio duration is 0 or not provided), set the `speakingRateAppropriateness` score to 0 and its explanations to "N/A".
+    If a local content check against a reference answer is included above, use it as a hint for `contentRelevanceDepth`, but do not penalize valid points the reference answer does not mention.
+    """)
+
+@functools.lru_cache(maxsize=None)
+def analysis_prompt_overhead_tokens():
+    # Counted on first use so importing the blueprint never loads tiktoken.
+    return prompt_builder.count_tokens(ANALYSIS_PROMPT_TEMPLATE.substitute(interview_question='', text='', wpm_info=''))
+
+ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "overallScore": {"type": "NUMBER"},
+        "scores": {
+            "type": "OBJECT",
+            "properties": {
+                "clarityConciseness": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "score": {"type": "NUMBER"},
+                        "explanation": {"type": "STRING"}
+                    }
+                },
+                "contentRelevanceDepth": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "score": {"type": "NUMBER"},
+                        "explanation": {"type": "STRING"}
+                    }
+                },
+                "perceivedConfidence": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "score": {"type": "NUMBER"},
+                        "explanation": {"type": "STRING"}
+                    }
+                },
+                "fluency": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "score": {"type": "NUMBER"},
+                        "explanation": {"type": "STRING"}
+                    }
+                },
+                "speakingRateAppropriateness": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "score": {"type": "NUMBER"},
+                        "explanation": {"type": "STRING"}
+                    }
+                }
+            }
+        },
+        "tutoringPlan": {
+            "type": "OBJECT",
+            "properties": {
+                "clarityConciseness": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "whatYouDidWell": {"type": "STRING"},
+                        "areasForImprovement": {"type": "STRING"},
+                        "howToPractice": {"type": "STRING"}
+                    }
+                },
+                "contentRelevanceDepth": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "whatYouDidWell": {"type": "STRING"},
+                        "areasForImprovement": {"type": "STRING"},
+                        "howToPractice": {"type": "STRING"}
+                    }
+                },
+                "perceivedConfidence": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "whatYouDidWell": {"type": "STRING"},
+                        "areasForImprovement": {"type": "STRING"},
+                        "howToPractice": {"type": "STRING"}
+                    }
+                },
+                "fluency": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "whatYouDidWell": {"type": "STRING"},
+                        "areasForImprovement": {"type": "STRING"},
+                        "howToPractice": {"type": "STRING"}
+                    }
+                },
+                "speakingRateAppropriateness": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "whatYouDidWell": {"type": "STRING"},
+                        "areasForImprovement": {"type": "STRING"},
+                        "howToPractice": {"type": "STRING"}
+                    }
+                }
+            }
+        },
+        "transcription": {"type": "STRING"},
+        "audioDurationSeconds": {"type": "NUMBER"},
+        "wordsPerMinute": {"type": "NUMBER"}
+    },
+    "required": [
+        "overallScore", "scores", "tutoringPlan", "transcription",
+        "audioDurationSeconds", "wordsPerMinute"
+    ]
+}
+ANALYSIS_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": ANALYSIS_RESPONSE_SCHEMA,
+    "temperature": 0.3
+}
+
+# One call grades a whole practice round: the instructions and schema are sent
+# once instead of once per answer. Fields measured locally (transcription,
+# duration, WPM) are left out of the items so Gemini does not echo them back.
+BATCH_ANALYSIS_PROMPT_TEMPLATE = string.Template("""
+    You are an expert AI HR Interview Coach and Tutor. Your goal is to provide comprehensive, actionable feedback for each of a candidate's interview responses.
+
+    Analyze each of the following transcribed responses in the context of **its own interview question**, independently of the others.
+    Evaluate every response based on clarity, relevance, confidence, fluency, and speaking rate.
+    Provide a detailed tutoring plan for each response with what the candidate did well, areas for improvement, and how to practice for each metric.
+
+    ---
+    $answers
+    ---
+
+    Your response must be a JSON object that strictly adheres to the provided schema, with exactly one entry in `answers` per candidate response, carrying the response's number as `answerIndex`.
+    Calculate an overall score out of 10 for each response based on all its metrics.
+    If WPM information is not available for a response, set its `speakingRateAppropriateness` score to 0 and its explanations to "N/A".
+    If a local content check against a reference answer is included, use it as a hint for `contentRelevanceDepth`, but do not penalize valid points the reference answer does not mention.
+    """)
+
+BATCH_ANSWER_TEMPLATE = string.Template("""
+    **Candidate Response $index**
+
+    **Interview Question:**
+    "$interview_question"
+
+    **Candidate's Transcribed Response:**
+    "$text"
+    $wpm_info
+""")
+
+@functools.lru_cache(maxsize=None)
+def batch_prompt_overhead_tokens(answer_count):
+    empty_answer = BATCH_ANSWER_TEMPLATE.substitute(index=answer_count, interview_question='', text='', wpm_info='')
+    return (prompt_builder.count_tokens(BATCH_ANALYSIS_PROMPT_TEMPLATE.substitute(answers=''))
+            + answer_count * prompt_builder.count_tokens(empty_answer))
+
+BATCH_ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "answers": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "answerIndex": {"type": "INTEGER"},
+                    "overallScore": ANALYSIS_RESPONSE_SCHEMA['properties']['overallScore'],
+                    "scores": ANALYSIS_RESPONSE_SCHEMA['properties']['scores'],
+                    "tutoringPlan": ANALYSIS_RESPONSE_SCHEMA['properties']['tutoringPlan']
+                },
+                "required": ["answerIndex", "overallScore", "scores", "tutoringPlan"]
+            }
+        }
+    },
+    "required": ["answers"]
+}
+BATCH_ANALYSIS_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": BATCH_ANALYSIS_RESPONSE_SCHEMA,
+    "temperature": 0.3
+}
+
 @hr_bp.route('/uploads/<filename>')
 @cross_origin()
 def uploaded_file(filename):
@@ -47,34 +250,14 @@ def get_model_answer():
         
     return jsonify({'model_answer': model_answer.model_answer})
 
-# Load environment variables and configure Gemini API
-load_dotenv()
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    service_account_key_path = os.path.join(script_dir, "../../gemini-service-account.json")
-    
-    credentials, project_id = google.auth.load_credentials_from_file(service_account_key_path)
-    genai.configure(credentials=credentials)
-    print("Gemini API configured successfully using service account key.")
-except FileNotFoundError as e:
-    print(f"Service account key file not found. Falling back to API key from environment variables. Error: {e}")
-    try:
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-        if not gemini_api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables.")
-        genai.configure(api_key=gemini_api_key)
-        print("Gemini API configured successfully using environment variable.")
-    except Exception as e:
-        print(f"Error configuring Gemini API with API key: {e}")
-        exit()
-except Exception as e:
-    print(f"Error configuring Gemini API with service account: {e}")
-    exit()
-
-def get_audio_duration(file_path):
+def get_audio_duration(file_path, deadline=None):
     duration = 0.0
     try:
-        probe = ffmpeg.probe(file_path)
+        # Same command ffmpeg.probe runs, but killed when the deadline expires.
+        result = (deadline or Deadline(None)).run_process(
+            'probe', ['ffprobe', '-show_format', '-show_streams', '-of', 'json', file_path]
+        )
+        probe = json.loads(result.stdout.decode('utf-8'))
         
         if 'format' in probe and 'duration' in probe['format']:
             duration = float(probe['format']['duration'])
@@ -96,7 +279,9 @@ def get_audio_duration(file_path):
         else:
             print(f"Warning: FFmpeg probe returned zero or no duration for {file_path}.")
 
-    except ffmpeg.Error as e:
+    except DeadlineExceeded:
+        raise
+    except subprocess.CalledProcessError as e:
         print(f"Error probing duration for {file_path} with ffmpeg: {e.stderr.decode().strip()}")
         duration = 0.0
     except Exception as e:
@@ -105,35 +290,45 @@ def get_audio_duration(file_path):
     
     return duration
 
-def transcribe_audio_file(audio_path, model_name="base"):
-    if not os.path.exists(audio_path):
-        print(f"Error: Audio file not found at {audio_path}")
+def transcribe_audio_file(audio, deadline=None):
+    """
+    `audio` is a file path or a 16 kHz float32 sample array.
+    Returns the ASR result dict (text, segments, words) or None on failure.
+    Raises DeadlineExceeded when `deadline` runs out first.
+    """
+    if isinstance(audio, str) and not os.path.exists(audio):
+        print(f"Error: Audio file not found at {audio}")
         return None
 
-    print(f"Loading Whisper model '{model_name}'...")
     try:
-        model = whisper.load_model(model_name)
-        print("Model loaded successfully.")
+        backend = asr.get_backend()
     except Exception as e:
-        print(f"Error loading Whisper model: {e}")
+        print(f"Error loading ASR backend: {e}")
         return None
 
-    print(f"Transcribing audio from: {audio_path}")
-    transcription = None
-    
+    source = audio if isinstance(audio, str) else f"{len(audio) / SAMPLE_RATE:.2f}s of decoded audio"
+    print(f"Transcribing {source} (backend: {backend.name})")
+
+    def transcribe():
+        if not isinstance(audio, str) and long_audio.should_chunk(audio):
+            return long_audio.transcribe_long(audio)
+        if transcription_scheduler.is_enabled():
+            return transcription_scheduler.get_scheduler().transcribe(audio)
+        return backend.transcribe(audio)
+
     try:
-        result = model.transcribe(audio_path)
-        transcription = result["text"]
+        # Whisper cannot be interrupted; on expiry the run is abandoned.
+        result = (deadline or Deadline(None)).run('transcribe', transcribe)
         print("Transcription complete.")
-        return transcription
+        return result
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"Error during transcription: {e}")
         return None
 
-def analyze_text_with_gemini(text, interview_question, audio_duration=None):
-    print("\n--- Sending text to Gemini for detailed analysis and tutoring ---")
-    model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-
+def delivery_hints(text, audio_duration=None, pause_stats=None, speech_metrics=None, relevance_hint=None):
+    """The locally measured facts about one answer, as prompt lines for Gemini."""
     wpm_info = ""
     num_words = len(text.split())
     words_per_minute = 0
@@ -147,148 +342,229 @@ def analyze_text_with_gemini(text, interview_question, audio_duration=None):
         wpm_info = ""
         words_per_minute = 0
 
-    prompt = f"""
-    You are an expert AI HR Interview Coach and Tutor. Your goal is to provide comprehensive, actionable feedback for a candidate's interview response.
+    if pause_stats:
+        wpm_info += (
+            f"\n- Pauses (measured on the original recording): {pause_stats['pauseCount']} pauses totalling "
+            f"{pause_stats['totalPauseSeconds']:.1f}s, longest {pause_stats['maxPauseSeconds']:.1f}s, "
+            f"{pause_stats['longPauseCount']} longer than 2 seconds; the candidate was speaking for "
+            f"{pause_stats['speechRatio'] * 100:.0f}% of the recording."
+        )
+
+    if speech_metrics:
+        if speech_metrics['articulationRateWpm']:
+            wpm_info += f"\n- Articulation rate (excluding pauses): {speech_metrics['articulationRateWpm']:.0f} WPM."
+        wpm_info += (
+            f"\n- Filler words: {speech_metrics['fillerCount']} ({speech_metrics['fillersPer100Words']:.1f} per 100 words)."
+            f"\n- Pitch variability: {speech_metrics['pitchVariabilitySemitones']:.1f} semitones "
+            f"(below ~1.5 sounds monotone); energy variability: {speech_metrics['energyStdDb']:.1f} dB."
+        )
+
+    if relevance_hint:
+        wpm_info += f"\n- Local content check against the reference answer: {relevance.describe(relevance_hint)}"
+
+    return wpm_info
+
+def build_gemini_request(text, interview_question, audio_duration=None, pause_stats=None, speech_metrics=None, relevance_hint=None):
+    """
+    Return (prompt, generation_config, token_report) for the coaching analysis.
+    The transcript is trimmed before the delivery metrics when the prompt
+    would exceed HR_ANALYSIS_PROMPT_TOKEN_BUDGET.
+    """
+    wpm_info = delivery_hints(text, audio_duration, pause_stats, speech_metrics, relevance_hint)
+
+    built = prompt_builder.fit_sections(
+        [
+            prompt_builder.Section('question', text=interview_question),
+            prompt_builder.Section('transcript', text=text, priority=prompt_builder.PRIORITY_HISTORY, min_tokens=200),
+            prompt_builder.Section('metrics', text=wpm_info, priority=prompt_builder.PRIORITY_METRICS),
+        ],
+        budget=current_app.config['HR_ANALYSIS_PROMPT_TOKEN_BUDGET'],
+        overhead_tokens=analysis_prompt_overhead_tokens()
+    )
+    prompt = ANALYSIS_PROMPT_TEMPLATE.substitute(
+        interview_question=built.text('question'),
+        text=built.text('transcript'),
+        wpm_info=built.text('metrics')
+    )
+    token_report = built.token_report(analysis_prompt_overhead_tokens())
+    prompt_builder.record_usage('hr_analysis', token_report)
+    return prompt, ANALYSIS_GENERATION_CONFIG, token_report
+
+def llm_request_options(deadline):
+    """generate_content kwargs that stop the Gemini call when `deadline` expires."""
+    if deadline is None:
+        return {}
+    timeout = deadline.timeout('llm')
+    return {'request_options': {'timeout': timeout}} if timeout is not None else {}
+
+def analyze_text_with_gemini(text, interview_question, audio_duration=None, pause_stats=None, speech_metrics=None, relevance_hint=None, deadline=None):
+    print("\n--- Sending text to Gemini for detailed analysis and tutoring ---")
+    model = llm.get_model(GEMINI_MODEL_NAME)
+    if model is None:
+        print("Gemini API is not configured; skipping analysis.")
+        return None
 
-    Analyze the following transcribed response in the context of the **given interview question**.
-    Evaluate the response based on clarity, relevance, confidence, fluency, and speaking rate.
-    Provide a detailed tutoring plan with what the candidate did well, areas for improvement, and how to practice for each metric.
+    prompt, generation_config, token_report = build_gemini_request(text, interview_question, audio_duration, pause_stats, speech_metrics, relevance_hint)
+    print(f"Prompt tokens: {token_report['total']} (budget {token_report['budget']}, trimmed: {token_report['trimmed'] or 'none'})")
 
-    ---
-    **Candidate Response Analysis**
+    try:
+        response = model.generate_content(prompt, generation_config=generation_config, **llm_request_options(deadline))
+        feedback_json = json.loads(response.text)
+        feedback_json['promptTokens'] = token_report
+        print("Gemini analysis complete and JSON parsed successfully.")
+        return feedback_json
+    except json.JSONDecodeError as e:
+        print(f"FATAL: JSON parsing error from Gemini response even with schema enforcement: {e}")
+        return None
+    except Exception as e:
+        print(f"Error generating content from Gemini: {e}")
+        return None
 
-    **Interview Question:**
-    "{interview_question}"
+def stream_text_with_gemini(text, interview_question, audio_duration=None, pause_stats=None, speech_metrics=None, relevance_hint=None, deadline=None):
+    """
+    Streaming variant of analyze_text_with_gemini. Yields ('section', {...})
+    for every score / tutoring-plan section as soon as its JSON object is
+    complete, then a final ('feedback', parsed_json_or_None).
+    """
+    print("\n--- Streaming text to Gemini for detailed analysis and tutoring ---")
+    model = llm.get_model(GEMINI_MODEL_NAME)
+    if model is None:
+        print("Gemini API is not configured; skipping analysis.")
+        yield 'feedback', None
+        return
 
-    **Candidate's Transcribed Response:**
-    "{text}"
-    {wpm_info}
-    ---
+    prompt, generation_config, token_report = build_gemini_request(text, interview_question, audio_duration, pause_stats, speech_metrics, relevance_hint)
+    print(f"Prompt tokens: {token_report['total']} (budget {token_report['budget']}, trimmed: {token_report['trimmed'] or 'none'})")
+    parser = streaming.SectionStreamParser(parents=('scores', 'tutoringPlan'))
 
-    Your response must be a JSON object that strictly adheres to the provided schema.
-    Calculate an overall score out of 10 based on all metrics.
-    If WPM information is not available (i.e., audio duration is 0 or not provided), set the `speakingRateAppropriateness` score to 0 and its explanations to "N/A".
-    """
+    try:
+        response = model.generate_content(prompt, generation_config=generation_config, stream=True, **llm_request_options(deadline))
+        for chunk in response:
+            if deadline is not None:
+                deadline.check('llm')
+            for group, name, data in parser.feed(chunk.text):
+                yield 'section', {'group': group, 'name': name, 'data': data}
+        feedback_json = json.loads(parser.buffer)
+        feedback_json['promptTokens'] = token_report
+        print("Gemini analysis complete and JSON parsed successfully.")
+        yield 'feedback', feedback_json
+    except json.JSONDecodeError as e:
+        print(f"FATAL: JSON parsing error from Gemini response even with schema enforcement: {e}")
+        yield 'feedback', None
+    except Exception as e:
+        print(f"Error generating content from Gemini: {e}")
+        yield 'feedback', None
 
-    response_schema = {
-        "type": "OBJECT",
-        "properties": {
-            "overallScore": {"type": "NUMBER"},
-            "scores": {
-                "type": "OBJECT",
-                "properties": {
-                    "clarityConciseness": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "score": {"type": "NUMBER"},
-                            "explanation": {"type": "STRING"}
-                        }
-                    },
-                    "contentRelevanceDepth": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "score": {"type": "NUMBER"},
-                            "explanation": {"type": "STRING"}
-                        }
-                    },
-                    "perceivedConfidence": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "score": {"type": "NUMBER"},
-                            "explanation": {"type": "STRING"}
-                        }
-                    },
-                    "fluency": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "score": {"type": "NUMBER"},
-                            "explanation": {"type": "STRING"}
-                        }
-                    },
-                    "speakingRateAppropriateness": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "score": {"type": "NUMBER"},
-                            "explanation": {"type": "STRING"}
-                        }
-                    }
-                }
-            },
-            "tutoringPlan": {
-                "type": "OBJECT",
-                "properties": {
-                    "clarityConciseness": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "whatYouDidWell": {"type": "STRING"},
-                            "areasForImprovement": {"type": "STRING"},
-                            "howToPractice": {"type": "STRING"}
-                        }
-                    },
-                    "contentRelevanceDepth": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "whatYouDidWell": {"type": "STRING"},
-                            "areasForImprovement": {"type": "STRING"},
-                            "howToPractice": {"type": "STRING"}
-                        }
-                    },
-                    "perceivedConfidence": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "whatYouDidWell": {"type": "STRING"},
-                            "areasForImprovement": {"type": "STRING"},
-                            "howToPractice": {"type": "STRING"}
-                        }
-                    },
-                    "fluency": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "whatYouDidWell": {"type": "STRING"},
-                            "areasForImprovement": {"type": "STRING"},
-                            "howToPractice": {"type": "STRING"}
-                        }
-                    },
-                    "speakingRateAppropriateness": {
-                        "type": "OBJECT",
-                        "properties": {
-                            "whatYouDidWell": {"type": "STRING"},
-                            "areasForImprovement": {"type": "STRING"},
-                            "howToPractice": {"type": "STRING"}
-                        }
-                    }
-                }
-            },
-            "transcription": {"type": "STRING"},
-            "audioDurationSeconds": {"type": "NUMBER"},
-            "wordsPerMinute": {"type": "NUMBER"}
-        },
-        "required": [
-            "overallScore", "scores", "tutoringPlan", "transcription",
-            "audioDurationSeconds", "wordsPerMinute"
+def build_batch_gemini_request(answers):
+    """
+    Return (prompt, generation_config, token_report) grading every answer in
+    one call. `answers` are dicts with question, text, audio_duration,
+    pause_stats, speech_metrics and relevance. Transcripts are trimmed before
+    the delivery metrics when the prompt would exceed
+    HR_BATCH_ANALYSIS_PROMPT_TOKEN_BUDGET.
+    """
+    sections = []
+    for i, answer in enumerate(answers, 1):
+        wpm_info = delivery_hints(answer['text'], answer['audio_duration'], answer['pause_stats'],
+                                  answer['speech_metrics'], answer['relevance'])
+        sections += [
+            prompt_builder.Section(f'question_{i}', text=answer['question']),
+            prompt_builder.Section(f'transcript_{i}', text=answer['text'], priority=prompt_builder.PRIORITY_HISTORY, min_tokens=200),
+            prompt_builder.Section(f'metrics_{i}', text=wpm_info, priority=prompt_builder.PRIORITY_METRICS),
         ]
-    }
 
-    generation_config = {
-        "response_mime_type": "application/json",
-        "response_schema": response_schema,
-        "temperature": 0.3
-    }
+    overhead = batch_prompt_overhead_tokens(len(answers))
+    built = prompt_builder.fit_sections(
+        sections,
+        budget=current_app.config['HR_BATCH_ANALYSIS_PROMPT_TOKEN_BUDGET'],
+        overhead_tokens=overhead
+    )
+    prompt = BATCH_ANALYSIS_PROMPT_TEMPLATE.substitute(answers=''.join(
+        BATCH_ANSWER_TEMPLATE.substitute(
+            index=i,
+            interview_question=built.text(f'question_{i}'),
+            text=built.text(f'transcript_{i}'),
+            wpm_info=built.text(f'metrics_{i}')
+        )
+        for i in range(1, len(answers) + 1)
+    ))
+    token_report = built.token_report(overhead)
+    prompt_builder.record_usage('hr_analysis_batch', token_report)
+    return prompt, BATCH_ANALYSIS_GENERATION_CONFIG, token_report
+
+def analyze_batch_with_gemini(answers):
+    """
+    Grade all `answers` with one Gemini call. Returns (feedbacks, token_report)
+    where feedbacks[i] is the feedback for answers[i], or None if Gemini is
+    unavailable or left that answer out.
+    """
+    print(f"\n--- Sending {len(answers)} answers to Gemini for batch analysis ---")
+    model = llm.get_model(GEMINI_MODEL_NAME)
+    if model is None:
+        print("Gemini API is not configured; skipping analysis.")
+        return [None] * len(answers), None
+
+    prompt, generation_config, token_report = build_batch_gemini_request(answers)
+    print(f"Prompt tokens: {token_report['total']} (budget {token_report['budget']}, trimmed: {token_report['trimmed'] or 'none'})")
 
+    feedbacks = [None] * len(answers)
     try:
         response = model.generate_content(prompt, generation_config=generation_config)
-        feedback_json = json.loads(response.text)
-        print("Gemini analysis complete and JSON parsed successfully.")
-        return feedback_json
+        for item in json.loads(response.text).get('answers', []):
+            index = item.pop('answerIndex', None)
+            if isinstance(index, int) and 1 <= index <= len(answers) and feedbacks[index - 1] is None:
+                feedbacks[index - 1] = item
+        print(f"Gemini batch analysis complete: {sum(f is not None for f in feedbacks)} of {len(answers)} answers graded.")
     except json.JSONDecodeError as e:
-        print(f"FATAL: JSON parsing error from Gemini response even with schema enforcement: {e}")
-        return None
+        print(f"FATAL: JSON parsing error from Gemini batch response even with schema enforcement: {e}")
     except Exception as e:
         print(f"Error generating content from Gemini: {e}")
-        return None
+    return feedbacks, token_report
+
+def local_feedback(text, content_relevance):
+    """
+    Feedback built from the local relevance score alone, used when Gemini is
+    unavailable. Only contentRelevanceDepth is scored; the rest are "N/A".
+    Without a relevance score (no model answer) nothing is scored.
+    """
+    not_available = {'score': 0, 'explanation': 'N/A'}
+    scores = {name: dict(not_available) for name in ANALYSIS_RESPONSE_SCHEMA['properties']['scores']['properties']}
+    plan = {
+        name: {'whatYouDidWell': 'N/A', 'areasForImprovement': 'N/A', 'howToPractice': 'N/A'}
+        for name in ANALYSIS_RESPONSE_SCHEMA['properties']['tutoringPlan']['properties']
+    }
+
+    if content_relevance is None:
+        return {'overallScore': None, 'scores': scores, 'tutoringPlan': plan, 'transcription': text, 'analysisSource': None}
+
+    scores['contentRelevanceDepth'] = {'score': content_relevance['score'], 'explanation': relevance.describe(content_relevance)}
+    matched = content_relevance['matchedKeywords']
+    plan['contentRelevanceDepth'] = {
+        'whatYouDidWell': f"You mentioned: {', '.join(matched)}." if matched else 'N/A',
+        'areasForImprovement': ' '.join(content_relevance['missingKeyPoints']) or 'N/A',
+        'howToPractice': 'Compare your answer with the model answer for this question and practise covering its key points with an example of your own.'
+    }
+    return {
+        'overallScore': content_relevance['score'],
+        'scores': scores,
+        'tutoringPlan': plan,
+        'transcription': text,
+        'analysisSource': 'local'
+    }
+
+def wants_event_stream():
+    return request.args.get('stream') in ('1', 'true') or request.accept_mimetypes.best == 'text/event-stream'
 
 @hr_bp.route('/analyze', methods=['POST'])
 def analyze():
+    """
+    Transcribe and grade one answer.
+
+    With `?stream=1` (or `Accept: text/event-stream`) the response is a
+    Server-Sent Events stream: `transcript`, then `metrics`, then one
+    `section` per score / tutoring-plan section as Gemini produces it, and
+    finally `result` with the same body the JSON mode returns (or `error`).
+    """
     if 'audioFile' not in request.files:
         return jsonify({'error': 'No audio file part in the request'}), 400
 
@@ -301,86 +577,425 @@ def analyze():
     if not interview_question:
         return jsonify({'error': 'No interview question provided.'}), 400
 
-    webm_path = None
-    mp3_path = None
-    mp3_audio_url = None
-    audio_duration = 0.0
+    # Every stage from here on shares this budget.
+    deadline = Deadline(current_app.config['HR_ANALYZE_DEADLINE_SECONDS'])
 
+    # Shed load before doing any work: 429 if this caller is already busy,
+    # 503 if the server is saturated and the wait queue is full.
+    gate = admission.get('hr_analyze')
+    user_key = admission.client_key()
+    try:
+        admitted_at = gate.acquire(user_key)
+    except admission.Rejected as e:
+        print(f"Rejected /analyze from {user_key}: {e.reason}")
+        return admission.rejection_response(e)
+
+    streamed = False
     try:
         webm_filename = secure_filename(f"{int(time.time())}_{audio_file.filename}")
         webm_path = os.path.join(UPLOAD_DIR, webm_filename)
         audio_file.save(webm_path)
         print(f"WebM audio file saved to: {webm_path}")
 
-        mp3_filename = webm_filename.replace('.webm', '.mp3')
-        mp3_path = os.path.join(UPLOAD_DIR, mp3_filename)
+        events = run_analysis(webm_path, webm_filename, interview_question, stream_llm=wants_event_stream(), deadline=deadline)
+
+        if wants_event_stream():
+            response = Response(
+                stream_with_context(streaming.sse_event(name, data) for name, data in events),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+            # The slot is held until the stream is finished (or the client goes away)
+            # and any work abandoned at the deadline has stopped using the CPU.
+            response.call_on_close(lambda: deadline.when_idle(lambda: gate.release(user_key, admitted_at)))
+            streamed = True
+            return response
+
+        try:
+            for name, data in events:
+                if name == 'result':
+                    return jsonify(data)
+                if name == 'error':
+                    status = data.pop('status', 500)
+                    return jsonify(data), status
+            return jsonify({'error': 'Analysis finished without a result.'}), 500
+        finally:
+            events.close()
+    finally:
+        if not streamed:
+            # A transcription abandoned at the deadline keeps the slot until it finishes.
+            deadline.when_idle(lambda: gate.release(user_key, admitted_at))
+
+def prepare_answer(webm_path, webm_filename, deadline=None):
+    """
+    Convert, decode, trim silence from and transcribe one saved recording,
+    then compute the local speech metrics. Returns a dict with audio_url,
+    audio_duration, transcription, speech_metrics and pause_stats, or one
+    with 'error' and an HTTP 'status'. Every stage gets only what is left of
+    `deadline`; when it runs out before a transcript exists the result is a
+    504 error carrying whatever was measured so far.
+    """
+    import ffmpeg
+
+    deadline = deadline or Deadline(None)
+    mp3_audio_url = None
+    audio_duration = 0.0
+    speech = None
+
+    mp3_filename = webm_filename.replace('.webm', '.mp3')
+    mp3_path = os.path.join(UPLOAD_DIR, mp3_filename)
 
+    try:
         try:
             print(f"Converting {webm_path} to {mp3_path}...")
-            ffmpeg.input(webm_path).output(mp3_path, acodec='libmp3lame', audio_bitrate='128k').run(overwrite_output=True, quiet=True)
+            convert = ffmpeg.input(webm_path).output(mp3_path, acodec='libmp3lame', audio_bitrate='128k').overwrite_output()
+            deadline.run_process('convert', convert.compile())
             print("Conversion to MP3 complete.")
             mp3_audio_url = f'http://localhost:5000/api/hr/uploads/{mp3_filename}'
             
-            audio_duration = get_audio_duration(mp3_path)
+            audio_duration = get_audio_duration(mp3_path, deadline)
 
-        except ffmpeg.Error as e:
+        except DeadlineExceeded:
+            raise
+        except subprocess.CalledProcessError as e:
             print(f"Error converting WebM to MP3: {e.stderr.decode().strip()}")
             mp3_audio_url = f'http://localhost:5000/api/hr/uploads/{webm_filename}'
             print("Falling back to WebM audio URL due to MP3 conversion failure.")
-            audio_duration = get_audio_duration(webm_path)
+            audio_duration = get_audio_duration(webm_path, deadline)
         except Exception as e:
             print(f"An unexpected error occurred during MP3 conversion: {e}")
             mp3_audio_url = f'http://localhost:5000/api/hr/uploads/{webm_filename}'
             print("Falling back to WebM audio URL due to unexpected MP3 conversion error.")
-            audio_duration = get_audio_duration(webm_path)
-
-        transcribed_text = transcribe_audio_file(webm_path, model_name="base")
-
-        if transcribed_text is not None:
-            if len(transcribed_text.strip()) < 3:
-                return jsonify({'error': 'Transcription is too short to analyze. Please provide a more detailed response.'}), 400
-
-            gemini_feedback = analyze_text_with_gemini(transcribed_text, interview_question, audio_duration)
-            if gemini_feedback:
-                gemini_feedback['audio_url'] = mp3_audio_url
-                gemini_feedback['question'] = interview_question
-                gemini_feedback['audioDurationSeconds'] = audio_duration
-                gemini_feedback['wordsPerMinute'] = gemini_feedback.get('wordsPerMinute', 0)
-
-                # Store the session in the database
-                new_session = PracticeSession(
-                    user_id=1, # This will be the actual user_id in a real app
-                    question=interview_question,
-                    transcription=transcribed_text,
-                    audio_url=mp3_audio_url,
-                    overall_score=gemini_feedback.get('overallScore', 0),
-                    scores_json=gemini_feedback.get('scores', {}),
-                    tutoring_plan_json=gemini_feedback.get('tutoringPlan', {})
-                )
-                db.session.add(new_session)
-                db.session.commit()
-
-                return jsonify(gemini_feedback)
-            else:
-                return jsonify({'error': 'Failed to get structured feedback from Gemini. The model returned an invalid response that could not be parsed.'}), 500
+            audio_duration = get_audio_duration(webm_path, deadline)
+
+        # Decode once; VAD, ASR and the speech metrics all share the samples.
+        samples = None
+        try:
+            samples = load_audio(webm_path, timeout=deadline.timeout('decode'))
+        except subprocess.TimeoutExpired as e:
+            raise deadline.exceeded('decode') from e
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Could not decode audio for local analysis: {e}")
+
+        if samples is not None and not audio_duration:
+            audio_duration = len(samples) / SAMPLE_RATE
+
+        # Drop silence before any model runs.
+        transcription_input = webm_path if samples is None else samples
+        if samples is not None and current_app.config['VAD_ENABLED']:
+            deadline.check('vad')
+            speech = vad.analyze_speech(
+                samples,
+                max_pause_seconds=current_app.config['VAD_MAX_PAUSE_SECONDS'],
+                min_speech_seconds=current_app.config['VAD_MIN_SPEECH_SECONDS']
+            )
+
+        if speech is not None:
+            if speech['is_silent']:
+                return {'error': 'No speech was detected in the recording. Please check your microphone and try again.', 'status': 400}
+            print(f"VAD kept {len(speech['samples']) / SAMPLE_RATE:.2f}s of {speech['original_seconds']:.2f}s of audio.")
+            transcription_input = speech['samples']
+
+        transcription = transcribe_audio_file(transcription_input, deadline)
+    except DeadlineExceeded as e:
+        print(f"Analysis of {webm_path} stopped: {e}")
+        return {
+            'error': 'The analysis took too long and was stopped before the transcript was ready. Please try again.',
+            'status': 504,
+            'partial': True,
+            'timedOutStage': e.stage,
+            'audio_url': mp3_audio_url,
+            'audioDurationSeconds': audio_duration,
+            'pauseStatistics': speech['pause_stats'] if speech else None
+        }
+
+    if transcription is None:
+        return {'error': 'Transcription failed. The audio might be silent or in an unsupported format.', 'status': 500}
+
+    transcribed_text = transcription['text']
+    if len(transcribed_text.strip()) < 3:
+        return {'error': 'Transcription is too short to analyze. Please provide a more detailed response.', 'status': 400}
+
+    local_metrics = None
+    if samples is not None:
+        local_metrics = speech_metrics.compute_speech_metrics(
+            samples, transcription, spans=speech['spans'] if speech else None
+        )
+
+    return {
+        'audio_url': mp3_audio_url,
+        'audio_duration': audio_duration,
+        'transcription': transcribed_text,
+        'speech_metrics': local_metrics,
+        'pause_stats': speech['pause_stats'] if speech else None
+    }
+
+def score_relevance(interview_question, text):
+    try:
+        return relevance.score_answer(interview_question, text)
+    except Exception as e:
+        print(f"Local relevance scoring failed: {e}")
+        return None
+
+def complete_feedback(feedback, prepared, interview_question, content_relevance):
+    """Add the locally measured fields to the LLM (or fallback) feedback."""
+    local_metrics = prepared['speech_metrics']
+    feedback['audio_url'] = prepared['audio_url']
+    feedback['question'] = interview_question
+    feedback['audioDurationSeconds'] = prepared['audio_duration']
+    feedback['pauseStatistics'] = prepared['pause_stats']
+    feedback['speechMetrics'] = local_metrics
+    feedback['contentRelevance'] = content_relevance
+    feedback.setdefault('partial', False)
+    if local_metrics:
+        feedback['wordsPerMinute'] = local_metrics['speakingRateWpm']
+    else:
+        feedback['wordsPerMinute'] = feedback.get('wordsPerMinute', 0)
+    return feedback
+
+def practice_session_fields(prepared, interview_question, feedback):
+    return dict(
+        user_id=1, # This will be the actual user_id in a real app
+        question=interview_question,
+        transcription=prepared['transcription'],
+        audio_url=prepared['audio_url'],
+        overall_score=feedback.get('overallScore', 0),
+        scores_json=feedback.get('scores', {}),
+        tutoring_plan_json=feedback.get('tutoringPlan', {}),
+        speech_metrics_json=dict(prepared['speech_metrics'] or {}, pauseStatistics=prepared['pause_stats'])
+    )
+
+def persist_practice_sessions(key, items):
+    """Write-behind flush: each item is the list of rows of one request, saved together."""
+    try:
+        db.session.add_all(PracticeSession(**fields) for rows in items for fields in rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+session_writer = write_behind.WriteBehindBuffer('practice_sessions', persist_practice_sessions, max_items=1)
+
+def save_practice_sessions(rows):
+    """
+    Save the PracticeSession rows of one request in one transaction: on the
+    request thread, or queued for the background writer when
+    PRACTICE_SESSION_ASYNC_WRITES is on (the response does not wait for it).
+    """
+    if not rows:
+        return
+    if current_app.config['PRACTICE_SESSION_ASYNC_WRITES']:
+        # One key per request, so a row that keeps failing only drops its own request.
+        session_writer.add(uuid.uuid4().hex, rows)
+        return
+    try:
+        db.session.add_all(PracticeSession(**fields) for fields in rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+def init_hr(app):
+    session_writer.configure(app)
+    session_writer.max_retries = app.config['PRACTICE_SESSION_WRITE_RETRIES']
+    session_writer.retry_backoff = app.config['PRACTICE_SESSION_WRITE_RETRY_BACKOFF_SECONDS']
+    return app
+
+def remove_upload(webm_path):
+    # Clean up WebM file (original recording)
+    if os.path.exists(webm_path):
+        try:
+            os.remove(webm_path)
+            print(f"Cleaned up original WebM file: {webm_path}")
+        except Exception as e:
+            print(f"Error cleaning up WebM file {webm_path}: {e}")
+
+    # DO NOT clean up MP3 file - we need it for playback!
+    # The MP3 file will remain in UPLOAD_DIR and can be served via /uploads endpoint
+
+def run_analysis(webm_path, webm_filename, interview_question, stream_llm=False, deadline=None):
+    """
+    The analysis pipeline as a generator of (event, data) pairs. Always ends
+    with either 'result' or 'error' (which carries an HTTP 'status'). If
+    `deadline` runs out after transcription, the result is marked 'partial':
+    transcript and local metrics without Gemini's feedback.
+    """
+    deadline = deadline or Deadline(None)
+    try:
+        prepared = prepare_answer(webm_path, webm_filename, deadline)
+        if 'error' in prepared:
+            yield 'error', prepared
+            return
+
+        transcribed_text = prepared['transcription']
+        local_metrics = prepared['speech_metrics']
+        pause_stats = prepared['pause_stats']
+        audio_duration = prepared['audio_duration']
+
+        yield 'transcript', {'transcription': transcribed_text, 'audio_url': prepared['audio_url'], 'question': interview_question}
+
+        yield 'metrics', {
+            'audioDurationSeconds': audio_duration,
+            'wordsPerMinute': local_metrics['speakingRateWpm'] if local_metrics else 0,
+            'speechMetrics': local_metrics,
+            'pauseStatistics': pause_stats
+        }
+
+        content_relevance = score_relevance(interview_question, transcribed_text)
+
+        if stream_llm:
+            gemini_feedback = None
+            for name, data in stream_text_with_gemini(transcribed_text, interview_question, audio_duration, pause_stats, local_metrics, content_relevance, deadline):
+                if name == 'section':
+                    yield name, data
+                else:
+                    gemini_feedback = data
         else:
-            return jsonify({'error': 'Transcription failed. The audio might be silent or in an unsupported format.'}), 500
+            gemini_feedback = analyze_text_with_gemini(transcribed_text, interview_question, audio_duration, pause_stats, local_metrics, content_relevance, deadline)
+
+        if not gemini_feedback and deadline.expired():
+            print(f"Deadline of {deadline.seconds:.0f}s reached before Gemini finished; returning a partial result.")
+            gemini_feedback = local_feedback(transcribed_text, content_relevance)
+            gemini_feedback['partial'] = True
+            gemini_feedback['partialReason'] = (
+                f"The {deadline.seconds:.0f}s analysis deadline was reached before the AI coach finished. "
+                "The transcript and speech metrics are complete; coaching feedback is missing."
+            )
+        elif not gemini_feedback and content_relevance:
+            print("Falling back to the local relevance score.")
+            gemini_feedback = local_feedback(transcribed_text, content_relevance)
+
+        if not gemini_feedback:
+            yield 'error', {
+                'error': 'Failed to get structured feedback from Gemini. The model returned an invalid response that could not be parsed.',
+                'transcription': transcribed_text,
+                'speechMetrics': local_metrics,
+                'pauseStatistics': pause_stats,
+                'status': 500
+            }
+            return
+
+        complete_feedback(gemini_feedback, prepared, interview_question, content_relevance)
+
+        # Store the session in the database (a partial result without any score is not a practice session)
+        if gemini_feedback['overallScore'] is not None:
+            save_practice_sessions([practice_session_fields(prepared, interview_question, gemini_feedback)])
+
+        yield 'result', gemini_feedback
     except Exception as e:
         print(f"An unexpected error occurred during analysis: {e}")
-        return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
+        yield 'error', {'error': f'An unexpected error occurred: {str(e)}', 'status': 500}
     finally:
-        # Clean up WebM file (original recording)
-        if 'webm_path' in locals() and os.path.exists(webm_path):
+        remove_upload(webm_path)
+        print("Analysis complete. Audio file is available for playback.")
+
+@hr_bp.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Transcribe and grade a whole practice round with a single Gemini call.
+
+    Multipart form with `audioFiles` and `interviewQuestions` repeated in the
+    same order. Responds with `results` in that order, each either the body
+    /analyze would return or an `error`, plus the batch's `promptTokens`.
+    All graded answers are saved in one transaction.
+    """
+    audio_files = request.files.getlist('audioFiles')
+    questions = request.form.getlist('interviewQuestions')
+
+    if not audio_files:
+        return jsonify({'error': 'No audio files in the request'}), 400
+    if len(audio_files) != len(questions):
+        return jsonify({'error': 'Provide exactly one interview question per audio file.'}), 400
+    if len(audio_files) > current_app.config['HR_BATCH_MAX_ANSWERS']:
+        return jsonify({'error': f"At most {current_app.config['HR_BATCH_MAX_ANSWERS']} answers can be analyzed at once."}), 400
+    if any(f.filename == '' for f in audio_files):
+        return jsonify({'error': 'No selected audio file'}), 400
+    if not all(questions):
+        return jsonify({'error': 'No interview question provided.'}), 400
+
+    # A batch holds one hr_analyze slot for its whole duration.
+    gate = admission.get('hr_analyze')
+    user_key = admission.client_key()
+    try:
+        admitted_at = gate.acquire(user_key)
+    except admission.Rejected as e:
+        print(f"Rejected /analyze/batch from {user_key}: {e.reason}")
+        return admission.rejection_response(e)
+
+    try:
+        uploads = []
+        for i, audio_file in enumerate(audio_files):
+            webm_filename = secure_filename(f"{int(time.time())}_{i}_{audio_file.filename}")
+            webm_path = os.path.join(UPLOAD_DIR, webm_filename)
+            audio_file.save(webm_path)
+            uploads.append((webm_path, webm_filename))
+        print(f"Saved {len(uploads)} WebM audio files for batch analysis.")
+
+        return run_batch_analysis(uploads, questions)
+    finally:
+        gate.release(user_key, admitted_at)
+
+def run_batch_analysis(uploads, questions):
+    app = current_app._get_current_object()
+
+    def prepare(upload):
+        with app.app_context():
             try:
-                os.remove(webm_path)
-                print(f"Cleaned up original WebM file: {webm_path}")
+                return prepare_answer(*upload)
             except Exception as e:
-                print(f"Error cleaning up WebM file {webm_path}: {e}")
-        
-        # DO NOT clean up MP3 file - we need it for playback!
-        # The MP3 file will remain in UPLOAD_DIR and can be served via /uploads endpoint
-        
-        print("Analysis complete. Audio file is available for playback.")
+                print(f"An unexpected error occurred while preparing {upload[0]}: {e}")
+                return {'error': f'An unexpected error occurred: {str(e)}', 'status': 500}
+            finally:
+                remove_upload(upload[0])
+
+    # Concurrent transcriptions are coalesced into batches by the
+    # transcription scheduler when it is enabled.
+    workers = max(1, min(len(uploads), app.config['HR_BATCH_TRANSCRIBE_WORKERS']))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        prepared = list(pool.map(profiler.propagate(prepare), uploads))
+
+    graded = [i for i, p in enumerate(prepared) if 'error' not in p]
+    answers = [
+        {
+            'question': questions[i],
+            'text': prepared[i]['transcription'],
+            'audio_duration': prepared[i]['audio_duration'],
+            'pause_stats': prepared[i]['pause_stats'],
+            'speech_metrics': prepared[i]['speech_metrics'],
+            'relevance': score_relevance(questions[i], prepared[i]['transcription'])
+        }
+        for i in graded
+    ]
+    feedbacks, token_report = analyze_batch_with_gemini(answers) if answers else ([], None)
+
+    # Per-answer errors are reported in place; the HTTP status covers the batch.
+    results = [{k: v for k, v in p.items() if k != 'status'} if 'error' in p else None for p in prepared]
+    sessions = []
+    for i, answer, feedback in zip(graded, answers, feedbacks):
+        if feedback is None and answer['relevance']:
+            feedback = local_feedback(answer['text'], answer['relevance'])
+        if feedback is None:
+            results[i] = {
+                'error': 'Failed to get structured feedback from Gemini for this answer.',
+                'transcription': answer['text'],
+                'speechMetrics': answer['speech_metrics'],
+                'pauseStatistics': answer['pause_stats']
+            }
+            continue
+        feedback['transcription'] = answer['text']
+        results[i] = complete_feedback(feedback, prepared[i], questions[i], answer['relevance'])
+        sessions.append(practice_session_fields(prepared[i], questions[i], feedback))
+
+    try:
+        save_practice_sessions(sessions)
+    except Exception as e:
+        print(f"Error saving batch practice sessions: {e}")
+        return jsonify({'error': f'Could not save the analysis: {str(e)}', 'results': results}), 500
+
+    print(f"Batch analysis complete: {len(sessions)} of {len(uploads)} answers saved.")
+    return jsonify({'results': results, 'promptTokens': token_report})
 
 # Optional: Add periodic cleanup function for old files
 import datetime
@@ -1,18 +1,23 @@
 # server/app/routes/live_hr_routes.py
-import os
+import functools
+import hashlib
+import json
 import random
-import google.generativeai as genai
-from flask import Blueprint, request, current_app
+import string
+from flask import Blueprint, request, current_app, jsonify
 from flask_socketio import emit
-import google.auth
 import collections
 import threading
 import base64
+from concurrent.futures import Future
 import io
-import docx
-from pdfminer.high_level import extract_text as extract_pdf_text
+import time
+import uuid
+from datetime import datetime
 from difflib import SequenceMatcher
-from ..extensions import socketio
+from ..extensions import db, socketio
+from ..models.hr_models import LiveAnalysis, LiveInterview, LiveTurn
+from ..services import admission, coalesce, intents, llm, metrics as app_metrics, profiler, prompt_builder, resume_profile, write_behind
 
 # Create blueprint
 live_hr_bp = Blueprint('live_hr', __name__)
@@ -20,8 +25,6 @@ live_hr_bp = Blueprint('live_hr', __name__)
 # --- Constants ---
 MODEL_NAME = "gemini-2.5-flash"
 MAX_HISTORY_LENGTH = 12
-MAX_RESUME_CHARS = 8000
-MAX_ANALYSIS_CONTEXT_CHARS = 10000
 
 # System prompts
 SYSTEM_PROMPT = """
@@ -65,59 +68,147 @@ You are 'Eva', an expert AI HR Interview Coach, now in analysis mode. Your task
 7.  **No Interview Questions:** Do NOT ask any interview questions in this analysis. This is a review, not a continuation of the interview.
 """
 
-# Global variables for models
-model = None
-analysis_model = None
+# Prompt templates (compiled once)
+RESUME_CONTEXT_TEMPLATE = string.Template(
+    "The user has provided a resume. Here is a profile of the candidate extracted from it. Please use this "
+    "information to tailor your questions and feedback, making the interview more personalized:\n\n---\n$resume\n---\n"
+)
+RESUME_CONTEXT_ACK = "Understood. I will integrate the candidate's profile into the interview questions and feedback."
+
+METRICS_TEMPLATE = string.Template("""
+            **Interview Metrics:**
+            - Total Duration: $duration seconds
+            - User Turns: $user_turns
+            - AI Turns: $ai_turns
+            - User Total Words: $user_words
+            - AI Total Words: $ai_words
+            - Average User Response Time (from AI question sent to user answer received): $user_latency ms
+            - Average AI Response Latency (from user answer received to AI response sent): $ai_latency ms
+""")
+
+ANALYSIS_PROMPT_TEMPLATE = string.Template("""
+            Please analyze the following mock interview performance metrics and conversation history.
+            Provide a constructive and comprehensive review, highlighting strengths and areas for improvement.
+            Format your response in Markdown, using headings, bullet points, and bold text.
+
+            ---
+            $metrics
+            ---
+            $resume_block
+            **Conversation History (User vs. AI Coach):**
+            ```
+            $history
+            ```
+            ---
+
+            Please provide your detailed analysis below:
+            """)
+
+ANALYSIS_RESUME_BLOCK_TEMPLATE = string.Template("""
+            **Candidate Profile (from the provided resume):**
+            ```
+            $resume
+            ```
+            ---
+""")
+
+SUMMARY_SYSTEM_PROMPT = """
+You maintain a running summary of a mock HR interview between 'Eva' (the interviewer) and a candidate.
+Keep it factual and compact: the questions already asked, the key points and examples the candidate gave,
+notable strengths and weaknesses observed so far. Write plain prose, no headings, under 200 words.
+"""
+
+SUMMARY_UPDATE_TEMPLATE = string.Template("""
+Current summary of the interview so far:
+$summary
+
+New turns to fold into the summary:
+$turns
+
+Return the updated summary only.
+""")
+
+SUMMARY_CONTEXT_TEMPLATE = string.Template(
+    "Summary of the interview so far (earlier turns are not repeated):\n$summary"
+)
+SUMMARY_CONTEXT_ACK = "Understood. I will continue the interview from here without repeating earlier questions."
+
+@functools.lru_cache(maxsize=None)
+def template_tokens(name):
+    """Fixed token cost of a prompt's boilerplate, counted once on first use."""
+    if name == 'turn':
+        return (prompt_builder.count_tokens(SYSTEM_PROMPT)
+                + prompt_builder.count_tokens(RESUME_CONTEXT_TEMPLATE.substitute(resume=''))
+                + prompt_builder.count_tokens(RESUME_CONTEXT_ACK)
+                + prompt_builder.count_tokens(SUMMARY_CONTEXT_TEMPLATE.substitute(summary=''))
+                + prompt_builder.count_tokens(SUMMARY_CONTEXT_ACK))
+    return (prompt_builder.count_tokens(SYSTEM_PROMPT_ANALYSIS)
+            + prompt_builder.count_tokens(ANALYSIS_PROMPT_TEMPLATE.substitute(metrics='', resume_block='', history=''))
+            + prompt_builder.count_tokens(ANALYSIS_RESUME_BLOCK_TEMPLATE.substitute(resume='')))
+
+def format_turn(turn):
+    role, text = turn
+    return f"{role}: {text}"
+
+def conversation_metrics(chat_history, turn_times):
+    """Interview metrics computed from the server's own transcript and turn timestamps."""
+    user_latencies = []
+    ai_latencies = []
+    for (previous_role, _), (role, _), previous_at, at in zip(chat_history, chat_history[1:], turn_times, turn_times[1:]):
+        if previous_role == 'AI' and role == 'User':
+            user_latencies.append(round((at - previous_at) * 1000))
+        elif previous_role == 'User' and role == 'AI':
+            ai_latencies.append(round((at - previous_at) * 1000))
+    return {
+        'source': 'server',
+        'totalDurationMs': round((turn_times[-1] - turn_times[0]) * 1000) if turn_times else 0,
+        'userTurns': sum(1 for role, _ in chat_history if role == 'User'),
+        'aiTurns': sum(1 for role, _ in chat_history if role == 'AI'),
+        'userWordCount': sum(len(text.split()) for role, text in chat_history if role == 'User'),
+        'aiWordCount': sum(len(text.split()) for role, text in chat_history if role == 'AI'),
+        'userResponseLatenciesMs': user_latencies,
+        'aiResponseLatenciesMs': ai_latencies,
+    }
+
+def analysis_fingerprint(interview_id, chat_history, resume_hash):
+    content = json.dumps({'interview': interview_id, 'turns': chat_history, 'resume': resume_hash})
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 # Session data storage
+# `chat_history` is the complete transcript of the interview. What is sent to
+# Gemini each turn is chosen by build_turn_history() (see LIVE_MEMORY_MODE).
 session_data = collections.defaultdict(lambda: {
-    'chat_history': collections.deque(maxlen=MAX_HISTORY_LENGTH),
+    'chat_history': [],
+    'turn_times': [],         # time.time() of each chat_history entry
+    'summary': '',
+    'summarized_upto': 0,
+    'is_summarizing': False,
+    'conversation_id': 0,
     'is_processing_ai': False,
-    'resume_text': None,
+    'resume_profile': None,   # compact profile text injected into each turn
+    'resume_hash': None,
+    'interview_id': None,     # LiveInterview.public_id of the conversation in progress
+    'speculative': False,     # client opted in to speculative replies (user_partial_input)
+    'speculation': None,      # reply being generated from the current partial transcript
+    'speculation_count': 0,   # speculative Gemini calls made by this session (cost cap)
+    'last_partial': '',
     'last_user_message': ''
 })
 
-# Initialize Gemini API
-def init_gemini():
-    global model, analysis_model
-    try:
-        script_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        service_account_key_path = os.path.join(script_dir, "gemini-service-account.json")
+# Gemini models are created lazily through the shared LLM configuration
+def get_chat_model():
+    return llm.get_model(MODEL_NAME, system_instruction=SYSTEM_PROMPT)
 
-        if not os.path.exists(service_account_key_path):
-            raise FileNotFoundError(f"'{service_account_key_path}' not found.")
+def get_analysis_model():
+    return llm.get_model(MODEL_NAME, system_instruction=SYSTEM_PROMPT_ANALYSIS)
 
-        credentials, _ = google.auth.load_credentials_from_file(service_account_key_path)
-        genai.configure(credentials=credentials)
-        
-        model = genai.GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_PROMPT)
-        analysis_model = genai.GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_PROMPT_ANALYSIS)
-        current_app.logger.info("Gemini API configured successfully.")
-        return True
-    except Exception as e:
-        current_app.logger.error(f"FATAL ERROR: Could not configure Gemini API. {e}")
-        model = None
-        analysis_model = None
-        return False
+def get_summary_model():
+    return llm.get_model(MODEL_NAME, system_instruction=SUMMARY_SYSTEM_PROMPT)
 
 # Utility functions
-def get_predefined_response(user_message_lower):
-    user_message_lower = user_message_lower.strip()
-    meta_phrases = ["who are you", "what are you", "are you an ai", "are you a bot"]
-    for phrase in meta_phrases:
-        if phrase in user_message_lower:
-            return "My role is to act as your interview coach to help you practice. Let's focus on that! Tell me, what's your greatest strength?"
-
-    if len(user_message_lower) < 15 and "thank" in user_message_lower:
-        return "You're welcome! Let's move on to the next question."
-        
-    if len(user_message_lower) < 10 and user_message_lower in ["okay", "ok", "yes", "got it", "right"]:
-        return "Great. Let's proceed. Can you describe a time you had to handle a difficult colleague?"
-
-    return None
-
 def extract_text_from_pdf(file_stream):
     try:
+        from pdfminer.high_level import extract_text as extract_pdf_text
         text = extract_pdf_text(file_stream)
         return text
     except Exception as e:
@@ -126,6 +217,7 @@ def extract_text_from_pdf(file_stream):
 
 def extract_text_from_docx(file_stream):
     try:
+        import docx
         document = docx.Document(file_stream)
         text = "\n".join([paragraph.text for paragraph in document.paragraphs])
         return text
@@ -142,126 +234,440 @@ def is_similar(msg1, msg2, threshold=0.8):
     similarity = SequenceMatcher(None, msg1.lower(), msg2.lower()).ratio()
     return similarity > threshold
 
+# Transcript persistence (write-behind: handlers only buffer, a worker thread writes)
+def persist_interview_items(public_id, items):
+    """Flush buffered items for one interview: ('interview', {field: value}) or ('turn', {...})."""
+    try:
+        interview = LiveInterview.query.filter_by(public_id=public_id).first()
+        if interview is None:
+            interview = LiveInterview(public_id=public_id)
+            db.session.add(interview)
+        turns = []
+        for kind, data in items:
+            if kind == 'interview':
+                for field, value in data.items():
+                    setattr(interview, field, value)
+            else:
+                turns.append(LiveTurn(interview=interview, **data))
+        db.session.add_all(turns)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+transcript_writer = write_behind.WriteBehindBuffer('live_interviews', persist_interview_items)
+
+def update_interview(session, **fields):
+    if session['interview_id'] and current_app.config['LIVE_PERSIST_ENABLED']:
+        transcript_writer.add(session['interview_id'], ('interview', fields))
+
+def begin_interview(session):
+    session['interview_id'] = uuid.uuid4().hex
+    update_interview(session, started_at=datetime.utcnow(),
+                     resume_hash=session['resume_hash'], resume_profile=session['resume_profile'])
+
+def end_interview(session):
+    if session['interview_id']:
+        update_interview(session, ended_at=datetime.utcnow())
+        transcript_writer.request_flush(session['interview_id'])
+
+def record_turn(session, role, text):
+    """Append a turn to the session transcript and queue it for the database."""
+    if session['interview_id'] is None:
+        begin_interview(session)
+    turn_index = len(session['chat_history'])
+    session['chat_history'].append((role, text))
+    session['turn_times'].append(time.time())
+    if current_app.config['LIVE_PERSIST_ENABLED']:
+        transcript_writer.add(session['interview_id'], ('turn', {
+            'turn_index': turn_index, 'role': role, 'text': text, 'created_at': datetime.utcnow()
+        }))
+
+# Resume profile
+def set_resume_profile(session, digest, profile):
+    session['resume_hash'] = digest
+    session['resume_profile'] = prompt_builder.truncate_to_tokens(
+        resume_profile.format_profile(profile), current_app.config['RESUME_PROFILE_MAX_TOKENS']
+    )
+    update_interview(session, resume_hash=digest, resume_profile=session['resume_profile'])
+
+def refine_resume_profile_async(app, session_id, digest, resume_text, profile):
+    """One-time LLM pass over a newly seen resume; later uploads reuse the stored result."""
+    with app.app_context():
+        refined = resume_profile.refine_with_llm(resume_text, profile, current_app.config['RESUME_MAX_TOKENS'])
+        if not refined:
+            return
+        resume_profile.save_profile(digest, refined, 'llm')
+        session = session_data.get(session_id)
+        if session is not None and session['resume_hash'] == digest:
+            set_resume_profile(session, digest, refined)
+            current_app.logger.info(f"Resume profile for session {session_id} refined by the LLM.")
+
+# Speculative replies from partial speech results
+def stable_prefix(previous, current):
+    """Words two consecutive partial transcripts agree on."""
+    previous_words, current_words = previous.split(), current.split()
+    n = 0
+    while n < min(len(previous_words), len(current_words)) and previous_words[n].lower() == current_words[n].lower():
+        n += 1
+    return ' '.join(current_words[:n])
+
+def matches_prefix(prefix, text, threshold):
+    """Whether `text` starts with (about) `prefix`, compared over as many words as the prefix has."""
+    prefix_words = prefix.split()
+    return is_similar(' '.join(text.split()[:len(prefix_words)]), ' '.join(prefix_words), threshold)
+
+def discard_speculation(session, reason):
+    """Drop the pending speculation. Gemini calls cannot be aborted; the result is just ignored."""
+    speculation = session['speculation']
+    if speculation is not None:
+        session['speculation'] = None
+        app_metrics.incr(f"speculation.discarded.{reason}")
+
+def take_speculation(session, final_message):
+    """
+    Return the speculation if the final message starts with (about) its
+    prefix, else None. It only counts as a hit once its reply is used.
+    """
+    speculation = session['speculation']
+    session['speculation'] = None
+    session['last_partial'] = ''
+    if speculation is None:
+        return None
+    if (speculation['turn_index'] == len(session['chat_history'])
+            and matches_prefix(speculation['prefix'], final_message, current_app.config['LIVE_SPECULATION_SIMILARITY'])):
+        return speculation
+    app_metrics.incr('speculation.miss')
+    return None
+
+def speculation_result(speculation):
+    try:
+        return speculation['future'].result(timeout=current_app.config['LIVE_SPECULATION_WAIT_SECONDS'])
+    except Exception:
+        return None
+
+@profiler.profiled('socket:user_partial_input')
+def speculate_reply_async(app, session_id, speculation, current_chat_history, release_admission):
+    with app.app_context():
+        text = None
+        try:
+            session = session_data.get(session_id)
+            if session is not None:
+                text = generate_reply(session, session_id, speculation['prefix'], current_chat_history, prompt_name='live_speculation')
+        except Exception as e:
+            current_app.logger.error(f"ERROR: Speculative reply failed for session {session_id}: {e}")
+        finally:
+            release_admission()
+            speculation['future'].set_result(text)
+
+# Rolling conversation memory
+def build_turn_history(session, history):
+    """
+    Pick what Gemini sees for the next turn from `history` (the turns before
+    the current user message). Returns (summary, recent_turns).
+
+    'window' mode keeps the last MAX_HISTORY_LENGTH turns. 'rolling' mode sends
+    the running summary plus only the turns it does not cover yet, so the
+    prompt stays the same size however long the interview runs.
+    """
+    if current_app.config['LIVE_MEMORY_MODE'] != 'rolling':
+        return '', history[-MAX_HISTORY_LENGTH:]
+    summarized_upto = min(session['summarized_upto'], len(history))
+    return session['summary'], history[summarized_upto:]
+
+def maybe_schedule_summary(app, session_id):
+    """Fold older turns into the summary on a background thread, off the response path."""
+    session = session_data.get(session_id)
+    if session is None or app.config['LIVE_MEMORY_MODE'] != 'rolling' or session['is_summarizing']:
+        return
+
+    summarize_upto = len(session['chat_history']) - app.config['LIVE_RECENT_TURNS']
+    if summarize_upto - session['summarized_upto'] < app.config['LIVE_SUMMARY_TRIGGER_TURNS']:
+        return
+
+    session['is_summarizing'] = True
+    threading.Thread(target=update_summary_async,
+                     args=(app, session_id, session['conversation_id'], session['summary'],
+                           session['chat_history'][session['summarized_upto']:summarize_upto], summarize_upto),
+                     daemon=True).start()
+
+def update_summary_async(app, session_id, conversation_id, summary, turns, summarize_upto):
+    with app.app_context():
+        try:
+            summary_model = get_summary_model()
+            if not summary_model:
+                return
+            prompt = SUMMARY_UPDATE_TEMPLATE.substitute(
+                summary=summary or "(nothing yet)",
+                turns="\n".join(format_turn(turn) for turn in turns)
+            )
+            response = summary_model.generate_content(prompt)
+            new_summary = prompt_builder.truncate_to_tokens(
+                response.text.strip(), current_app.config['LIVE_SUMMARY_MAX_TOKENS']
+            )
+
+            session = session_data.get(session_id)
+            # Ignore the result if the client left or restarted the interview meanwhile.
+            if session is None or session['conversation_id'] != conversation_id:
+                return
+            session['summary'] = new_summary
+            session['summarized_upto'] = summarize_upto
+            current_app.logger.info(f"Conversation summary for session {session_id} now covers {summarize_upto} turns.")
+        except Exception as e:
+            current_app.logger.error(f"ERROR: Summary update failed for session {session_id}: {e}")
+        finally:
+            session = session_data.get(session_id)
+            if session is not None:
+                session['is_summarizing'] = False
+
 # Async functions for processing
-def generate_gemini_response_async(app, session_id, user_message, current_chat_history):
+def generate_reply(session, session_id, user_message, current_chat_history, prompt_name='live_turn'):
+    """One Gemini chat turn answering `user_message` after `current_chat_history`. Raises on API errors."""
+    model = get_chat_model()
+    if not model:
+        return "I'm sorry, the AI model is not configured correctly on the server."
+
+    summary, recent_turns = build_turn_history(session, current_chat_history)
+    built = prompt_builder.fit_sections(
+        [
+            prompt_builder.Section('resume', text=session['resume_profile'], priority=prompt_builder.PRIORITY_RESUME),
+            prompt_builder.Section('summary', text=summary, priority=prompt_builder.PRIORITY_METRICS),
+            prompt_builder.Section('history', items=recent_turns, priority=prompt_builder.PRIORITY_HISTORY,
+                                   item_tokens=lambda turn: prompt_builder.count_tokens(format_turn(turn))),
+            prompt_builder.Section('message', text=user_message),
+        ],
+        budget=current_app.config['LIVE_TURN_PROMPT_TOKEN_BUDGET'],
+        overhead_tokens=template_tokens('turn')
+    )
+    token_report = built.token_report(template_tokens('turn'))
+    prompt_builder.record_usage(prompt_name, token_report)
+    current_app.logger.info(f"Prompt tokens for session {session_id}: {token_report['total']} (trimmed: {token_report['trimmed'] or 'none'})")
+
+    api_history = []
+    if built.text('resume'):
+        api_history.append({"role": "user", "parts": [RESUME_CONTEXT_TEMPLATE.substitute(resume=built.text('resume'))]})
+        api_history.append({"role": "model", "parts": [RESUME_CONTEXT_ACK]})
+
+    if built.text('summary'):
+        api_history.append({"role": "user", "parts": [SUMMARY_CONTEXT_TEMPLATE.substitute(summary=built.text('summary'))]})
+        api_history.append({"role": "model", "parts": [SUMMARY_CONTEXT_ACK]})
+
+    for role, text in built.items('history'):
+        api_history.append({"role": "user" if role == "User" else "model", "parts": [text]})
+
+    chat_session = model.start_chat(history=api_history)
+    response = chat_session.send_message(user_message)
+    return response.text.strip()
+
+@profiler.profiled('socket:user_text_input')
+def generate_gemini_response_async(app, session_id, user_message, current_chat_history, user_key, admitted_at=None, speculation=None):
+    """
+    Answer a user turn. Without a speculation the caller has already taken a
+    live_turn slot (`admitted_at`); with one, a slot is taken here only if the
+    speculative reply is unusable and the turn has to be generated after all.
+    """
     # Create application context for this thread
     with app.app_context():
         session = session_data[session_id]
         session['is_processing_ai'] = True
+        gate = admission.get('live_turn')
+        admitted = speculation is None
 
         try:
-            predefined_response = get_predefined_response(user_message.lower())
-            if predefined_response:
-                ai_response_text = predefined_response
-            else:
-                if not model:
-                    ai_response_text = "I'm sorry, the AI model is not configured correctly on the server."
-                else:
-                    api_history = []
-                    
-                    if session['resume_text']:
-                        resume_prompt = f"The user has provided the following resume content. Please use this information to tailor your questions and feedback, making the interview more personalized:\n\n---\n{session['resume_text']}\n---\n"
-                        api_history.append({"role": "user", "parts": [resume_prompt]})
-                        api_history.append({"role": "model", "parts": ["Understood. I will integrate the provided resume content into the interview questions and feedback."]})
-
-                    for role, text in current_chat_history:
-                        api_history.append({"role": "user" if role == "User" else "model", "parts": [text]})
-                    
-                    chat_session = model.start_chat(history=api_history)
-                    response = chat_session.send_message(user_message)
-                    ai_response_text = response.text.strip()
+            ai_response_text = None
+            if speculation is not None:
+                # A reply generated from the partial transcript; None if it failed or timed out.
+                ai_response_text = speculation_result(speculation)
+                app_metrics.incr('speculation.hit' if ai_response_text is not None else 'speculation.failed')
+            if ai_response_text is None:
+                if not admitted:
+                    admitted_at = gate.acquire(user_key)
+                    admitted = True
+                ai_response_text = generate_reply(session, session_id, user_message, current_chat_history)
+        except admission.Rejected as e:
+            current_app.logger.warning(f"Shedding live turn for session {session_id}: {e.reason}")
+            # Let the client send the same answer again.
+            session['last_user_message'] = ''
+            emit_busy(session_id, 'user_text_input', e)
+            return
         except Exception as e:
             current_app.logger.error(f"ERROR: Gemini API call failed for session {session_id}: {e}")
             ai_response_text = "I seem to be having a technical issue. Could you please repeat your last answer?"
         finally:
             session['is_processing_ai'] = False
+            if admitted:
+                gate.release(user_key, admitted_at)
 
         socketio.emit('ai_response', {'text': ai_response_text}, room=session_id)
-        session['chat_history'].append(('AI', ai_response_text))
+        record_turn(session, 'AI', ai_response_text)
         current_app.logger.info(f"AI ({session_id}): {ai_response_text}")
+        maybe_schedule_summary(app, session_id)
 
-def analyze_conversation_metrics_async(app, session_id, metrics, chat_history, resume_text):
-    # Create application context for this thread
-    with app.app_context():
-        if not analysis_model:
-            socketio.emit('conversation_metrics_analysis', {'analysis': 'Server error: AI analysis model not configured.'}, room=session_id)
-            return
-
-        try:
-            analysis_prompt = f"""
-            Please analyze the following mock interview performance metrics and conversation history.
-            Provide a constructive and comprehensive review, highlighting strengths and areas for improvement.
-            Format your response in Markdown, using headings, bullet points, and bold text.
-
-            ---
-            **Interview Metrics:**
-            - Total Duration: {metrics.get('totalDurationMs', 0) / 1000:.2f} seconds
-            - User Turns: {metrics.get('userTurns', 0)}
-            - AI Turns: {metrics.get('aiTurns', 0)}
-            - User Total Words: {metrics.get('userWordCount', 0)}
-            - AI Total Words: {metrics.get('aiWordCount', 0)}
-            - Average User Response Latency (from AI speech end to user input start): {sum(metrics.get('userResponseLatenciesMs', [])) / len(metrics.get('userResponseLatenciesMs', [])) if metrics.get('userResponseLatenciesMs') else 'N/A'} ms
-            - Average AI Response Latency (from user input end to AI response start): {sum(metrics.get('aiResponseLatenciesMs', [])) / len(metrics.get('aiResponseLatenciesMs', [])) if metrics.get('aiResponseLatenciesMs') else 'N/A'} ms
-            ---
-            """
-
-            if resume_text:
-                analysis_prompt += f"""
-            **Provided Resume Content:**
-            ```
-            {resume_text[:MAX_ANALYSIS_CONTEXT_CHARS]}
-            {"... (truncated)" if len(resume_text) > MAX_ANALYSIS_CONTEXT_CHARS else ""}
-            ```
-            ---
-            """
-
-            analysis_prompt += """
-            **Conversation History (User vs. AI Coach):**
-            ```
-            """
-            current_chat_history_str = ""
-            for role, text in chat_history:
-                current_chat_history_str += f"{role}: {text}\n"
-            
-            if len(current_chat_history_str) > MAX_ANALYSIS_CONTEXT_CHARS:
-                analysis_prompt += current_chat_history_str[-MAX_ANALYSIS_CONTEXT_CHARS:] + "\n... (truncated for analysis)"
-            else:
-                analysis_prompt += current_chat_history_str
-            
-            analysis_prompt += """
-            ```
-            ---
+analysis_requests = coalesce.RequestCoalescer('live_analysis')
 
-            Please provide your detailed analysis below:
-            """
+def emit_busy(session_id, event, rejected):
+    socketio.emit('busy', dict(rejected.to_dict(), event=event, message=rejected.reason), room=session_id)
 
-            analysis_chat_session = analysis_model.start_chat(history=[])
-            analysis_response = analysis_chat_session.send_message(analysis_prompt)
-            analysis_text = analysis_response.text.strip()
+def emit_analysis(session_id, payload):
+    if 'rejected' in payload:
+        emit_busy(session_id, 'conversation_metrics', payload['rejected'])
+    else:
+        socketio.emit('conversation_metrics_analysis', payload, room=session_id)
 
-            current_app.logger.info(f"AI Analysis for session {session_id} generated.")
-            socketio.emit('conversation_metrics_analysis', {'analysis': analysis_text}, room=session_id)
+def analysis_payload(stored):
+    return {'analysis': stored.analysis, 'analysisId': stored.public_id, 'metrics': stored.metrics_json}
 
+@profiler.profiled('socket:conversation_metrics')
+def analyze_conversation_metrics_async(app, session_id, user_key, fingerprint, metrics, chat_history, resume_profile_text, interview_id):
+    """Leader of a coalesced analysis: generate, store and hand the payload to every waiter."""
+    # Create application context for this thread
+    with app.app_context():
+        payload = None
+        try:
+            # Another leader may have stored this analysis since the caller looked.
+            stored = LiveAnalysis.query.filter_by(fingerprint=fingerprint).first()
+            if stored:
+                payload = analysis_payload(stored)
+                return
+
+            analysis_model = get_analysis_model()
+            if not analysis_model:
+                payload = {'analysis': 'Server error: AI analysis model not configured.'}
+                return
+
+            gate = admission.get('live_analysis')
+            try:
+                admitted_at = gate.acquire(user_key)
+            except admission.Rejected as e:
+                payload = {'rejected': e}
+                return
+            try:
+                payload = generate_analysis(session_id, fingerprint, metrics, chat_history, resume_profile_text, interview_id, analysis_model)
+            finally:
+                gate.release(user_key, admitted_at)
         except Exception as e:
+            db.session.rollback()
             current_app.logger.error(f"ERROR: AI analysis failed for session {session_id}: {e}")
-            socketio.emit('conversation_metrics_analysis', {'analysis': f'Sorry, an error occurred during analysis: {e}. Please try again.'}, room=session_id)
+            payload = {'analysis': f'Sorry, an error occurred during analysis: {e}. Please try again.'}
+        finally:
+            # Failures are not stored, so the next request tries again.
+            analysis_requests.finish(fingerprint, payload)
+
+def generate_analysis(session_id, fingerprint, metrics, chat_history, resume_profile_text, interview_id, analysis_model):
+    """Run the Gemini analysis and store it. Returns the payload sent to the client."""
+    user_latencies = metrics['userResponseLatenciesMs']
+    ai_latencies = metrics['aiResponseLatenciesMs']
+    metrics_text = METRICS_TEMPLATE.substitute(
+        duration=f"{metrics['totalDurationMs'] / 1000:.2f}",
+        user_turns=metrics['userTurns'],
+        ai_turns=metrics['aiTurns'],
+        user_words=metrics['userWordCount'],
+        ai_words=metrics['aiWordCount'],
+        user_latency=round(sum(user_latencies) / len(user_latencies)) if user_latencies else 'N/A',
+        ai_latency=round(sum(ai_latencies) / len(ai_latencies)) if ai_latencies else 'N/A'
+    )
+
+    # Resume goes first, then the oldest turns; the metrics are kept.
+    built = prompt_builder.fit_sections(
+        [
+            prompt_builder.Section('metrics', text=metrics_text, priority=prompt_builder.PRIORITY_METRICS),
+            prompt_builder.Section('resume', text=resume_profile_text, priority=prompt_builder.PRIORITY_RESUME),
+            prompt_builder.Section('history', items=[format_turn(turn) for turn in chat_history],
+                                   priority=prompt_builder.PRIORITY_HISTORY),
+        ],
+        budget=current_app.config['LIVE_ANALYSIS_PROMPT_TOKEN_BUDGET'],
+        overhead_tokens=template_tokens('analysis')
+    )
+    token_report = built.token_report(template_tokens('analysis'))
+    prompt_builder.record_usage('live_analysis', token_report)
+    current_app.logger.info(f"Analysis prompt tokens for session {session_id}: {token_report['total']} (trimmed: {token_report['trimmed'] or 'none'})")
+
+    history_text = "\n".join(built.items('history'))
+    if 'history' in token_report['trimmed']:
+        history_text = "... (earlier turns truncated for analysis)\n" + history_text
+    analysis_prompt = ANALYSIS_PROMPT_TEMPLATE.substitute(
+        metrics=built.text('metrics'),
+        resume_block=ANALYSIS_RESUME_BLOCK_TEMPLATE.substitute(resume=built.text('resume')) if built.text('resume') else '',
+        history=history_text
+    )
+
+    analysis_chat_session = analysis_model.start_chat(history=[])
+    analysis_response = analysis_chat_session.send_message(analysis_prompt)
+    analysis_text = analysis_response.text.strip()
+    current_app.logger.info(f"AI Analysis for session {session_id} generated.")
+
+    stored = LiveAnalysis(public_id=uuid.uuid4().hex, fingerprint=fingerprint, interview_public_id=interview_id,
+                          metrics_json=metrics, analysis=analysis_text)
+    db.session.add(stored)
+    db.session.commit()
+    payload = analysis_payload(stored)
+
+    if interview_id and current_app.config['LIVE_PERSIST_ENABLED']:
+        transcript_writer.add(interview_id, ('interview', {'metrics_json': metrics, 'analysis': analysis_text}))
+        transcript_writer.request_flush(interview_id)
+    return payload
+
+def reset_conversation(session):
+    discard_speculation(session, 'reset')
+    session['last_partial'] = ''
+    end_interview(session)
+    session['interview_id'] = None
+    session['chat_history'] = []
+    session['turn_times'] = []
+    session['summary'] = ''
+    session['summarized_upto'] = 0
+    session['conversation_id'] += 1
+
+def interview_to_dict(interview, include_turns=False):
+    data = {
+        'id': interview.public_id,
+        'startedAt': interview.started_at.isoformat() if interview.started_at else None,
+        'endedAt': interview.ended_at.isoformat() if interview.ended_at else None,
+        'hasResume': bool(interview.resume_hash),
+        'metrics': interview.metrics_json,
+        'analysis': interview.analysis,
+    }
+    if include_turns:
+        data['turns'] = [{'role': turn.role, 'text': turn.text} for turn in interview.turns]
+    return data
+
+# HTTP routes (Progress Chronicle)
+# Interviews are not tied to an authenticated user yet, so there is no listing:
+# the unguessable public id a client received is what grants access.
+@live_hr_bp.route('/interviews/<public_id>', methods=['GET'])
+def get_interview(public_id):
+    interview = LiveInterview.query.filter_by(public_id=public_id).first()
+    if not interview:
+        return jsonify({'error': 'Interview not found'}), 404
+    return jsonify(interview_to_dict(interview, include_turns=True))
+
+@live_hr_bp.route('/analyses/<public_id>', methods=['GET'])
+def get_analysis(public_id):
+    stored = LiveAnalysis.query.filter_by(public_id=public_id).first()
+    if not stored:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return jsonify(dict(analysis_payload(stored), interviewId=stored.interview_public_id,
+                        createdAt=stored.created_at.isoformat() if stored.created_at else None))
 
 # Socket.IO event handlers
 @socketio.on('connect')
 def handle_connect():
     current_app.logger.info(f"Client connected: {request.sid}")
-    session_data[request.sid]['chat_history'].clear()
+    reset_conversation(session_data[request.sid])
     session_data[request.sid]['is_processing_ai'] = False
-    session_data[request.sid]['resume_text'] = None
+    session_data[request.sid]['resume_profile'] = None
+    session_data[request.sid]['resume_hash'] = None
     session_data[request.sid]['last_user_message'] = ''
 
 @socketio.on('start_conversation')
-def handle_start_conversation():
+def handle_start_conversation(data=None):
     session_id = request.sid
     current_app.logger.info(f"Starting conversation for client: {session_id}")
     
     session = session_data[session_id]
-    session['chat_history'].clear()
+    reset_conversation(session)
+    # Speculation is opt-in twice: enabled on the server and requested by the client.
+    session['speculative'] = bool(current_app.config['LIVE_SPECULATION_ENABLED'] and (data or {}).get('speculative'))
     session['is_processing_ai'] = False
     session['last_user_message'] = ''
 
@@ -273,7 +679,8 @@ def handle_start_conversation():
     ]
     first_question = random.choice(opening_questions)
     
-    session['chat_history'].append(('AI', first_question))
+    record_turn(session, 'AI', first_question)
+    emit('interview_started', {'interviewId': session['interview_id']})
     emit('ai_response', {'text': first_question})
 
 @socketio.on('user_text_input')
@@ -294,15 +701,96 @@ def handle_user_text_input(data):
         current_app.logger.info(f"AI already processing for session {session_id}. Ignoring new input.")
         return
 
+    speculation = take_speculation(session, user_message)
+
+    # Trivial turns ("okay", "repeat that", "skip") are answered here, without Gemini.
+    fast_response = intents.respond(user_message, session['chat_history'])
+    if fast_response:
+        if speculation is not None:
+            app_metrics.incr('speculation.discarded.fast_path')
+        current_app.logger.info(f"User ({session_id}): {user_message} [fast path]")
+        record_turn(session, 'User', user_message)
+        session['last_user_message'] = user_message
+        record_turn(session, 'AI', fast_response)
+        emit('ai_response', {'text': fast_response}, room=session_id)
+        current_app.logger.info(f"AI ({session_id}): {fast_response}")
+        maybe_schedule_summary(current_app._get_current_object(), session_id)
+        return
+
+    user_key = admission.client_key()
+    admitted_at = None
+    if speculation is not None:
+        # The speculative call already went through admission control.
+        current_app.logger.info(f"Reusing speculative reply for session {session_id}.")
+    else:
+        try:
+            admitted_at = admission.get('live_turn').acquire(user_key)
+        except admission.Rejected as e:
+            current_app.logger.warning(f"Shedding live turn for session {session_id}: {e.reason}")
+            emit_busy(session_id, 'user_text_input', e)
+            return
+
     current_app.logger.info(f"User ({session_id}): {user_message}")
-    session['chat_history'].append(('User', user_message))
+    history_before_message = list(session['chat_history'])
+    record_turn(session, 'User', user_message)
     session['last_user_message'] = user_message
     
     emit('ai_thinking', room=session_id)
 
     # Pass the current app instance to the thread
     threading.Thread(target=generate_gemini_response_async,
-                     args=(current_app._get_current_object(), session_id, user_message, list(session['chat_history']))).start()
+                     args=(current_app._get_current_object(), session_id, user_message, history_before_message,
+                           user_key, admitted_at, speculation)).start()
+
+@socketio.on('user_partial_input')
+def handle_user_partial_input(data):
+    """Interim speech result: start generating Eva's reply once the prefix is stable."""
+    session_id = request.sid
+    session = session_data.get(session_id)
+    if session is None or not session['speculative'] or session['is_processing_ai']:
+        return
+
+    config = current_app.config
+    partial = (data or {}).get('text', '').strip()
+    previous, session['last_partial'] = session['last_partial'], partial
+    prefix = stable_prefix(previous, partial)
+    if len(prefix.split()) < config['LIVE_SPECULATION_MIN_WORDS']:
+        return
+
+    turn_index = len(session['chat_history'])
+    attempt = 1
+    current = session['speculation']
+    if current is not None and current['turn_index'] == turn_index:
+        # A prefix that grew past (or fell back inside) the speculated one is still on track.
+        if len(prefix.split()) < len(current['prefix'].split()) or \
+                matches_prefix(current['prefix'], prefix, config['LIVE_SPECULATION_SIMILARITY']):
+            return
+        if current['attempt'] >= config['LIVE_SPECULATION_MAX_PER_TURN']:
+            return
+        attempt = current['attempt'] + 1
+        discard_speculation(session, 'diverged')
+
+    if session['speculation_count'] >= config['LIVE_SPECULATION_MAX_PER_SESSION']:
+        app_metrics.incr('speculation.capped')
+        return
+
+    # Speculation is optional work: never queue for it, and leave the user's
+    # own live_turn slots (per_user) to their real turns.
+    gate = admission.get('live_turn')
+    try:
+        admitted_at = gate.acquire(None, timeout=0)
+    except admission.Rejected:
+        app_metrics.incr('speculation.shed')
+        return
+
+    speculation = {'prefix': prefix, 'turn_index': turn_index, 'attempt': attempt, 'future': Future()}
+    session['speculation'] = speculation
+    session['speculation_count'] += 1
+    app_metrics.incr('speculation.started')
+    threading.Thread(target=speculate_reply_async,
+                     args=(current_app._get_current_object(), session_id, speculation, list(session['chat_history']),
+                           lambda: gate.release(None, admitted_at)),
+                     daemon=True).start()
 
 @socketio.on('upload_resume')
 def handle_upload_resume(data):
@@ -340,11 +828,17 @@ def handle_upload_resume(data):
             return
 
         if extracted_text:
-            if len(extracted_text) > MAX_RESUME_CHARS:
-                current_app.logger.info(f"Resume text truncated from {len(extracted_text)} to {MAX_RESUME_CHARS} characters.")
-                extracted_text = extracted_text[:MAX_RESUME_CHARS] + "..."
-            session['resume_text'] = extracted_text
-            current_app.logger.info(f"Successfully extracted and stored resume text for session {session_id}.")
+            digest, profile, source = resume_profile.get_or_build_profile(extracted_text)
+            set_resume_profile(session, digest, profile)
+            current_app.logger.info(
+                f"Stored {source} resume profile for session {session_id}: "
+                f"{prompt_builder.count_tokens(session['resume_profile'])} tokens "
+                f"(raw text {prompt_builder.count_tokens(extracted_text)})."
+            )
+            if source == 'local' and current_app.config['RESUME_PROFILE_LLM_ENABLED']:
+                threading.Thread(target=refine_resume_profile_async,
+                                 args=(current_app._get_current_object(), session_id, digest, extracted_text, profile),
+                                 daemon=True).start()
             emit('resume_upload_status', {'message': 'Resume uploaded and processed successfully!', 'type': 'success'}, room=session_id)
         else:
             emit('resume_upload_status', {'message': 'Could not extract text from resume. File might be empty or corrupted.', 'type': 'error'}, room=session_id)
@@ -360,28 +854,59 @@ def handle_conversation_metrics(metrics_data):
     
     current_app.logger.info(f"Received conversation metrics for session {session_id}: {metrics_data}")
 
+    chat_history = list(session['chat_history'])
+    if not chat_history:
+        # e.g. after a reconnect: the client can still fetch the stored report by interview id.
+        interview_id = (metrics_data or {}).get('interviewId')
+        stored = LiveAnalysis.query.filter_by(interview_public_id=interview_id).order_by(LiveAnalysis.id.desc()).first() if interview_id else None
+        emit_analysis(session_id, analysis_payload(stored) if stored else {'analysis': 'There is no conversation to analyze yet.'})
+        return
+
+    # Client-supplied numbers are only logged; the report uses the server's own.
+    metrics = conversation_metrics(chat_history, list(session['turn_times']))
+    fingerprint = analysis_fingerprint(session['interview_id'], chat_history, session['resume_hash'])
+
+    stored = LiveAnalysis.query.filter_by(fingerprint=fingerprint).first()
+    if stored:
+        app_metrics.incr('live_analysis.cache_hit')
+        current_app.logger.info(f"Reusing stored analysis {stored.id} for session {session_id}.")
+        emit_analysis(session_id, analysis_payload(stored))
+        return
+
+    future, is_leader = analysis_requests.join(fingerprint)
+    future.add_done_callback(lambda f: emit_analysis(session_id, f.result()))
+    if not is_leader:
+        current_app.logger.info(f"Analysis for session {session_id} already in progress; sharing it.")
+        return
+
     # Pass the current app instance to the thread
     threading.Thread(target=analyze_conversation_metrics_async,
-                     args=(current_app._get_current_object(), session_id, metrics_data, list(session['chat_history']), session['resume_text'])).start()
+                     args=(current_app._get_current_object(), session_id, admission.client_key(), fingerprint, metrics, chat_history,
+                           session['resume_profile'], session['interview_id'])).start()
 
 @socketio.on('end_conversation')
 def handle_end_conversation():
     session_id = request.sid
     current_app.logger.info(f"Ending conversation for client: {session_id}")
+    # The interview id is kept so the analysis that follows is stored with it.
+    if session_id in session_data:
+        end_interview(session_data[session_id])
 
 @socketio.on('disconnect')
 def handle_disconnect():
     current_app.logger.info(f"Client disconnected: {request.sid}")
     if request.sid in session_data:
+        end_interview(session_data[request.sid])
         del session_data[request.sid]
 
 # Initialize function
 def init_live_hr(app):
-    # Initialize Gemini API when the app starts
-    with app.app_context():
-        if init_gemini():
-            app.logger.info("Live HR module initialized successfully")
-        else:
-            app.logger.error("Failed to initialize Live HR module")
-    
-    return app
\ No newline at end of file
+    # Gemini is configured once by app.services.llm (warm-up or first use),
+    # so nothing heavy happens here.
+    transcript_writer.configure(
+        app,
+        max_items=app.config['LIVE_PERSIST_FLUSH_MAX_ITEMS'],
+        flush_interval_seconds=app.config['LIVE_PERSIST_FLUSH_INTERVAL_SECONDS']
+    )
+    app.logger.info("Live HR module initialized successfully")
+    return app
@@ -0,0 +1,2 @@
+# app/services/__init__.py
+# Shared, blueprint-independent helpers (LLM access, ASR, warm-up, ...).
@@ -0,0 +1,195 @@
+# app/services/admission.py
+"""
+Admission control for expensive work (transcription + LLM calls).
+
+Each endpoint gets its own AdmissionController with a global concurrency
+limit, a per-user limit and a bounded wait queue. Work beyond the limits is
+rejected up front instead of slowing every in-flight request down:
+
+- the user already has `per_user` requests running -> 429 Too Many Requests
+- the queue is full, or the wait exceeded `queue_timeout_seconds` -> 503
+
+Rejections carry a Retry-After estimate derived from recent service times.
+"""
+import contextlib
+import math
+import threading
+import time
+
+from flask import jsonify, request
+
+from . import metrics
+
+DEFAULT_LIMITS = {'global': 4, 'per_user': 1, 'queue': 8, 'queue_timeout_seconds': 10.0}
+
+_lock = threading.Lock()
+_controllers = {}
+_enabled = True
+_trust_user_header = False
+
+
+class Rejected(Exception):
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_dict(self):
+        return {'error': self.reason, 'retryAfter': self.retry_after}
+
+
+class AdmissionController:
+
+    def __init__(self, name, global_limit=4, per_user_limit=1, max_queue=8, queue_timeout_seconds=10.0):
+        self.name = name
+        self.global_limit = max(1, global_limit)
+        self.per_user_limit = max(1, per_user_limit)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout_seconds
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._per_user = {}
+        # Exponential moving average of how long admitted work holds a slot.
+        self._service_seconds = 5.0
+
+    def acquire(self, user_key, timeout=None):
+        """
+        Take a slot for `user_key`, waiting in the queue if needed. Raises
+        Rejected. A None key (optional background work) counts only towards
+        the global limit.
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._cond:
+            if user_key is not None and self._per_user.get(user_key, 0) >= self.per_user_limit:
+                self._reject(429, "You already have a request in progress. Please wait for it to finish.")
+            if self._active >= self.global_limit and (self._waiting >= self.max_queue or timeout <= 0):
+                self._reject(503, "The server is busy. Please try again shortly.")
+
+            # Queued requests count towards the per-user limit too.
+            if user_key is not None:
+                self._per_user[user_key] = self._per_user.get(user_key, 0) + 1
+            if self._active >= self.global_limit:
+                self._waiting += 1
+                waited_from = time.monotonic()
+                deadline = waited_from + timeout
+                try:
+                    while self._active >= self.global_limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject(503, "The server is busy. Please try again shortly.")
+                        self._cond.wait(remaining)
+                except Rejected:
+                    self._forget(user_key)
+                    raise
+                finally:
+                    self._waiting -= 1
+                metrics.observe(f"admission.{self.name}.queue_wait_ms", (time.monotonic() - waited_from) * 1000)
+
+            self._active += 1
+            metrics.incr(f"admission.{self.name}.admitted")
+            return time.monotonic()
+
+    def release(self, user_key, admitted_at=None):
+        with self._cond:
+            self._active -= 1
+            self._forget(user_key)
+            if admitted_at is not None:
+                self._service_seconds = 0.8 * self._service_seconds + 0.2 * (time.monotonic() - admitted_at)
+            self._cond.notify()
+
+    def _forget(self, user_key):
+        if user_key is None:
+            return
+        count = self._per_user.get(user_key, 0) - 1
+        if count > 0:
+            self._per_user[user_key] = count
+        else:
+            self._per_user.pop(user_key, None)
+
+    @contextlib.contextmanager
+    def admit(self, user_key, timeout=None):
+        admitted_at = self.acquire(user_key, timeout)
+        try:
+            yield
+        finally:
+            self.release(user_key, admitted_at)
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, given the current queue."""
+        backlog = self._waiting + 1
+        return max(1, math.ceil(self._service_seconds * backlog / self.global_limit))
+
+    def status(self):
+        with self._cond:
+            return {'active': self._active, 'waiting': self._waiting,
+                    'limit': self.global_limit, 'queue': self.max_queue}
+
+    def _reject(self, status, reason):
+        metrics.incr(f"admission.{self.name}.rejected_{status}")
+        raise Rejected(status, reason, self.retry_after())
+
+
+class _Unlimited:
+    """Stand-in used when admission control is disabled."""
+
+    def acquire(self, user_key, timeout=None):
+        return None
+
+    def release(self, user_key, admitted_at=None):
+        pass
+
+    @contextlib.contextmanager
+    def admit(self, user_key, timeout=None):
+        yield
+
+
+def configure(config):
+    """Build one controller per entry of ADMISSION_LIMITS."""
+    global _enabled, _trust_user_header
+    with _lock:
+        _enabled = config.get('ADMISSION_ENABLED', True)
+        _trust_user_header = config.get('ADMISSION_TRUST_USER_HEADER', False)
+        _controllers.clear()
+        for name, limits in config.get('ADMISSION_LIMITS', {}).items():
+            limits = dict(DEFAULT_LIMITS, **{k: v for k, v in limits.items() if v is not None})
+            _controllers[name] = AdmissionController(
+                name,
+                global_limit=limits['global'],
+                per_user_limit=limits['per_user'],
+                max_queue=limits['queue'],
+                queue_timeout_seconds=limits['queue_timeout_seconds']
+            )
+
+
+def get(name):
+    if not _enabled:
+        return _Unlimited()
+    with _lock:
+        if name not in _controllers:
+            _controllers[name] = AdmissionController(name)
+        return _controllers[name]
+
+
+def status():
+    with _lock:
+        controllers = dict(_controllers)
+    return {name: controller.status() for name, controller in controllers.items()}
+
+
+def rejection_response(rejected):
+    """JSON error response for a rejected HTTP request, with Retry-After."""
+    return jsonify(rejected.to_dict()), rejected.status, {'Retry-After': str(rejected.retry_after)}
+
+
+def client_key():
+    """
+    Identify the caller for per-user limits. There are no auth tokens yet, so
+    this is the client IP; X-User-Id is used only when ADMISSION_TRUST_USER_HEADER
+    says a trusted proxy sets it.
+    """
+    if _trust_user_header and request.headers.get('X-User-Id'):
+        return 'user:' + request.headers['X-User-Id']
+    return request.remote_addr or 'anonymous'
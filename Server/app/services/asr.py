@@ -0,0 +1,352 @@
+# app/services/asr.py
+"""
+Speech-to-text backends.
+
+Every backend takes either a file path or a 16 kHz mono float32 array and
+returns a Whisper-style result dict:
+
+    {'text': str, 'language': str | None,
+     'segments': [{'start': float, 'end': float, 'text': str}, ...],
+     'words': [{'word': str, 'start': float, 'end': float}, ...]}
+
+'words' is empty when the engine (or the batched decode path) cannot
+produce word-level timings.
+
+The engine is chosen per deployment through the ASR_* config keys; the heavy
+libraries behind each engine are imported only when that engine is loaded.
+"""
+import logging
+import threading
+
+from . import warmup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'backend': 'whisper',
+    'model_name': 'base',
+    'threads': None,            # None = library default
+    'language': None,           # None = automatic detection
+    'beam_size': None,          # None = greedy decoding
+    'temperatures': (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+    'compute_type': 'int8',     # weight precision on CPU
+    'word_timestamps': True,    # needed by the local speech metrics
+}
+
+# whisper.audio.N_SAMPLES: one 30 s window at 16 kHz.
+WHISPER_WINDOW_SAMPLES = 30 * 16000
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_backends = {}
+
+
+class ASRBackend:
+    """Base class for speech-to-text engines."""
+
+    name = None
+
+    def __init__(self, model_name, threads=None, language=None, beam_size=None,
+                 temperatures=(0.0,), compute_type='int8', word_timestamps=True):
+        self.model_name = model_name
+        self.threads = threads
+        self.language = language
+        self.beam_size = beam_size
+        self.temperatures = tuple(temperatures) if temperatures else (0.0,)
+        self.compute_type = compute_type
+        self.word_timestamps = word_timestamps
+        self._model = None
+
+    def load(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+    def can_batch(self, audio):
+        """Whether decode_batch() accepts `audio`. Engines without a batched decoder say no."""
+        return False
+
+    def decode_batch(self, audios):
+        """
+        Decode inputs accepted by can_batch() together. A None entry means
+        that input has to be redone with transcribe().
+        """
+        return [None] * len(audios)
+
+    def transcribe_batch(self, audios):
+        """Transcribe several inputs: batchable ones through decode_batch(), the rest one by one."""
+        results = [None] * len(audios)
+        batch_indices = [i for i, audio in enumerate(audios) if self.can_batch(audio)]
+        if len(batch_indices) > 1:
+            for i, result in zip(batch_indices, self.decode_batch([audios[i] for i in batch_indices])):
+                results[i] = result
+        return [result if result is not None else self.transcribe(audio) for result, audio in zip(results, audios)]
+
+    def ensure_loaded(self):
+        if self._model is None:
+            self._model = self.load()
+        return self._model
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper on PyTorch, optionally with int8 dynamic quantization."""
+
+    name = 'whisper'
+
+    def load(self):
+        import torch
+        import whisper
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        model = whisper.load_model(self.model_name, device='cpu')
+        if self.compute_type == 'int8':
+            model = self._quantize(torch, whisper, model)
+        return model
+
+    def _quantize(self, torch, whisper, model):
+        """
+        int8 dynamic quantization of the Linear layers, which dominate
+        Whisper's CPU time. Whisper uses its own Linear subclass and
+        quantize_dynamic only swaps exact type matches, so the spec and the
+        mapping are keyed on that class.
+        """
+        dynamic_linear = torch.ao.nn.quantized.dynamic.Linear
+
+        class WhisperDynamicLinear(dynamic_linear):
+            @classmethod
+            def from_float(cls, mod, *args, **kwargs):
+                # from_float accepts only exact nn.Linear; Whisper's subclass
+                # adds no state (just a dtype cast in forward), so convert it as one.
+                mod.__class__ = torch.nn.Linear
+                return super().from_float(mod, *args, **kwargs)
+
+        quantized = torch.ao.quantization.quantize_dynamic(
+            model,
+            {whisper.model.Linear: torch.ao.quantization.default_dynamic_qconfig},
+            dtype=torch.qint8,
+            mapping={whisper.model.Linear: WhisperDynamicLinear},
+        )
+        swapped = sum(1 for module in quantized.modules() if isinstance(module, dynamic_linear))
+        if not swapped:
+            logger.warning(f"int8 quantization of Whisper '{self.model_name}' replaced no Linear layers; running in FP32.")
+            return model
+        logger.info(f"Quantized {swapped} Linear layers of Whisper '{self.model_name}' to int8.")
+        return quantized
+
+    def transcribe(self, audio):
+        model = self.ensure_loaded()
+        options = {
+            'fp16': False,
+            'language': self.language,
+            'temperature': self.temperatures,
+            'word_timestamps': self.word_timestamps,
+        }
+        if self.beam_size:
+            options['beam_size'] = self.beam_size
+        result = model.transcribe(audio, **options)
+        segments = result.get('segments', [])
+        return {
+            'text': result['text'],
+            'language': result.get('language'),
+            'segments': [{'start': s['start'], 'end': s['end'], 'text': s['text']} for s in segments],
+            'words': [
+                {'word': w['word'], 'start': w['start'], 'end': w['end']}
+                for s in segments for w in s.get('words', [])
+            ],
+        }
+
+    def can_batch(self, audio):
+        """
+        In-memory clips that fit one 30 s window. Not while word timestamps
+        are wanted: the batched decoder cannot align words, and the speech
+        metrics need them.
+        """
+        return not self.word_timestamps and not isinstance(audio, str) and len(audio) <= WHISPER_WINDOW_SAMPLES
+
+    def decode_batch(self, audios):
+        """
+        One padded batch through the encoder and decoder at the first
+        temperature. Results that fail Whisper's quality checks come back as
+        None, so transcribe() redoes them with the full temperature fallback.
+        """
+        import torch
+        import whisper
+
+        model = self.ensure_loaded()
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), model.dims.n_mels)
+            for audio in audios
+        ])
+        options = whisper.DecodingOptions(
+            language=self.language,
+            temperature=self.temperatures[0],
+            beam_size=self.beam_size,
+            without_timestamps=True,
+            fp16=False,
+        )
+        results = []
+        for audio, result in zip(audios, whisper.decode(model, mels, options)):
+            # Same thresholds transcribe() uses to trigger temperature fallback.
+            if result.compression_ratio > 2.4 or result.avg_logprob < -1.0:
+                results.append(None)
+                continue
+            duration = len(audio) / float(whisper.audio.SAMPLE_RATE)
+            results.append({
+                'text': result.text,
+                'language': result.language,
+                'segments': [{'start': 0.0, 'end': duration, 'text': result.text}],
+                'words': [],
+            })
+        return results
+
+
+class FasterWhisperBackend(ASRBackend):
+    """CTranslate2 Whisper (faster-whisper), int8 on CPU by default."""
+
+    name = 'faster-whisper'
+
+    def load(self):
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            self.model_name,
+            device='cpu',
+            compute_type=self.compute_type or 'int8',
+            cpu_threads=self.threads or 0,
+        )
+
+    def transcribe(self, audio):
+        model = self.ensure_loaded()
+        segments, info = model.transcribe(
+            audio,
+            language=self.language,
+            beam_size=self.beam_size or 1,
+            temperature=list(self.temperatures),
+            word_timestamps=self.word_timestamps,
+        )
+        segments = list(segments)
+        return {
+            'text': ''.join(s.text for s in segments),
+            'language': info.language,
+            'segments': [{'start': s.start, 'end': s.end, 'text': s.text} for s in segments],
+            'words': [
+                {'word': w.word, 'start': w.start, 'end': w.end}
+                for s in segments for w in (s.words or [])
+            ],
+        }
+
+
+class OnnxWhisperBackend(ASRBackend):
+    """Whisper exported to ONNX Runtime through optimum."""
+
+    name = 'onnx'
+
+    def load(self):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import WhisperProcessor, pipeline
+
+        repo_id = self.model_name if '/' in self.model_name else f"openai/whisper-{self.model_name}"
+        session_options = onnxruntime.SessionOptions()
+        if self.threads:
+            session_options.intra_op_num_threads = self.threads
+        processor = WhisperProcessor.from_pretrained(repo_id)
+        model = ORTModelForSpeechSeq2Seq.from_pretrained(
+            repo_id, export=True, provider='CPUExecutionProvider', session_options=session_options
+        )
+        return pipeline(
+            'automatic-speech-recognition',
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            chunk_length_s=30,
+            device='cpu',
+        )
+
+    def transcribe(self, audio):
+        asr_pipeline = self.ensure_loaded()
+        generate_kwargs = {'num_beams': self.beam_size or 1}
+        if self.language:
+            generate_kwargs['language'] = self.language
+        if self.temperatures[0] > 0:
+            generate_kwargs.update(do_sample=True, temperature=self.temperatures[0])
+        if not isinstance(audio, str):
+            audio = {'raw': audio, 'sampling_rate': 16000}
+        # One pass: word-level chunks when timings are wanted, segment-level otherwise.
+        mode = 'word' if self.word_timestamps else True
+        result = asr_pipeline(audio, return_timestamps=mode, generate_kwargs=generate_kwargs)
+        chunks = [
+            {'text': c['text'], 'start': c['timestamp'][0] or 0.0, 'end': c['timestamp'][1] or 0.0}
+            for c in result.get('chunks', [])
+        ]
+        if self.word_timestamps:
+            words = [{'word': c['text'], 'start': c['start'], 'end': c['end']} for c in chunks]
+            segments = [{'start': words[0]['start'], 'end': words[-1]['end'], 'text': result['text']}] if words else []
+        else:
+            words = []
+            segments = chunks
+        return {'text': result['text'], 'language': self.language, 'segments': segments, 'words': words}
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    OnnxWhisperBackend.name: OnnxWhisperBackend,
+}
+
+
+def settings_from_config(config):
+    temperatures = config.get('ASR_TEMPERATURES') or DEFAULT_SETTINGS['temperatures']
+    return {
+        'backend': config.get('ASR_BACKEND', DEFAULT_SETTINGS['backend']),
+        'model_name': config.get('ASR_MODEL_NAME', DEFAULT_SETTINGS['model_name']),
+        'threads': config.get('ASR_THREADS'),
+        'language': config.get('ASR_LANGUAGE'),
+        'beam_size': config.get('ASR_BEAM_SIZE'),
+        'temperatures': tuple(temperatures),
+        'compute_type': config.get('ASR_COMPUTE_TYPE', DEFAULT_SETTINGS['compute_type']),
+        'word_timestamps': config.get('ASR_WORD_TIMESTAMPS', DEFAULT_SETTINGS['word_timestamps']),
+    }
+
+
+def configure(config):
+    """Set the deployment's default ASR settings from the Flask config."""
+    global _settings
+    _settings = settings_from_config(config)
+
+
+def current_settings():
+    return dict(_settings)
+
+
+def create_backend(settings):
+    settings = dict(settings)
+    backend_name = settings.pop('backend')
+    if backend_name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{backend_name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[backend_name](**settings)
+
+
+def get_backend(settings=None):
+    """
+    Return a loaded backend for the given (or the configured default) settings.
+    Models are loaded once per process and shared by every request.
+    """
+    settings = settings or _settings
+    key = tuple(sorted(settings.items()))
+    cached = _backends.get(key)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        if key not in _backends:
+            backend = create_backend(settings)
+            logger.info(f"Loading ASR backend '{backend.name}' ({backend.model_name}, {backend.compute_type})...")
+            backend.ensure_loaded()
+            logger.info("ASR backend loaded successfully.")
+            _backends[key] = backend
+        if settings is _settings:
+            warmup.mark_ready('asr')
+        return _backends[key]
@@ -0,0 +1,31 @@
+# app/services/audio.py
+import subprocess
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def load_audio(path, sample_rate=SAMPLE_RATE, timeout=None):
+    """
+    Decode any ffmpeg-readable file to mono float32 PCM in [-1, 1].
+    Same decoding Whisper performs internally, done once so later stages
+    (VAD, metrics, ASR) can share the array instead of re-decoding the file.
+    ffmpeg is killed and subprocess.TimeoutExpired raised after `timeout` seconds.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "-"
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True, timeout=timeout).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore').strip()}") from e
+
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def duration_seconds(samples, sample_rate=SAMPLE_RATE):
+    return len(samples) / float(sample_rate)
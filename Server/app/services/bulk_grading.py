@@ -0,0 +1,135 @@
+# app/services/bulk_grading.py
+"""
+Offline grading of many recordings (the `flask grade-recordings` command).
+
+Each file goes through decode, VAD, transcription, speech metrics and local
+relevance scoring inside a process pool, one file per worker at a time, so
+every core is busy without any request-path machinery (no MP3 conversion,
+no transcription scheduler). Workers load their own ASR backend once and
+report how long each stage took.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import asr, relevance, speech_metrics, vad
+from .audio import SAMPLE_RATE, load_audio
+
+AUDIO_EXTENSIONS = ('.webm', '.mp3', '.wav', '.m4a', '.ogg', '.flac')
+STAGES = ('decode', 'vad', 'transcribe', 'metrics', 'relevance')
+
+# Per-process state inside pool workers.
+_worker = {}
+
+
+def find_recordings(source, default_question=None):
+    """
+    Return [{'path', 'question', 'user_id'}] for a directory (recursively) or
+    a manifest (.csv with a header, or .jsonl) with path/question/user_id.
+    In a directory, `<stem>.question.txt` next to a file overrides the
+    default question.
+    """
+    if os.path.isdir(source):
+        items = []
+        for root, _, files in os.walk(source):
+            for filename in sorted(files):
+                stem, ext = os.path.splitext(filename)
+                if ext.lower() not in AUDIO_EXTENSIONS:
+                    continue
+                question = default_question
+                question_path = os.path.join(root, stem + '.question.txt')
+                if os.path.exists(question_path):
+                    with open(question_path, encoding='utf-8') as f:
+                        question = f.read().strip()
+                items.append({'path': os.path.join(root, filename), 'question': question, 'user_id': None})
+        return sorted(items, key=lambda item: item['path'])
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding='utf-8') as f:
+        if source.endswith('.jsonl'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [
+        {
+            'path': os.path.join(base, row['path']),
+            'question': row.get('question') or default_question,
+            'user_id': int(row['user_id']) if row.get('user_id') else None
+        }
+        for row in rows
+    ]
+
+
+def recording_key(path):
+    """Identifies a recording in the checkpoint; changes if the file is replaced."""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def _init_worker(asr_settings, threads, vad_settings, model_answers):
+    _worker['backend'] = asr.create_backend(dict(asr_settings, threads=threads))
+    _worker['backend'].ensure_loaded()
+    _worker['vad'] = vad_settings
+    _worker['index'] = relevance.RelevanceIndex(model_answers)
+
+
+def grade_file(item):
+    """Run the local stages for one recording (in a pool worker)."""
+    timings = dict.fromkeys(STAGES, 0.0)
+    result = {'path': item['path'], 'question': item['question'], 'timings': timings}
+
+    def timed(stage, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[stage] = time.perf_counter() - started
+
+    try:
+        samples = timed('decode', load_audio, item['path'])
+        result['audioDurationSeconds'] = len(samples) / SAMPLE_RATE
+
+        speech = None
+        if _worker['vad']['enabled']:
+            speech = timed('vad', vad.analyze_speech, samples,
+                           max_pause_seconds=_worker['vad']['max_pause_seconds'],
+                           min_speech_seconds=_worker['vad']['min_speech_seconds'])
+            if speech['is_silent']:
+                return dict(result, error='No speech was detected in the recording.')
+
+        transcription = timed('transcribe', _worker['backend'].transcribe, speech['samples'] if speech else samples)
+        text = transcription['text'].strip()
+        if len(text) < 3:
+            return dict(result, error='Transcription is too short to analyze.')
+        result['transcription'] = text
+
+        result['speechMetrics'] = timed('metrics', speech_metrics.compute_speech_metrics,
+                                        samples, transcription, spans=speech['spans'] if speech else None)
+        result['pauseStatistics'] = speech['pause_stats'] if speech else None
+        if item['question']:
+            result['contentRelevance'] = timed('relevance', _worker['index'].score, item['question'], text)
+        return result
+    except Exception as e:
+        return dict(result, error=str(e))
+
+
+def create_pool(workers, config, model_answers):
+    """A spawn-based process pool whose workers split the cores between them."""
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    vad_settings = {
+        'enabled': config['VAD_ENABLED'],
+        'max_pause_seconds': config['VAD_MAX_PAUSE_SECONDS'],
+        'min_speech_seconds': config['VAD_MIN_SPEECH_SECONDS'],
+    }
+    # spawn, not fork: forking a process that already runs torch threads can deadlock.
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(asr.current_settings(), threads, vad_settings, model_answers)
+    )
+    return pool, workers, threads
@@ -0,0 +1,42 @@
+# app/services/coalesce.py
+"""
+In-flight request coalescing.
+
+Concurrent requests for the same key share a single computation: the first
+caller becomes the leader and does the work, later callers get the leader's
+Future and are notified when it completes.
+"""
+import threading
+from concurrent.futures import Future
+
+from . import metrics
+
+
+class RequestCoalescer:
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def join(self, key):
+        """Return (future, is_leader). Only the leader should start the work."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                metrics.incr(f"coalesce.{self.name}.joined")
+                return future, False
+            future = self._inflight[key] = Future()
+            metrics.incr(f"coalesce.{self.name}.started")
+            return future, True
+
+    def finish(self, key, result):
+        """Complete `key` for every waiter. Later requests start a fresh computation."""
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._inflight)
@@ -0,0 +1,78 @@
+# app/services/db_engine.py
+"""
+SQLAlchemy engine options from the environment, plus connection pool metrics.
+
+`configure(app)` turns the DB_* settings into SQLALCHEMY_ENGINE_OPTIONS before
+Flask-SQLAlchemy creates the engine. Server databases get a TimedQueuePool,
+which reports how long requests wait for a connection and how long they hold
+one; SQLite keeps Flask-SQLAlchemy's own pool choice.
+"""
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from . import metrics
+
+
+class TimedQueuePool(QueuePool):
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            metrics.incr('db.pool.timeouts')
+            raise
+        metrics.observe('db.pool.checkout_wait_ms', (time.perf_counter() - started) * 1000)
+        record.info['checked_out_at'] = time.perf_counter()
+        return record
+
+    def _do_return_conn(self, record):
+        checked_out_at = record.info.pop('checked_out_at', None)
+        if checked_out_at is not None:
+            metrics.observe('db.pool.held_ms', (time.perf_counter() - checked_out_at) * 1000)
+        super()._do_return_conn(record)
+
+
+def engine_options(config):
+    """Engine options for the configured database URL."""
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if uri.startswith('sqlite'):
+        return options
+
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT_SECONDS'],
+        pool_recycle=config['DB_POOL_RECYCLE_SECONDS'],
+    )
+    if uri.startswith('postgres'):
+        connect_args = {'connect_timeout': config['DB_CONNECT_TIMEOUT_SECONDS']}
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args['options'] = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+        options['connect_args'] = connect_args
+    return options
+
+
+def configure(app):
+    """Fill in SQLALCHEMY_ENGINE_OPTIONS; explicitly configured keys win."""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(
+        engine_options(app.config), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    )
+
+
+def pool_status(engine):
+    """Current pool occupancy for /metrics (None for pools without a queue)."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {'pool': type(pool).__name__}
+    return {
+        'pool': type(pool).__name__,
+        'size': pool.size(),
+        'checkedOut': pool.checkedout(),
+        'checkedIn': pool.checkedin(),
+        'overflow': pool.overflow(),
+    }
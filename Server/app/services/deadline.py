@@ -0,0 +1,111 @@
+# app/services/deadline.py
+"""
+Per-request deadline budgets.
+
+A Deadline is created when a request arrives and handed to every stage of
+the pipeline. Stages check it before starting, give subprocesses and network
+calls only the remaining time, and raise DeadlineExceeded when it runs out,
+so the caller can answer with whatever was finished instead of hanging.
+
+Work that cannot be interrupted keeps running after the deadline; whoever
+holds a resource for the request (an admission slot) releases it through
+when_idle(), so the resource stays taken until that work is really done.
+"""
+import subprocess
+import threading
+import time
+
+from . import metrics, profiler
+
+
+class DeadlineExceeded(Exception):
+
+    def __init__(self, stage):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+
+    def __init__(self, seconds):
+        """`seconds` of budget from now; None or 0 means no deadline."""
+        self.seconds = seconds or None
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.abandoned = []     # helper threads still running after their stage timed out
+
+    def remaining(self):
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def exceeded(self, stage):
+        metrics.incr(f"deadline.expired.{stage}")
+        return DeadlineExceeded(stage)
+
+    def check(self, stage):
+        """Raise DeadlineExceeded if no time is left for `stage`."""
+        if self.expired():
+            raise self.exceeded(stage)
+
+    def timeout(self, stage):
+        """Seconds `stage` may take (None without a deadline). Raises if none are left."""
+        self.check(stage)
+        return None if self.expires_at is None else self.remaining()
+
+    def run(self, stage, fn, *args, **kwargs):
+        """
+        Run `fn` in a helper thread and wait at most the remaining time. For
+        in-process work that cannot be interrupted (e.g. a Whisper decode):
+        on expiry the caller gets DeadlineExceeded and the thread is left to
+        finish in the background, its result discarded.
+        """
+        timeout = self.timeout(stage)
+        if timeout is None:
+            return fn(*args, **kwargs)
+
+        outcome = {}
+
+        def target():
+            try:
+                outcome['value'] = fn(*args, **kwargs)
+            except BaseException as e:
+                outcome['error'] = e
+
+        # A profiled request keeps sampling its work in the helper thread.
+        thread = threading.Thread(target=profiler.propagate(target), name=f'deadline-{stage}', daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            metrics.incr('deadline.abandoned_threads')
+            self.abandoned.append(thread)
+            raise self.exceeded(stage)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['value']
+
+    def when_idle(self, callback):
+        """
+        Call `callback` once every abandoned helper thread has finished: now
+        if there are none, else from a watcher thread.
+        """
+        running = [thread for thread in self.abandoned if thread.is_alive()]
+        if not running:
+            callback()
+            return
+
+        def watch():
+            for thread in running:
+                thread.join()
+            callback()
+
+        threading.Thread(target=watch, name='deadline-watcher', daemon=True).start()
+
+    def run_process(self, stage, cmd):
+        """subprocess.run with the remaining time; the process is killed on expiry."""
+        try:
+            return subprocess.run(cmd, capture_output=True, check=True, timeout=self.timeout(stage))
+        except subprocess.TimeoutExpired as e:
+            raise self.exceeded(stage) from e
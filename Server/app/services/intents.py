@@ -0,0 +1,141 @@
+# app/services/intents.py
+"""
+Fast path for trivial live-interview turns.
+
+Short messages such as "okay", "can you repeat that?" or "skip this one" do
+not need Gemini. The patterns in intent_rules.json (or INTENT_RULES_PATH) are
+compiled once into a single anchored regex with one named group per intent,
+so classifying a turn is one match call. Matched turns are answered from
+response templates and questions from QuestionBank.
+"""
+import json
+import logging
+import os
+import random
+import re
+import string
+import threading
+import time
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_rules.json')
+# QuestionBank rarely changes; re-read it at most this often.
+QUESTION_CACHE_SECONDS = 300
+
+_lock = threading.Lock()
+_settings = {'enabled': True, 'rules_path': DEFAULT_RULES_PATH}
+_matcher = None
+_questions = {'loaded_at': 0.0, 'items': []}
+
+
+def _normalize(text):
+    text = text.lower().replace('’', "'")
+    return ' '.join(re.sub(r"[^a-z0-9' ]+", ' ', text).split())
+
+
+class IntentMatcher:
+
+    def __init__(self, rules):
+        self.max_words = rules.get('max_words', 8)
+        self.intents = rules['intents']
+        self.fallback_questions = rules.get('fallback_questions', [])
+        self.templates = {
+            name: [string.Template(response) for response in intent['responses']]
+            for name, intent in self.intents.items()
+        }
+        groups = [
+            f"(?P<{name}>{'|'.join(f'(?:{pattern})' for pattern in intent['patterns'])})"
+            for name, intent in self.intents.items()
+        ]
+        # Optional politeness around the message; the whole message must match.
+        self.pattern = re.compile(
+            r"^(?:(?:um|uh|oh|hey|eva|so|sorry|please|well) )*(?:" + '|'.join(groups) + r")(?: (?:please|eva|then|now))*$"
+        )
+
+    def match(self, message):
+        """Return the intent name for `message`, or None."""
+        text = _normalize(message)
+        if not text or len(text.split()) > self.max_words:
+            return None
+        found = self.pattern.match(text)
+        return found.lastgroup if found else None
+
+    def response(self, intent, question):
+        return random.choice(self.templates[intent]).safe_substitute(question=question).strip()
+
+
+def configure(config):
+    global _matcher
+    with _lock:
+        _settings['enabled'] = config.get('INTENT_FAST_PATH_ENABLED', True)
+        _settings['rules_path'] = config.get('INTENT_RULES_PATH') or DEFAULT_RULES_PATH
+        _matcher = None
+
+
+def get_matcher():
+    """The compiled matcher, built on first use."""
+    global _matcher
+    if _matcher is None:
+        with _lock:
+            if _matcher is None:
+                with open(_settings['rules_path'], encoding='utf-8') as f:
+                    _matcher = IntentMatcher(json.load(f))
+                logger.info(f"Compiled {len(_matcher.intents)} intents from {_settings['rules_path']}.")
+    return _matcher
+
+
+def bank_questions():
+    """Question texts from QuestionBank, cached in memory (needs an app context)."""
+    now = time.monotonic()
+    if now - _questions['loaded_at'] > QUESTION_CACHE_SECONDS:
+        from app.models.hr_models import QuestionBank
+
+        try:
+            rows = QuestionBank.query.with_entities(QuestionBank.question_text).all()
+            _questions['items'] = [row[0] for row in rows]
+        except Exception as e:
+            logger.warning(f"Could not load QuestionBank for the intent fast path: {e}")
+        _questions['loaded_at'] = now
+    return _questions['items']
+
+
+def last_question(chat_history):
+    """The last question Eva asked, i.e. the last '?' sentence of her latest turn."""
+    for role, text in reversed(chat_history):
+        if role == 'AI':
+            questions = re.findall(r"[^.!?]*\?", text)
+            return questions[-1].strip() if questions else text.strip()
+    return None
+
+
+def next_question(chat_history, matcher):
+    asked = ' '.join(text for role, text in chat_history if role == 'AI')
+    candidates = [q for q in bank_questions() or matcher.fallback_questions if q not in asked]
+    return random.choice(candidates or matcher.fallback_questions)
+
+
+def respond(message, chat_history):
+    """
+    Answer `message` without the LLM when it is a trivial intent. Returns the
+    reply text, or None when the turn needs Gemini.
+    """
+    if not _settings['enabled']:
+        return None
+
+    matcher = get_matcher()
+    metrics.incr('intent.checked')
+    intent = matcher.match(message)
+    if intent is None:
+        return None
+
+    action = matcher.intents[intent].get('action', 'next_question')
+    question = last_question(chat_history) if action in ('repeat_question', 'redirect') else None
+    if not question:
+        question = next_question(chat_history, matcher)
+
+    metrics.incr('intent.hit')
+    metrics.incr(f"intent.hit.{intent}")
+    return matcher.response(intent, question)
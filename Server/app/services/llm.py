@@ -0,0 +1,88 @@
+# app/services/llm.py
+import logging
+import os
+import threading
+
+from . import warmup
+
+logger = logging.getLogger(__name__)
+
+# Both the HR analyzer and the live interview use the same credentials.
+SERVICE_ACCOUNT_KEY_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "gemini-service-account.json"
+)
+
+_lock = threading.Lock()
+_configured = None  # None = not attempted yet, True/False = outcome
+_models = {}
+
+
+def configure_llm(force=False):
+    """
+    Configure the Gemini client exactly once for the whole process.
+
+    Uses the service account key when present and falls back to GEMINI_API_KEY.
+    Returns True on success. Never exits the process: callers decide how to
+    degrade when the LLM is unavailable.
+    """
+    global _configured
+    if _configured is not None and not force:
+        return _configured
+
+    with _lock:
+        if _configured is not None and not force:
+            return _configured
+
+        try:
+            import google.generativeai as genai
+
+            if os.path.exists(SERVICE_ACCOUNT_KEY_PATH):
+                import google.auth
+                credentials, _ = google.auth.load_credentials_from_file(SERVICE_ACCOUNT_KEY_PATH)
+                genai.configure(credentials=credentials)
+                logger.info("Gemini API configured using service account key.")
+            else:
+                gemini_api_key = os.getenv("GEMINI_API_KEY")
+                if not gemini_api_key:
+                    raise ValueError(
+                        f"'{SERVICE_ACCOUNT_KEY_PATH}' not found and GEMINI_API_KEY is not set."
+                    )
+                genai.configure(api_key=gemini_api_key)
+                logger.info("Gemini API configured using GEMINI_API_KEY.")
+            _configured = True
+            warmup.mark_ready('llm')
+        except Exception as e:
+            logger.error(f"Could not configure Gemini API: {e}")
+            _configured = False
+
+        _models.clear()
+        return _configured
+
+
+def is_llm_configured():
+    return bool(_configured)
+
+
+def get_model(model_name, system_instruction=None):
+    """
+    Return a cached GenerativeModel, configuring the client on first use.
+    Returns None when the LLM could not be configured.
+    """
+    key = (model_name, system_instruction)
+    cached = _models.get(key)
+    if cached is not None:
+        return cached
+
+    if not configure_llm():
+        return None
+
+    import google.generativeai as genai
+
+    with _lock:
+        if key not in _models:
+            if system_instruction:
+                _models[key] = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+            else:
+                _models[key] = genai.GenerativeModel(model_name)
+        return _models[key]
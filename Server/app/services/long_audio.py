@@ -0,0 +1,197 @@
+# app/services/long_audio.py
+"""
+Parallel transcription for long recordings.
+
+Audio above LONG_AUDIO_THRESHOLD_SECONDS is cut at silences into roughly
+LONG_AUDIO_CHUNK_SECONDS pieces (with a small overlap), the pieces are
+transcribed concurrently in a process pool, and the results are stitched
+back together with timestamps on the original timeline.
+"""
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import asr, vad
+from .audio import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Look this far back from each target cut for the quietest non-speech frame.
+CUT_SEARCH_SECONDS = 8.0
+# Longest run of identical words removed when joining two chunks.
+MAX_OVERLAP_WORDS = 20
+
+_lock = threading.Lock()
+_pool = None
+_settings = {
+    'enabled': True,
+    'threshold_seconds': 120.0,
+    'chunk_seconds': 30.0,
+    'overlap_seconds': 1.0,
+    'workers': None,
+}
+
+# Per-process backend inside pool workers.
+_worker_backend = None
+
+
+def configure(config):
+    global _pool
+    with _lock:
+        _settings['enabled'] = config.get('LONG_AUDIO_ENABLED', True)
+        _settings['threshold_seconds'] = config.get('LONG_AUDIO_THRESHOLD_SECONDS', 120.0)
+        _settings['chunk_seconds'] = config.get('LONG_AUDIO_CHUNK_SECONDS', 30.0)
+        _settings['overlap_seconds'] = config.get('LONG_AUDIO_OVERLAP_SECONDS', 1.0)
+        _settings['workers'] = config.get('LONG_AUDIO_WORKERS')
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def should_chunk(samples, sample_rate=SAMPLE_RATE):
+    return _settings['enabled'] and len(samples) / float(sample_rate) > _settings['threshold_seconds']
+
+
+def split_at_silences(samples, sample_rate=SAMPLE_RATE, chunk_seconds=30.0, overlap_seconds=1.0):
+    """
+    Return (start, end) sample ranges covering `samples`. Each cut is placed
+    at the quietest non-speech frame shortly before the target length; when
+    there is no pause to cut at, the chunks overlap by `overlap_seconds`.
+    """
+    levels_db, frame_len = vad.frame_levels_db(samples, sample_rate)
+    mask = vad.speech_mask(levels_db)
+    # Silent frames rank below every speech frame, quieter ones first.
+    cost = np.where(mask, levels_db + 1000.0, levels_db)
+
+    chunk_frames = int(chunk_seconds * sample_rate / frame_len)
+    search_frames = int(min(CUT_SEARCH_SECONDS, chunk_seconds / 2) * sample_rate / frame_len)
+    overlap = int(overlap_seconds * sample_rate)
+
+    ranges = []
+    start_frame = 0
+    while len(levels_db) - start_frame > chunk_frames:
+        window_end = start_frame + chunk_frames
+        window = cost[window_end - search_frames:window_end]
+        cut_frame = window_end - search_frames + int(np.argmin(window))
+        cut_in_speech = bool(mask[cut_frame])
+
+        start = max(0, start_frame * frame_len - (overlap if ranges and ranges[-1][2] else 0))
+        end = cut_frame * frame_len + (overlap if cut_in_speech else 0)
+        ranges.append((start, end, cut_in_speech))
+        start_frame = cut_frame
+
+    start = max(0, start_frame * frame_len - (overlap if ranges and ranges[-1][2] else 0))
+    ranges.append((start, len(samples), False))
+    return [(start, end) for start, end, _ in ranges]
+
+
+def _init_worker(settings, threads):
+    global _worker_backend
+    settings = dict(settings, threads=threads)
+    _worker_backend = asr.create_backend(settings)
+    _worker_backend.ensure_loaded()
+
+
+def _transcribe_chunk(chunk):
+    return _worker_backend.transcribe(chunk)
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            workers = _settings['workers'] or os.cpu_count() or 1
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            # spawn, not fork: forking a process that already runs torch threads can deadlock.
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(asr.current_settings(), threads)
+            )
+            logger.info(f"Started long-audio pool with {workers} workers x {threads} threads.")
+        return _pool
+
+
+def _words(text):
+    return re.sub(r"[^\w' ]+", ' ', text.lower()).split()
+
+
+def _merge_text(previous, current, overlapped=True):
+    """
+    Append `current` to `previous`. When the chunks overlapped, words heard in
+    both are dropped from `current`; at a pause cut a repeated word is real.
+    """
+    if not overlapped:
+        return (previous.rstrip() + ' ' + current.strip()).strip()
+    prev_words, cur_words = _words(previous), _words(current)
+    raw_words = current.split()
+    for k in range(min(MAX_OVERLAP_WORDS, len(prev_words), len(cur_words)), 0, -1):
+        if prev_words[-k:] == cur_words[:k] and len(raw_words) >= k:
+            current = ' '.join(raw_words[k:])
+            break
+    return (previous.rstrip() + ' ' + current.strip()).strip()
+
+
+def stitch(results, ranges, sample_rate=SAMPLE_RATE):
+    """Combine per-chunk results into one result on the original timeline."""
+    # Midpoint of each overlap (None where chunks meet at a pause).
+    boundaries = [None]
+    for (_, previous_end), (start, _) in zip(ranges, ranges[1:]):
+        boundaries.append((start + previous_end) / 2.0 / sample_rate if previous_end > start else None)
+    boundaries.append(None)
+
+    segments = []
+    words = []
+    text = ''
+    for index, (result, (start, end)) in enumerate(zip(results, ranges)):
+        offset = start / float(sample_rate)
+        # Inside an overlap, the earlier chunk wins up to the midpoint.
+        boundary, next_boundary = boundaries[index], boundaries[index + 1]
+
+        kept = []
+        for segment in result['segments']:
+            seg_start, seg_end = segment['start'] + offset, segment['end'] + offset
+            if boundary is not None and seg_end <= boundary:
+                continue
+            if next_boundary is not None and seg_start >= next_boundary:
+                continue
+            kept.append(segment)
+            segments.append({'start': seg_start, 'end': seg_end, 'text': segment['text']})
+
+        for word in result.get('words', []):
+            word_start, word_end = word['start'] + offset, word['end'] + offset
+            if boundary is not None and word_start < boundary:
+                continue
+            if next_boundary is not None and word_start >= next_boundary:
+                continue
+            words.append({'word': word['word'], 'start': word_start, 'end': word_end})
+
+        # The text follows the kept segments, so the overlap is not transcribed twice.
+        chunk_text = ''.join(s['text'] for s in kept) if result['segments'] else result['text']
+        text = _merge_text(text, chunk_text, overlapped=boundary is not None)
+
+    return {
+        'text': text,
+        'language': results[0].get('language') if results else None,
+        'segments': segments,
+        'words': words,
+    }
+
+
+def transcribe_long(samples, sample_rate=SAMPLE_RATE):
+    """Transcribe a long recording in parallel chunks."""
+    ranges = split_at_silences(
+        samples, sample_rate,
+        chunk_seconds=_settings['chunk_seconds'],
+        overlap_seconds=_settings['overlap_seconds']
+    )
+    logger.info(f"Transcribing {len(samples) / sample_rate:.1f}s of audio as {len(ranges)} parallel chunks.")
+    pool = _get_pool()
+    results = list(pool.map(_transcribe_chunk, [samples[start:end] for start, end in ranges]))
+    return stitch(results, ranges, sample_rate)
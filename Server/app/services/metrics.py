@@ -0,0 +1,43 @@
+# app/services/metrics.py
+"""
+Minimal in-process counters and summaries, served as JSON from /metrics.
+Per-process only; good enough to compare hit rates and costs between deploys.
+"""
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_summaries = {}
+
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, value):
+    with _lock:
+        summary = _summaries.get(name)
+        if summary is None:
+            summary = _summaries[name] = {'count': 0, 'sum': 0.0, 'min': value, 'max': value}
+        summary['count'] += 1
+        summary['sum'] += value
+        summary['min'] = min(summary['min'], value)
+        summary['max'] = max(summary['max'], value)
+
+
+def ratio(hits, total):
+    with _lock:
+        denominator = _counters.get(total, 0)
+        return _counters.get(hits, 0) / denominator if denominator else 0.0
+
+
+def snapshot():
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'summaries': {
+                name: dict(s, mean=s['sum'] / s['count'] if s['count'] else 0.0)
+                for name, s in _summaries.items()
+            },
+        }
@@ -0,0 +1,284 @@
+# app/services/profiler.py
+"""
+On-demand statistical profiling of production requests.
+
+A profiled request (or Socket.IO job) registers its thread; while anything is
+registered, one sampler thread reads every registered thread's stack from
+sys._current_frames() every PROFILER_INTERVAL_MS and counts identical stacks.
+Nothing is sampled otherwise, so the cost is zero for unprofiled traffic.
+
+Helper threads doing work for a profiled request (deadline helpers, batch
+workers, the transcription scheduler) attach to the same profile; their
+stacks are rooted at a "thread:<name>" frame. Work in other processes (the
+long-audio pool) is not visible to the sampler.
+
+Requests are profiled when randomly sampled (PROFILER_ENABLED with
+PROFILER_SAMPLE_RATE), when the admin toggle asks for the next N requests,
+or when they carry `X-Profile: 1` together with a valid `X-Admin-Token`.
+Finished profiles are kept in a ring of the last PROFILER_MAX_PROFILES and
+exported as folded stacks ("a;b;c 12" lines), the input format of
+flamegraph.pl and speedscope.
+"""
+import collections
+import functools
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from flask import g, request
+
+from . import metrics
+
+# Deeper stacks are cut at the root end.
+MAX_STACK_DEPTH = 128
+# Operational endpoints are never profiled (nor use up the toggle's count).
+UNPROFILED_BLUEPRINTS = ('admin', 'health')
+
+_lock = threading.Lock()
+_settings = {'enabled': False, 'sample_rate': 0.0, 'interval': 0.005, 'admin_token': None}
+_profile_next = 0
+_active = {}            # thread id -> (profiles, root frame name or None)
+_finished = collections.deque(maxlen=20)
+_wake = threading.Event()
+_sampler = None
+
+
+class Profile:
+
+    def __init__(self, name, reason):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.reason = reason
+        self.started_at = time.time()
+        self.duration_seconds = None
+        self.samples = 0
+        self.stacks = collections.Counter()
+
+    def add(self, frame, root=None):
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        if root is not None:
+            names.append(root)
+        self.stacks[';'.join(reversed(names))] += 1
+        self.samples += 1
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'reason': self.reason,
+            'startedAt': self.started_at,
+            'durationSeconds': self.duration_seconds,
+            'samples': self.samples,
+        }
+
+
+def configure(config):
+    global _finished
+    with _lock:
+        _settings['enabled'] = config.get('PROFILER_ENABLED', False)
+        _settings['sample_rate'] = config.get('PROFILER_SAMPLE_RATE', 0.0)
+        _settings['interval'] = config.get('PROFILER_INTERVAL_MS', 5.0) / 1000.0
+        _settings['admin_token'] = config.get('ADMIN_TOKEN')
+        _finished = collections.deque(_finished, maxlen=config.get('PROFILER_MAX_PROFILES', 20))
+
+
+def set_toggle(enabled=None, sample_rate=None, profile_next=None):
+    """Admin toggle: switch sampling on/off, change the rate, or profile the next N requests."""
+    global _profile_next
+    with _lock:
+        if enabled is not None:
+            _settings['enabled'] = bool(enabled)
+        if sample_rate is not None:
+            _settings['sample_rate'] = min(1.0, max(0.0, float(sample_rate)))
+        if profile_next is not None:
+            _profile_next = max(0, int(profile_next))
+    return status()
+
+
+def status():
+    with _lock:
+        return {
+            'enabled': _settings['enabled'],
+            'sampleRate': _settings['sample_rate'],
+            'intervalMs': _settings['interval'] * 1000,
+            'profileNext': _profile_next,
+            'active': len({p for profiles, _ in _active.values() for p in profiles}),
+            'stored': len(_finished),
+            'capacity': _finished.maxlen,
+        }
+
+
+def is_admin(token):
+    expected = _settings['admin_token']
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+
+def should_profile(forced=False):
+    """Return why this unit of work should be profiled, or None."""
+    global _profile_next
+    if forced:
+        return 'header'
+    with _lock:
+        # An explicit "profile the next N" works even while random sampling is off.
+        if _profile_next > 0:
+            _profile_next -= 1
+            return 'toggle'
+        if _settings['enabled'] and _settings['sample_rate'] and random.random() < _settings['sample_rate']:
+            return 'sampled'
+    return None
+
+
+def start(name, reason):
+    """Profile the calling thread until stop() is called."""
+    profile = Profile(name, reason)
+    _ensure_sampler()
+    with _lock:
+        _active[threading.get_ident()] = ((profile,), None)
+        _wake.set()
+    return profile
+
+
+def stop(profile):
+    with _lock:
+        # Also drop helper threads still attached to this profile.
+        for thread_id, (attached, root) in list(_active.items()):
+            if profile in attached:
+                remaining = tuple(p for p in attached if p is not profile)
+                if remaining:
+                    _active[thread_id] = (remaining, root)
+                else:
+                    del _active[thread_id]
+        profile.duration_seconds = time.time() - profile.started_at
+        _finished.append(profile)
+    metrics.incr('profiler.profiles')
+    metrics.observe('profiler.samples', profile.samples)
+
+
+def current():
+    """The profile the calling thread is sampled into, or None."""
+    entry = _active.get(threading.get_ident())
+    return entry[0][0] if entry is not None else None
+
+
+def attach(*profiles):
+    """
+    Sample the calling helper thread into `profiles` (e.g. every profiled
+    request in a batch) until detach(). None and finished profiles are ignored.
+    """
+    with _lock:
+        profiles = tuple(p for p in profiles if p is not None and p.duration_seconds is None)
+        if profiles:
+            _active[threading.get_ident()] = (profiles, f"thread:{threading.current_thread().name}")
+            _wake.set()
+
+
+def detach():
+    with _lock:
+        _active.pop(threading.get_ident(), None)
+
+
+def propagate(fn):
+    """Wrap `fn` so that the thread running it is sampled into the caller's profile."""
+    profile = current()
+    if profile is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        attach(profile)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            detach()
+    return wrapper
+
+
+def profiles():
+    with _lock:
+        return [p.summary() for p in reversed(_finished)]
+
+
+def get_profile(profile_id):
+    with _lock:
+        return next((p for p in _finished if p.id == profile_id), None)
+
+
+def profiled(name):
+    """Decorator for background jobs (e.g. Socket.IO work) using the same selection."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            reason = should_profile()
+            if reason is None:
+                return fn(*args, **kwargs)
+            profile = start(name, reason)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stop(profile)
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    """Profile selected HTTP requests from before_request to teardown."""
+    configure(app.config)
+
+    @app.before_request
+    def _start_profile():
+        if request.blueprint in UNPROFILED_BLUEPRINTS:
+            return
+        forced = request.headers.get('X-Profile') == '1' and is_admin(request.headers.get('X-Admin-Token'))
+        reason = should_profile(forced)
+        if reason is not None:
+            g.profile = start(f"{request.method} {request.path}", reason)
+
+    @app.after_request
+    def _profile_header(response):
+        profile = g.get('profile')
+        if profile is not None:
+            response.headers['X-Profile-Id'] = profile.id
+        return response
+
+    # Teardown runs after a streamed (SSE) body has finished, not before.
+    @app.teardown_request
+    def _stop_profile(exc):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            stop(profile)
+
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = threading.Thread(target=_sample_loop, name='profiler-sampler', daemon=True)
+            _sampler.start()
+
+
+def _sample_loop():
+    while True:
+        _wake.wait()
+        frames = sys._current_frames()
+        with _lock:
+            for thread_id, (profiles, root) in _active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    for profile in profiles:
+                        profile.add(frame, root)
+            if not _active:
+                _wake.clear()
+                continue
+        del frames
+        time.sleep(_settings['interval'])
@@ -0,0 +1,164 @@
+# app/services/prompt_builder.py
+"""
+Token-budgeted prompt assembly.
+
+Prompts are built from named sections, each with a trim priority. When the
+total exceeds the budget, the lowest-priority section is trimmed first
+(text sections are cut to fit, list sections lose their oldest items) until
+the prompt fits. Token counts come from tiktoken; Gemini uses a different
+tokenizer, so counts are a close estimate rather than exact billing figures.
+"""
+import logging
+import threading
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "cl100k_base"
+
+# Trim order: lower numbers are trimmed first.
+PRIORITY_RESUME = 0
+PRIORITY_HISTORY = 1
+PRIORITY_METRICS = 2
+PRIORITY_REQUIRED = 99  # never trimmed
+
+TRUNCATION_MARKER = " ... (truncated)"
+
+_lock = threading.Lock()
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception as e:
+                    # No tiktoken or no cached BPE file (offline): estimate instead.
+                    logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+                    _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, keep='head'):
+    """Cut `text` to at most `max_tokens`, keeping its start ('head') or end ('tail')."""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    encoding = _get_encoding()
+    if encoding is None:
+        chars = budget * 4
+        kept = text[:chars] if keep == 'head' else text[-chars:]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        kept = encoding.decode(tokens[:budget] if keep == 'head' else tokens[-budget:])
+    return kept + TRUNCATION_MARKER if keep == 'head' else TRUNCATION_MARKER.strip() + " " + kept
+
+
+class Section:
+    """
+    One part of a prompt. Either `text` (trimmed by cutting tokens) or
+    `items` (a list trimmed by dropping items from the front, i.e. the oldest).
+    """
+
+    def __init__(self, name, text=None, items=None, priority=PRIORITY_REQUIRED,
+                 keep='head', min_tokens=0, item_tokens=None):
+        self.name = name
+        self.text = text or ''
+        self.items = list(items) if items is not None else None
+        self.priority = priority
+        self.keep = keep
+        self.min_tokens = min_tokens
+        self.item_tokens = item_tokens or count_tokens
+        self.trimmed = False
+        self._item_counts = [self.item_tokens(item) for item in self.items] if self.items is not None else None
+
+    def tokens(self):
+        if self.items is not None:
+            return sum(self._item_counts)
+        return count_tokens(self.text)
+
+    def trim(self, overflow):
+        """Shed roughly `overflow` tokens; return False when nothing more can go."""
+        if self.priority >= PRIORITY_REQUIRED:
+            return False
+        if self.items is not None:
+            if not self.items or self.tokens() <= self.min_tokens:
+                return False
+            while self.items and overflow > 0 and self.tokens() > self.min_tokens:
+                overflow -= self._item_counts.pop(0)
+                self.items.pop(0)
+            self.trimmed = True
+            return True
+
+        current = self.tokens()
+        if current <= self.min_tokens:
+            return False
+        text = truncate_to_tokens(self.text, max(self.min_tokens, current - overflow), self.keep)
+        if count_tokens(text) >= current:
+            return False
+        self.text = text
+        self.trimmed = True
+        return True
+
+
+class BuiltPrompt:
+
+    def __init__(self, sections, budget):
+        self.sections = {s.name: s for s in sections}
+        self.budget = budget
+
+    def text(self, name):
+        return self.sections[name].text
+
+    def items(self, name):
+        return self.sections[name].items
+
+    def token_report(self, overhead_tokens=0):
+        counts = {name: s.tokens() for name, s in self.sections.items()}
+        total = sum(counts.values()) + overhead_tokens
+        return {
+            'sections': counts,
+            'overhead': overhead_tokens,
+            'total': total,
+            'budget': self.budget,
+            'trimmed': [name for name, s in self.sections.items() if s.trimmed],
+        }
+
+
+def fit_sections(sections, budget, overhead_tokens=0):
+    """
+    Trim `sections` in priority order until they fit `budget` tokens, where
+    `overhead_tokens` accounts for fixed template text around them.
+    """
+    trimmable = sorted(sections, key=lambda s: s.priority)
+    for section in trimmable:
+        while True:
+            overflow = sum(s.tokens() for s in sections) + overhead_tokens - budget
+            if overflow <= 0 or not section.trim(overflow):
+                break
+    return BuiltPrompt(sections, budget)
+
+
+def record_usage(prompt_name, report):
+    """Export a prompt's token usage to /metrics."""
+    metrics.observe(f"prompt_tokens.{prompt_name}", report['total'])
+    if report['trimmed']:
+        metrics.incr(f"prompt_trimmed.{prompt_name}")
@@ -0,0 +1,186 @@
+# app/services/relevance.py
+"""
+Local content-relevance scoring against QuestionBank.model_answer.
+
+The model answers form a small corpus. Its vocabulary, IDF weights and one
+BM25-weighted vector per answer are precomputed (and rebuilt when the bank
+is re-read), so scoring a transcript is one tokenization and a couple of
+NumPy dot products. The result (similarity, keyword coverage, key points the
+answer missed) is a hint for the LLM and the fallback score without it.
+"""
+import logging
+import re
+import threading
+import time
+
+import numpy as np
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# QuestionBank rarely changes; rebuild the index at most this often.
+INDEX_CACHE_SECONDS = 300
+# BM25 term-frequency saturation and length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Highest-weighted terms of a model answer that count as its keywords.
+TOP_KEYWORDS = 12
+# A model-answer sentence is "covered" once this share of its terms appears.
+KEY_POINT_COVERAGE = 0.34
+MAX_MISSING_POINTS = 3
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just let me more most my myself no nor
+not now of off on once only or other our ours ourselves out over own same she should so some such than that
+the their theirs them themselves then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your yours yourself yourselves also get
+got really thing things think lot much many um uh like well yeah okay ok actually basically
+""".split())
+
+_lock = threading.Lock()
+_index = {'loaded_at': None, 'value': None}
+
+
+def _stem(word):
+    for suffix in ('ing', 'ed', 'ly', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def _words(text):
+    words = (w.strip("'") for w in re.sub(r"[^a-z0-9' ]+", ' ', text.lower().replace('’', "'")).split())
+    return [w for w in words if w and w not in STOPWORDS]
+
+
+def tokenize(text):
+    return [_stem(w) for w in _words(text)]
+
+
+def split_sentences(text):
+    return [s.strip() for s in re.split(r'(?<=[.!?;])\s+|\n+', text) if len(s.strip().split()) >= 4]
+
+
+class RelevanceIndex:
+
+    def __init__(self, answers):
+        """`answers` maps question text to its model answer."""
+        docs = {question: tokenize(answer) for question, answer in answers.items()}
+        self.vocabulary = {term: i for i, term in enumerate(sorted({t for tokens in docs.values() for t in tokens}))}
+        size = len(self.vocabulary)
+
+        counts = np.zeros((len(docs), size), dtype=np.float32)
+        for row, tokens in enumerate(docs.values()):
+            np.add.at(counts[row], [self.vocabulary[t] for t in tokens], 1)
+        doc_freq = np.count_nonzero(counts, axis=0)
+        self.idf = np.log(1 + (len(docs) - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        lengths = counts.sum(axis=1)
+        self.avg_length = float(lengths.mean()) if len(docs) else 1.0
+
+        self.rows = {question: row for row, question in enumerate(docs)}
+        self.vectors = self._weigh(counts, lengths)
+        self.answers = {}
+        for question, answer in answers.items():
+            weights = self.vectors[self.rows[question]]
+            ranked = np.argsort(-weights)[:TOP_KEYWORDS]
+            keywords = [i for i in ranked if weights[i] > 0]
+            points = [(s, {self.vocabulary[t] for t in tokenize(s)}) for s in split_sentences(answer)]
+            self.answers[question] = {'keywords': keywords, 'points': [p for p in points if p[1]]}
+        # Report keywords as written in the model answers, not as stems.
+        surface = {}
+        for answer in answers.values():
+            for word in _words(answer):
+                surface.setdefault(_stem(word), word)
+        self.terms = np.array([surface[term] for term in sorted(self.vocabulary, key=self.vocabulary.get)])
+
+    def _weigh(self, counts, lengths):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[:, None] / max(self.avg_length, 1.0))
+        weights = counts * (BM25_K1 + 1) / (counts + norm) * self.idf
+        return weights.astype(np.float32)
+
+    def vectorize(self, text):
+        ids = [self.vocabulary[t] for t in tokenize(text) if t in self.vocabulary]
+        counts = np.bincount(ids, minlength=len(self.vocabulary)).astype(np.float32)[None, :]
+        return self._weigh(counts, counts.sum(axis=1))[0]
+
+    def score(self, question, transcript):
+        """Relevance of `transcript` to the model answer of `question`, or None."""
+        row = self.rows.get(question)
+        # An answer without keywords (e.g. only stopwords) gives nothing to score against.
+        if row is None or not self.answers[question]['keywords']:
+            return None
+
+        answer = self.answers[question]
+        reference = self.vectors[row]
+        candidate = self.vectorize(transcript)
+        denominator = float(np.linalg.norm(reference) * np.linalg.norm(candidate))
+        similarity = float(reference @ candidate) / denominator if denominator else 0.0
+
+        present = candidate > 0
+        matched = [i for i in answer['keywords'] if present[i]]
+        missing = [i for i in answer['keywords'] if not present[i]]
+        coverage = len(matched) / len(answer['keywords'])
+
+        spoken = set(np.flatnonzero(present).tolist())
+        missing_points = [
+            sentence for sentence, terms in answer['points']
+            if len(terms & spoken) / len(terms) < KEY_POINT_COVERAGE
+        ][:MAX_MISSING_POINTS]
+
+        return {
+            'similarity': round(similarity, 3),
+            'keywordCoverage': round(coverage, 3),
+            'matchedKeywords': self.terms[matched].tolist(),
+            'missingKeywords': self.terms[missing].tolist(),
+            'missingKeyPoints': missing_points,
+            # Coverage of the key terms matters more than overall vector overlap,
+            # which stays low for short spoken answers even when they are on topic.
+            'score': round(10 * min(1.0, 0.6 * coverage + 0.4 * min(1.0, similarity / 0.5)), 1)
+        }
+
+
+def get_index():
+    """The index over all QuestionBank model answers (needs an app context)."""
+    now = time.monotonic()
+    if _index['loaded_at'] is None or now - _index['loaded_at'] > INDEX_CACHE_SECONDS:
+        with _lock:
+            if _index['loaded_at'] is None or now - _index['loaded_at'] > INDEX_CACHE_SECONDS:
+                from app.models.hr_models import QuestionBank
+
+                try:
+                    rows = QuestionBank.query.with_entities(QuestionBank.question_text, QuestionBank.model_answer).all()
+                    started = time.perf_counter()
+                    # Questions without a model answer stay out of the index, so they score None.
+                    _index['value'] = RelevanceIndex({question: answer for question, answer in rows if answer and answer.strip()})
+                    metrics.observe('relevance.index_build_ms', (time.perf_counter() - started) * 1000)
+                except Exception as e:
+                    logger.warning(f"Could not build the relevance index from QuestionBank: {e}")
+                _index['loaded_at'] = now
+    return _index['value']
+
+
+def score_answer(question, transcript):
+    """Score `transcript` for `question`. None when the question has no model answer."""
+    index = get_index()
+    if index is None:
+        return None
+
+    started = time.perf_counter()
+    result = index.score(question, transcript)
+    if result is not None:
+        metrics.observe('relevance.score_ms', (time.perf_counter() - started) * 1000)
+    return result
+
+
+def describe(relevance):
+    """One-paragraph summary used as the LLM hint and in the fallback feedback."""
+    text = (
+        f"The answer covers {relevance['keywordCoverage'] * 100:.0f}% of the key terms of the reference answer "
+        f"(similarity {relevance['similarity']:.2f})."
+    )
+    if relevance['missingKeywords']:
+        text += f" Key terms not mentioned: {', '.join(relevance['missingKeywords'])}."
+    return text
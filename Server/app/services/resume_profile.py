@@ -0,0 +1,374 @@
+# app/services/resume_profile.py
+"""
+Compact resume profiles for the live interview.
+
+Raw pdfminer/docx output is mostly layout noise. On upload, the text is
+reduced once to a small structured profile (roles, skills, projects,
+education, dates) by a local heuristic parser, optionally refined by a single
+Gemini call. Profiles are keyed by a hash of the normalized text, cached in
+memory and persisted in ResumeProfile, so re-uploading the same resume costs
+nothing. Only the formatted profile is sent with each interview turn.
+"""
+import collections
+import hashlib
+import json
+import logging
+import re
+import threading
+
+from . import llm, metrics, prompt_builder
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODEL_NAME = "gemini-2.5-flash"
+
+SECTION_HEADINGS = {
+    'summary': ('summary', 'professional summary', 'profile', 'objective', 'career objective', 'about me'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'internships', 'internship'),
+    'projects': ('projects', 'personal projects', 'academic projects', 'key projects'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core competencies', 'technologies', 'tools'),
+    'education': ('education', 'academic background', 'academics', 'qualifications'),
+    'certifications': ('certifications', 'certificates', 'achievements', 'awards', 'honors'),
+}
+_HEADING_LOOKUP = {h: section for section, headings in SECTION_HEADINGS.items() for h in headings}
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+|\d{{1,2}}/)?(?:19|20)\d{{2}}"
+DATE_RANGE_RE = re.compile(rf"({_DATE})\s*(?:-|–|—|to)\s*({_DATE}|present|current|now)", re.IGNORECASE)
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+BULLET_RE = re.compile(r"^\s*[•●▪◦■\-\*–·]\s*")
+SKILL_SPLIT_RE = re.compile(r"[,|•●▪;/\n]+")
+
+MAX_ROLES = 6
+MAX_HIGHLIGHTS = 2
+MAX_PROJECTS = 5
+MAX_SKILLS = 30
+MAX_EDUCATION = 3
+MAX_CERTIFICATIONS = 5
+MAX_LINE_WORDS = 25
+CACHE_SIZE = 256
+
+PROFILE_SYSTEM_PROMPT = """
+You turn resumes into compact candidate profiles for an interviewer.
+Return JSON only, with the keys: summary (string, under 40 words), roles (list of
+{title, organization, dates, highlights (max 2 short strings)}), skills (list of
+strings), projects (list of {name, description}), education (list of strings),
+certifications (list of strings). Keep dates as written. Do not invent facts.
+"""
+
+PROFILE_REFINE_TEMPLATE = """
+A heuristic parser produced this draft profile:
+{draft}
+
+Correct and complete it using the resume text below.
+
+Resume:
+{resume}
+"""
+
+_STRING = {"type": "STRING"}
+_STRING_LIST = {"type": "ARRAY", "items": _STRING}
+
+PROFILE_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "summary": _STRING,
+        "roles": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "title": _STRING,
+                    "organization": _STRING,
+                    "dates": _STRING,
+                    "highlights": _STRING_LIST
+                }
+            }
+        },
+        "skills": _STRING_LIST,
+        "projects": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "name": _STRING,
+                    "description": _STRING
+                }
+            }
+        },
+        "education": _STRING_LIST,
+        "certifications": _STRING_LIST
+    }
+}
+
+PROFILE_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": PROFILE_RESPONSE_SCHEMA,
+}
+
+_lock = threading.Lock()
+_cache = collections.OrderedDict()
+
+
+def normalize_text(text):
+    """Strip layout noise: form feeds, hyphenated line breaks, runs of spaces, blank lines."""
+    text = text.replace('\x0c', '\n').replace('\r', '\n')
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    lines = (re.sub(r"[ \t\u00a0]+", ' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def resume_hash(text):
+    return hashlib.sha256(normalize_text(text).lower().encode('utf-8')).hexdigest()
+
+
+def _shorten(line, max_words=MAX_LINE_WORDS):
+    words = line.split()
+    return ' '.join(words[:max_words]) + (' ...' if len(words) > max_words else '')
+
+
+def _heading(line):
+    key = re.sub(r"[^a-z ]+", '', line.lower()).strip()
+    return _HEADING_LOOKUP.get(key) if len(key.split()) <= 4 else None
+
+
+def split_sections(text):
+    sections = collections.defaultdict(list)
+    current = 'header'
+    for line in text.split('\n'):
+        heading = _heading(line)
+        if heading:
+            current = heading
+            continue
+        sections[current].append(line)
+    return sections
+
+
+def _parse_roles(lines):
+    roles = []
+    pending = ''  # short undated line, e.g. a title printed above "Company  2019 - 2021"
+    for line in lines:
+        bullet = BULLET_RE.match(line)
+        match = None if bullet else DATE_RANGE_RE.search(line)
+        if match:
+            title = (line[:match.start()] + line[match.end():]).strip(' ,|-–—()')
+            title = ', '.join(part for part in (pending, title) if part)
+            roles.append({'title': _shorten(title, 12), 'dates': f"{match.group(1)} - {match.group(2)}", 'highlights': []})
+            pending = ''
+        elif not bullet and len(line.split()) <= 8:
+            pending = line
+        elif roles and len(roles[-1]['highlights']) < MAX_HIGHLIGHTS:
+            roles[-1]['highlights'].append(_shorten(BULLET_RE.sub('', line), 20))
+    return roles[:MAX_ROLES]
+
+
+def _parse_projects(lines):
+    projects = []
+    for line in lines:
+        bullet = BULLET_RE.match(line)
+        text = BULLET_RE.sub('', line)
+        if not bullet and len(text.split()) <= 10:
+            projects.append({'name': text.strip(' :-–'), 'description': ''})
+        elif projects and not projects[-1]['description']:
+            projects[-1]['description'] = _shorten(text, 20)
+    return projects[:MAX_PROJECTS]
+
+
+def _parse_skills(lines):
+    skills = []
+    seen = set()
+    for part in SKILL_SPLIT_RE.split('\n'.join(lines)):
+        # "Languages: Python, Java" -> "Python"
+        skill = part.split(':', 1)[-1].strip(' .-–')
+        if skill and len(skill.split()) <= 4 and skill.lower() not in seen:
+            seen.add(skill.lower())
+            skills.append(skill)
+    return skills[:MAX_SKILLS]
+
+
+def parse_resume(text):
+    """Heuristic profile from resume text. Works on any text, headings or not."""
+    text = normalize_text(text)
+    sections = split_sections(text)
+    profile = {
+        'summary': _shorten(' '.join(sections.get('summary', [])), 40),
+        'roles': _parse_roles(sections.get('experience', [])),
+        'skills': _parse_skills(sections.get('skills', [])),
+        'projects': _parse_projects(sections.get('projects', [])),
+        'education': [_shorten(BULLET_RE.sub('', line), 20) for line in sections.get('education', [])
+                      if YEAR_RE.search(line) or len(line.split()) > 3][:MAX_EDUCATION],
+        'certifications': [_shorten(BULLET_RE.sub('', line), 15) for line in sections.get('certifications', [])][:MAX_CERTIFICATIONS],
+    }
+    if not any(profile[key] for key in ('roles', 'skills', 'projects', 'education')):
+        # No recognizable structure: keep the start of the cleaned text instead.
+        profile['summary'] = prompt_builder.truncate_to_tokens(text.replace('\n', ' '), 300)
+    return profile
+
+
+def format_profile(profile):
+    """Render a profile as the compact text block injected into each turn."""
+    lines = []
+    if profile.get('summary'):
+        lines.append(f"Summary: {profile['summary']}")
+    if profile.get('roles'):
+        lines.append("Roles:")
+        for role in profile['roles']:
+            title = ', '.join(part for part in (role.get('title'), role.get('organization')) if part)
+            entry = f"- {title} ({role['dates']})" if role.get('dates') else f"- {title}"
+            if role.get('highlights'):
+                entry += ": " + "; ".join(role['highlights'])
+            lines.append(entry)
+    if profile.get('skills'):
+        lines.append("Skills: " + ", ".join(profile['skills']))
+    if profile.get('projects'):
+        lines.append("Projects:")
+        for project in profile['projects']:
+            lines.append(f"- {project['name']}: {project['description']}" if project.get('description') else f"- {project['name']}")
+    for key, label in (('education', 'Education'), ('certifications', 'Certifications')):
+        if profile.get(key):
+            lines.append(f"{label}: " + "; ".join(profile[key]))
+    return '\n'.join(lines)
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ''
+
+
+def _coerce_role(item):
+    if isinstance(item, str):
+        item = {'title': item}
+    if not isinstance(item, dict) or not _text(item.get('title')):
+        return None
+    role = {'title': _shorten(_text(item['title']), 12)}
+    for key in ('organization', 'dates'):
+        if _text(item.get(key)):
+            role[key] = _text(item[key])
+    highlights = item.get('highlights') if isinstance(item.get('highlights'), list) else []
+    role['highlights'] = [_shorten(_text(h), 20) for h in highlights if _text(h)][:MAX_HIGHLIGHTS]
+    return role
+
+
+def _coerce_project(item):
+    if isinstance(item, str):
+        item = {'name': item}
+    if not isinstance(item, dict) or not _text(item.get('name')):
+        return None
+    return {'name': _text(item['name']), 'description': _shorten(_text(item.get('description')), 20)}
+
+
+def _coerce_skill(item):
+    # Models sometimes return {"name": ...} objects for list-of-string fields.
+    return _text(item.get('name')) if isinstance(item, dict) else _text(item)
+
+
+_LIST_FIELDS = {
+    'roles': (_coerce_role, MAX_ROLES),
+    'projects': (_coerce_project, MAX_PROJECTS),
+    'skills': (_coerce_skill, MAX_SKILLS),
+    'education': (_coerce_skill, MAX_EDUCATION),
+    'certifications': (_coerce_skill, MAX_CERTIFICATIONS),
+}
+
+
+def merge_refined(profile, refined):
+    """
+    Bring the model's profile into the local shape field by field. A field
+    that is missing, empty or of the wrong shape keeps the local value, so
+    whatever is saved can always be formatted.
+    """
+    merged = dict(profile)
+    if _text(refined.get('summary')):
+        merged['summary'] = _shorten(_text(refined['summary']), 40)
+    for key, (coerce, limit) in _LIST_FIELDS.items():
+        value = refined.get(key)
+        if not isinstance(value, list):
+            continue
+        items = [item for item in map(coerce, value) if item][:limit]
+        if items:
+            merged[key] = items
+    return merged
+
+
+def refine_with_llm(text, profile, max_resume_tokens):
+    """One Gemini pass over the resume, seeded with the local draft. Returns None on failure."""
+    model = llm.get_model(PROFILE_MODEL_NAME, system_instruction=PROFILE_SYSTEM_PROMPT)
+    if not model:
+        return None
+    prompt = PROFILE_REFINE_TEMPLATE.format(
+        draft=json.dumps(profile),
+        resume=prompt_builder.truncate_to_tokens(normalize_text(text), max_resume_tokens)
+    )
+    try:
+        response = model.generate_content(prompt, generation_config=PROFILE_GENERATION_CONFIG)
+        refined = json.loads(response.text)
+    except Exception as e:
+        logger.error(f"Resume profile LLM pass failed: {e}")
+        return None
+    if not isinstance(refined, dict):
+        return None
+    return merge_refined(profile, refined)
+
+
+def _remember(digest, profile, source):
+    with _lock:
+        _cache[digest] = (profile, source)
+        _cache.move_to_end(digest)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _load(digest):
+    with _lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    from app.models.hr_models import ResumeProfile
+
+    row = ResumeProfile.query.filter_by(resume_hash=digest).first()
+    if row is None:
+        return None
+    # Rows saved before LLM output was validated may not have the local shape.
+    if not isinstance(row.profile_json, dict):
+        return None
+    profile = merge_refined(dict(summary='', **{key: [] for key in _LIST_FIELDS}), row.profile_json)
+    _remember(digest, profile, row.source)
+    return profile, row.source
+
+
+def save_profile(digest, profile, source):
+    """Persist (insert or update) a profile and refresh the cache."""
+    from app.extensions import db
+    from app.models.hr_models import ResumeProfile
+
+    _remember(digest, profile, source)
+    try:
+        row = ResumeProfile.query.filter_by(resume_hash=digest).first()
+        if row is None:
+            db.session.add(ResumeProfile(resume_hash=digest, profile_json=profile, source=source))
+        else:
+            row.profile_json = profile
+            row.source = source
+        db.session.commit()
+    except Exception as e:
+        # Another upload of the same resume may have won the insert; the cache still holds it.
+        db.session.rollback()
+        logger.warning(f"Could not persist resume profile {digest[:12]}: {e}")
+
+
+def get_or_build_profile(text):
+    """
+    Return (digest, profile, source) for resume `text`, building and
+    persisting the local profile on a cache miss. `source` is 'local' or 'llm'.
+    """
+    digest = resume_hash(text)
+    cached = _load(digest)
+    if cached is not None:
+        metrics.incr('resume_profile.cache_hit')
+        return (digest,) + tuple(cached)
+
+    metrics.incr('resume_profile.built')
+    profile = parse_resume(text)
+    save_profile(digest, profile, 'local')
+    return digest, profile, 'local'
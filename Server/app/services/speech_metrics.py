@@ -0,0 +1,188 @@
+# app/services/speech_metrics.py
+"""
+Deterministic delivery metrics computed locally from word timestamps and PCM.
+
+Everything here is vectorized NumPy and runs in a few milliseconds, so the
+numbers are available even when the LLM is slow or unavailable, and the same
+recording always produces the same values.
+"""
+import re
+
+import numpy as np
+
+from . import vad
+from .audio import SAMPLE_RATE
+
+FILLER_WORDS = {'um', 'umm', 'uh', 'uhh', 'erm', 'er', 'ah', 'hmm', 'mm'}
+FILLER_PHRASES = ('you know', 'i mean')
+# Ordinary words ("I would like to", "the kind of projects") that are fillers
+# only when set off from the sentence: at the start of a clause or followed
+# by a comma, as in "Like, I was..." or "it was, like, hard".
+CONTEXTUAL_FILLERS = ('like', 'basically', 'actually', 'sort of', 'kind of')
+_CONTEXTUAL_RE = re.compile(r"\b(" + '|'.join(CONTEXTUAL_FILLERS) + r")\b")
+_CLAUSE_BREAKS = '.,!?;:'
+
+MIN_PAUSE_SECONDS = vad.MIN_PAUSE_SECONDS
+LONG_PAUSE_SECONDS = vad.LONG_PAUSE_SECONDS
+PAUSE_BINS = (MIN_PAUSE_SECONDS, 0.5, 1.0, 2.0, np.inf)
+
+PITCH_MIN_HZ = 75.0
+PITCH_MAX_HZ = 400.0
+# Normalized autocorrelation peak a frame needs to count as voiced.
+VOICING_THRESHOLD = 0.3
+
+
+def _normalize_words(text):
+    return re.sub(r"[^a-z' ]+", ' ', text.lower()).split()
+
+
+def _contextual_fillers(transcript):
+    """Yield CONTEXTUAL_FILLERS used as fillers, judged by the punctuation around them."""
+    text = transcript.lower()
+    for match in _CONTEXTUAL_RE.finditer(text):
+        before = text[:match.start()].rstrip()
+        after = text[match.end():].lstrip()
+        if not before or before[-1] in _CLAUSE_BREAKS or after.startswith(','):
+            yield match.group(1)
+
+
+def filler_stats(transcript, duration_seconds):
+    words = _normalize_words(transcript)
+    joined = ' ' + ' '.join(words) + ' '
+    counts = {}
+    for word in words:
+        if word in FILLER_WORDS:
+            counts[word] = counts.get(word, 0) + 1
+    for phrase in FILLER_PHRASES:
+        n = joined.count(' ' + phrase + ' ')
+        if n:
+            counts[phrase] = n
+    for filler in _contextual_fillers(transcript):
+        counts[filler] = counts.get(filler, 0) + 1
+
+    total = sum(counts.values())
+    minutes = duration_seconds / 60.0
+    return {
+        'fillerCount': total,
+        'fillersPer100Words': round(100.0 * total / len(words), 2) if words else 0.0,
+        'fillersPerMinute': round(total / minutes, 2) if minutes > 0 else 0.0,
+        'topFillers': dict(sorted(counts.items(), key=lambda kv: -kv[1])[:5]),
+    }
+
+
+def pause_distribution(starts, ends):
+    """Pause statistics from the gaps between consecutive words."""
+    gaps = starts[1:] - ends[:-1] if len(starts) > 1 else np.zeros(0)
+    pauses = gaps[gaps >= MIN_PAUSE_SECONDS]
+    histogram, _ = np.histogram(pauses, bins=PAUSE_BINS)
+    return {
+        'pauseCount': int(len(pauses)),
+        'totalPauseSeconds': round(float(pauses.sum()), 2),
+        'meanPauseSeconds': round(float(pauses.mean()), 2) if len(pauses) else 0.0,
+        'medianPauseSeconds': round(float(np.median(pauses)), 2) if len(pauses) else 0.0,
+        'p90PauseSeconds': round(float(np.percentile(pauses, 90)), 2) if len(pauses) else 0.0,
+        'maxPauseSeconds': round(float(pauses.max()), 2) if len(pauses) else 0.0,
+        'longPauseCount': int(np.sum(pauses >= LONG_PAUSE_SECONDS)),
+        'histogram': {
+            '0.25-0.5s': int(histogram[0]),
+            '0.5-1s': int(histogram[1]),
+            '1-2s': int(histogram[2]),
+            '2s+': int(histogram[3]),
+        },
+    }
+
+
+def prosody_stats(samples, sample_rate=SAMPLE_RATE):
+    """
+    Pitch (autocorrelation F0) and energy variability over voiced frames.
+    Autocorrelation is computed for all frames at once with a single FFT.
+    """
+    levels_db, frame_len = vad.frame_levels_db(samples, sample_rate)
+    mask = vad.speech_mask(levels_db)
+    empty = {
+        'pitchMeanHz': 0.0, 'pitchStdHz': 0.0, 'pitchRangeSemitones': 0.0,
+        'pitchVariabilitySemitones': 0.0, 'energyStdDb': 0.0, 'voicedRatio': 0.0,
+    }
+    if not mask.any():
+        return empty
+
+    n_frames = len(levels_db)
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)[mask]
+    frames = (frames - frames.mean(axis=1, keepdims=True)) * np.hanning(frame_len)
+
+    n_fft = 1 << (2 * frame_len - 1).bit_length()
+    spectrum = np.fft.rfft(frames, n=n_fft, axis=1)
+    autocorr = np.fft.irfft(np.abs(spectrum) ** 2, n=n_fft, axis=1)[:, :frame_len]
+
+    min_lag = int(sample_rate / PITCH_MAX_HZ)
+    max_lag = min(int(sample_rate / PITCH_MIN_HZ), frame_len - 1)
+    search = autocorr[:, min_lag:max_lag]
+    lags = np.argmax(search, axis=1) + min_lag
+    peak = search[np.arange(len(lags)), lags - min_lag] / np.maximum(autocorr[:, 0], 1e-10)
+    voiced = peak > VOICING_THRESHOLD
+
+    voiced_levels = levels_db[mask]
+    result = dict(empty, energyStdDb=round(float(np.std(voiced_levels)), 2))
+    if not voiced.any():
+        return result
+
+    f0 = sample_rate / lags[voiced].astype(np.float64)
+    semitones = 12.0 * np.log2(f0 / np.median(f0))
+    result.update({
+        'pitchMeanHz': round(float(f0.mean()), 1),
+        'pitchStdHz': round(float(f0.std()), 1),
+        'pitchRangeSemitones': round(float(np.percentile(semitones, 95) - np.percentile(semitones, 5)), 2),
+        'pitchVariabilitySemitones': round(float(semitones.std()), 2),
+        'voicedRatio': round(float(voiced.mean()), 3),
+    })
+    return result
+
+
+def compute_speech_metrics(samples, transcription, sample_rate=SAMPLE_RATE, spans=None):
+    """
+    Build the speech metrics for one answer.
+
+    `samples` is the ORIGINAL decoded recording and `transcription` an ASR
+    result dict. `spans` (from vad.analyze_speech) maps timestamps of a
+    trimmed transcription back to the original recording.
+    """
+    duration = len(samples) / float(sample_rate)
+    text = transcription.get('text', '')
+    words = [w for w in transcription.get('words', []) if w['word'].strip()]
+
+    if words:
+        starts = np.array([w['start'] for w in words], dtype=np.float64)
+        ends = np.array([w['end'] for w in words], dtype=np.float64)
+        if spans:
+            starts = _to_original(starts, spans)
+            ends = _to_original(ends, spans)
+        word_count = len(words)
+        pauses = pause_distribution(starts, ends)
+        # Articulation rate excludes pauses: words per minute of actual talking.
+        speaking_seconds = max(float(ends[-1] - starts[0]) - pauses['totalPauseSeconds'], 1e-6)
+        articulation_wpm = word_count / (speaking_seconds / 60.0)
+    else:
+        word_count = len(text.split())
+        pauses = None
+        articulation_wpm = None
+
+    metrics = {
+        'source': 'word_timestamps' if words else 'transcript',
+        'durationSeconds': round(duration, 2),
+        'wordCount': word_count,
+        'speakingRateWpm': round(word_count / (duration / 60.0), 1) if duration > 0 else 0.0,
+        'articulationRateWpm': round(articulation_wpm, 1) if articulation_wpm is not None else None,
+        'pauses': pauses,
+    }
+    metrics.update(filler_stats(text, duration))
+    metrics.update(prosody_stats(samples, sample_rate))
+    return metrics
+
+
+def _to_original(times, spans):
+    """Vectorized vad.to_original_time."""
+    original_starts = np.array([s[0] for s in spans])
+    original_ends = np.array([s[1] for s in spans])
+    new_starts = np.array([s[2] for s in spans])
+    idx = np.clip(np.searchsorted(new_starts, times, side='right') - 1, 0, len(spans) - 1)
+    return np.minimum(original_starts[idx] + (times - new_starts[idx]), original_ends[idx])
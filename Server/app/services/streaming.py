@@ -0,0 +1,63 @@
+# app/services/streaming.py
+"""Helpers for progressive (Server-Sent Events) responses."""
+import json
+
+
+def sse_event(name, data):
+    """Format one Server-Sent Event."""
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+class SectionStreamParser:
+    """
+    Incrementally scan a streamed JSON object and report nested sections as
+    soon as they are complete.
+
+    With parents=('tutoringPlan',), feeding the text of
+    {"tutoringPlan": {"fluency": {...}, "clarity": {...}}} in arbitrary
+    pieces yields ('tutoringPlan', 'fluency', {...}) the moment the fluency
+    object closes, long before the whole document is valid JSON.
+    """
+
+    def __init__(self, parents):
+        self.parents = set(parents)
+        self.buffer = ''
+        self._pos = 0
+        self._stack = []            # (key in parent, start offset) per open container
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._pending_key = None
+
+    def feed(self, text):
+        self.buffer += text
+        completed = []
+        buffer = self.buffer
+        while self._pos < len(buffer):
+            ch = buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:self._pos]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif ch == ':':
+                self._pending_key = self._last_string
+            elif ch == ',':
+                self._pending_key = None
+            elif ch in '{[':
+                self._stack.append((self._pending_key, self._pos))
+                self._pending_key = None
+            elif ch in '}]' and self._stack:
+                key, start = self._stack.pop()
+                # Closed a child object of a top-level parent section.
+                if ch == '}' and len(self._stack) == 2 and self._stack[1][0] in self.parents:
+                    completed.append((self._stack[1][0], key, json.loads(buffer[start:self._pos + 1])))
+            self._pos += 1
+        return completed
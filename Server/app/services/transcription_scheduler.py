@@ -0,0 +1,133 @@
+# app/services/transcription_scheduler.py
+"""
+Dynamic batching for concurrent transcriptions.
+
+Requests are queued; a single worker thread collects whatever arrives within
+a short window (or until the batch is full) and hands the whole group to the
+ASR backend's decode_batch(). Each caller gets its own result back through a
+Future. One worker also means one set of model threads for the batched work.
+
+Only inputs the backend can batch are queued (for Whisper: clips up to 30 s,
+and only with ASR_WORD_TIMESTAMPS off). Everything else, and any batched
+result that failed the quality checks, is transcribed in the caller's thread
+so that it does not hold up the queue.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from . import asr, profiler
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_scheduler = None
+_settings = {'enabled': False, 'max_batch_size': 8, 'max_wait_ms': 50}
+
+
+class TranscriptionScheduler:
+
+    def __init__(self, backend_getter=asr.get_backend, max_batch_size=8, max_wait_ms=50):
+        self.backend_getter = backend_getter
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, audio):
+        """Queue a batchable input; the Future resolves to the result dict, or None if it must be redone."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((audio, future, profiler.current()))
+        return future
+
+    def transcribe(self, audio, timeout=None):
+        backend = self.backend_getter()
+        if not backend.can_batch(audio):
+            return backend.transcribe(audio)
+        result = self.submit(audio).result(timeout=timeout)
+        return result if result is not None else backend.transcribe(audio)
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='transcription-scheduler', daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        window_ends = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = window_ends - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            # Skip callers that gave up (cancelled) while waiting in the queue.
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            if len(batch) == 1:
+                # Nothing to batch with: the caller runs the full transcribe() itself.
+                batch[0][1].set_result(None)
+                continue
+
+            # The batch's time shows up in the profile of every profiled caller in it.
+            profiler.attach(*(profile for _, _, profile in batch))
+            try:
+                results = self.backend_getter().decode_batch([audio for audio, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Batch transcription failed ({len(batch)} items): {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                profiler.detach()
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+def configure(config):
+    global _scheduler
+    with _lock:
+        _settings['enabled'] = config.get('ASR_BATCHING_ENABLED', False)
+        _settings['max_batch_size'] = config.get('ASR_MAX_BATCH_SIZE', 8)
+        _settings['max_wait_ms'] = config.get('ASR_MAX_WAIT_MS', 50)
+        _scheduler = None
+    if _settings['enabled'] and config.get('ASR_WORD_TIMESTAMPS', True):
+        logger.warning("ASR_BATCHING_ENABLED has no effect while ASR_WORD_TIMESTAMPS is on: "
+                       "batched decoding cannot produce the word timings the speech metrics need.")
+
+
+def is_enabled():
+    return _settings['enabled']
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _lock:
+            if _scheduler is None:
+                _scheduler = TranscriptionScheduler(
+                    max_batch_size=_settings['max_batch_size'],
+                    max_wait_ms=_settings['max_wait_ms']
+                )
+    return _scheduler
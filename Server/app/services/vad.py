@@ -0,0 +1,161 @@
+# app/services/vad.py
+"""
+Energy-based voice activity detection on decoded PCM.
+
+Used ahead of ASR to drop leading/trailing silence, shorten long pauses and
+reject recordings without speech before any model runs. All work is
+vectorized NumPy over fixed-size frames, so a few minutes of audio takes a
+few milliseconds.
+"""
+import numpy as np
+
+from .audio import SAMPLE_RATE
+
+FRAME_MS = 30
+# Speech must be this far above the estimated noise floor...
+THRESHOLD_MARGIN_DB = 12.0
+# The noise floor is the quietest stretch of at least this length: gaps
+# between syllables are shorter, so speech troughs do not count as silence.
+NOISE_WINDOW_SECONDS = 0.3
+# ...and never below this absolute level (dBFS), so that a clean digital
+# silence floor does not turn breathing into "speech".
+ABSOLUTE_FLOOR_DB = -50.0
+# Bridge gaps shorter than this inside speech (stops, plosives).
+MIN_PAUSE_SECONDS = 0.25
+LONG_PAUSE_SECONDS = 2.0
+# Silence kept around speech when trimming.
+PADDING_SECONDS = 0.15
+
+
+def frame_levels_db(samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    """RMS level of each non-overlapping frame in dBFS."""
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame_len
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10)), frame_len
+
+
+def speech_mask(levels_db, frame_ms=FRAME_MS, margin_db=THRESHOLD_MARGIN_DB,
+                min_pause_seconds=MIN_PAUSE_SECONDS):
+    """
+    Boolean speech/non-speech decision per frame. When the recording has no
+    stretch clearly quieter than its speech (all or nearly all speech), only
+    frames below ABSOLUTE_FLOOR_DB count as silence, so nothing is trimmed
+    from speech that merely gets quieter.
+    """
+    if len(levels_db) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = _noise_floor(levels_db, frame_ms)
+    if np.percentile(levels_db, 90) - noise_floor < margin_db:
+        threshold = ABSOLUTE_FLOOR_DB
+    else:
+        threshold = max(noise_floor + margin_db, ABSOLUTE_FLOOR_DB)
+    mask = levels_db > threshold
+
+    # Close short gaps between voiced frames.
+    max_gap = int(round(min_pause_seconds * 1000 / frame_ms))
+    starts, ends = _runs(~mask)
+    for start, end in zip(starts, ends):
+        if 0 < start and end < len(mask) and end - start < max_gap:
+            mask[start:end] = True
+    return mask
+
+
+def _noise_floor(levels_db, frame_ms=FRAME_MS):
+    """Level of the quietest NOISE_WINDOW_SECONDS stretch (its loudest frame)."""
+    window = min(len(levels_db), max(1, int(round(NOISE_WINDOW_SECONDS * 1000 / frame_ms))))
+    return float(np.min(np.lib.stride_tricks.sliding_window_view(levels_db, window).max(axis=1)))
+
+
+def _runs(mask):
+    """Start/end (exclusive) indices of the True runs in a boolean array."""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    diff = np.diff(padded)
+    return np.flatnonzero(diff == 1), np.flatnonzero(diff == -1)
+
+
+def analyze_speech(samples, sample_rate=SAMPLE_RATE, max_pause_seconds=0.8,
+                   min_speech_seconds=0.5, margin_db=THRESHOLD_MARGIN_DB):
+    """
+    Run VAD and build the trimmed, pause-compressed signal.
+
+    Returns a dict with:
+      samples       -- audio to transcribe (trimmed and compressed)
+      is_silent     -- True when total speech is below min_speech_seconds
+      spans         -- kept regions as (original_start_s, original_end_s, new_start_s)
+      pause_stats   -- pause statistics measured on the ORIGINAL recording
+    """
+    original_seconds = len(samples) / float(sample_rate)
+    levels_db, frame_len = frame_levels_db(samples, sample_rate)
+    mask = speech_mask(levels_db, margin_db=margin_db)
+    frame_s = frame_len / float(sample_rate)
+
+    starts, ends = _runs(mask)
+    speech_seconds = float(np.sum(ends - starts) * frame_s)
+
+    result = {
+        'original_seconds': original_seconds,
+        'speech_seconds': speech_seconds,
+        'is_silent': speech_seconds < min_speech_seconds,
+        'pause_stats': _pause_stats(starts, ends, frame_s, original_seconds, speech_seconds),
+    }
+    if result['is_silent']:
+        result['samples'] = samples[:0]
+        result['spans'] = []
+        return result
+
+    # Keep each speech run plus padding; cap every inner pause at max_pause_seconds.
+    pad = int(PADDING_SECONDS * sample_rate)
+    half_pause = int(max_pause_seconds * sample_rate / 2)
+    kept = []
+    region_start = max(0, starts[0] * frame_len - pad)
+    for i in range(len(starts) - 1):
+        gap_start, gap_end = ends[i] * frame_len, starts[i + 1] * frame_len
+        if gap_end - gap_start > 2 * half_pause:
+            kept.append((region_start, gap_start + half_pause))
+            region_start = gap_end - half_pause
+    kept.append((region_start, min(len(samples), ends[-1] * frame_len + pad)))
+    kept = [(int(s), int(e)) for s, e in kept]
+
+    spans = []
+    offset = 0
+    for start, end in kept:
+        spans.append((start / float(sample_rate), end / float(sample_rate), offset / float(sample_rate)))
+        offset += end - start
+
+    result['samples'] = np.concatenate([samples[s:e] for s, e in kept])
+    result['spans'] = spans
+    return result
+
+
+def _pause_stats(starts, ends, frame_s, original_seconds, speech_seconds):
+    if len(starts) == 0:
+        pauses = np.zeros(0)
+        leading = trailing = original_seconds
+    else:
+        pauses = (starts[1:] - ends[:-1]) * frame_s
+        pauses = pauses[pauses >= MIN_PAUSE_SECONDS]
+        leading = starts[0] * frame_s
+        trailing = max(0.0, original_seconds - ends[-1] * frame_s)
+
+    return {
+        'pauseCount': int(len(pauses)),
+        'totalPauseSeconds': round(float(pauses.sum()), 2),
+        'meanPauseSeconds': round(float(pauses.mean()), 2) if len(pauses) else 0.0,
+        'maxPauseSeconds': round(float(pauses.max()), 2) if len(pauses) else 0.0,
+        'longPauseCount': int(np.sum(pauses >= LONG_PAUSE_SECONDS)),
+        'leadingSilenceSeconds': round(float(leading), 2),
+        'trailingSilenceSeconds': round(float(trailing), 2),
+        'speechRatio': round(speech_seconds / original_seconds, 3) if original_seconds else 0.0,
+    }
+
+
+def to_original_time(t, spans):
+    """Map a timestamp in the trimmed audio back to the original recording."""
+    for original_start, original_end, new_start in reversed(spans):
+        if t >= new_start:
+            return min(original_start + (t - new_start), original_end)
+    return spans[0][0] if spans else t
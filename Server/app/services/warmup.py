@@ -0,0 +1,115 @@
+# app/services/warmup.py
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+COLD = 'cold'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+_lock = threading.Lock()
+_subsystems = {}
+
+
+def register_subsystem(name, loader, required=True):
+    """
+    Register a heavy subsystem. `loader` is a no-arg callable that loads it and
+    returns a truthy value on success. Registering twice keeps the current state.
+    """
+    with _lock:
+        if name in _subsystems:
+            _subsystems[name]['loader'] = loader
+            _subsystems[name]['required'] = required
+            return
+        _subsystems[name] = {
+            'loader': loader,
+            'required': required,
+            'state': COLD,
+            'seconds': None,
+            'error': None,
+            'event': threading.Event(),
+        }
+
+
+def mark_ready(name):
+    """Record that a subsystem became usable through a lazy load path."""
+    with _lock:
+        entry = _subsystems.get(name)
+        if entry and entry['state'] != READY:
+            entry['state'] = READY
+            entry['event'].set()
+
+
+def warm(name):
+    """Load a subsystem once; concurrent callers wait for the first loader."""
+    with _lock:
+        entry = _subsystems.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown subsystem '{name}'")
+        if entry['state'] in (READY, FAILED):
+            return entry['state'] == READY
+        if entry['state'] == WARMING:
+            event = entry['event']
+            owner = False
+        else:
+            entry['state'] = WARMING
+            event = entry['event']
+            owner = True
+
+    if not owner:
+        event.wait()
+        return _subsystems[name]['state'] == READY
+
+    started = time.perf_counter()
+    try:
+        ok = bool(entry['loader']())
+        error = None if ok else 'loader returned a falsy value'
+    except Exception as e:
+        ok = False
+        error = str(e)
+
+    with _lock:
+        entry['state'] = READY if ok else FAILED
+        entry['seconds'] = round(time.perf_counter() - started, 3)
+        entry['error'] = error
+        event.set()
+
+    if ok:
+        logger.info(f"Subsystem '{name}' warm in {entry['seconds']}s.")
+    else:
+        logger.error(f"Subsystem '{name}' failed to warm: {error}")
+    return ok
+
+
+def start_background_warmup(names=None):
+    """Warm the given (or all registered) subsystems on a daemon thread."""
+    names = list(names) if names else list(_subsystems)
+
+    def _run():
+        for name in names:
+            warm(name)
+
+    thread = threading.Thread(target=_run, name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def status():
+    with _lock:
+        return {
+            name: {
+                'state': entry['state'],
+                'required': entry['required'],
+                'seconds': entry['seconds'],
+                'error': entry['error'],
+            }
+            for name, entry in _subsystems.items()
+        }
+
+
+def is_ready():
+    with _lock:
+        return all(entry['state'] == READY for entry in _subsystems.values() if entry['required'])
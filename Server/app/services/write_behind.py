@@ -0,0 +1,161 @@
+# app/services/write_behind.py
+"""
+Write-behind buffering for database writes off the request path.
+
+Callers add items under a key (e.g. one live interview) and return at once.
+A single worker thread hands each key's pending items to a flush function in
+one batch once its oldest item has waited the flush interval, when the key
+reaches `max_items`, or when a flush is requested explicitly (e.g. on
+disconnect). Failed batches are put back and retried with exponential
+backoff (`retry_backoff_seconds`, doubling up to MAX_RETRY_BACKOFF_SECONDS),
+up to `max_retries` times if set.
+"""
+import atexit
+import collections
+import logging
+import threading
+import time
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_BACKOFF_SECONDS = 60.0
+
+
+class WriteBehindBuffer:
+
+    def __init__(self, name, flush_fn, max_items=10, flush_interval_seconds=2.0, max_pending=1000, max_retries=None,
+                 retry_backoff_seconds=1.0):
+        self.name = name
+        self.flush_fn = flush_fn          # flush_fn(key, items), run inside an app context
+        self.max_items = max(1, max_items)
+        self.flush_interval = flush_interval_seconds
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_seconds
+        self.app = None
+        self._pending = collections.OrderedDict()
+        self._urgent = set()
+        self._since = {}                  # key -> when its oldest pending item was added
+        self._failures = {}
+        self._retry_at = {}               # key -> when its failed batch may be retried
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def configure(self, app, max_items=None, flush_interval_seconds=None):
+        self.app = app
+        if max_items is not None:
+            self.max_items = max(1, max_items)
+        if flush_interval_seconds is not None:
+            self.flush_interval = flush_interval_seconds
+
+    def add(self, key, item):
+        """Buffer `item` for `key`. Never touches the database."""
+        with self._lock:
+            items = self._pending.setdefault(key, [])
+            self._since.setdefault(key, time.monotonic())
+            items.append(item)
+            if len(items) > self.max_pending:
+                del items[0]
+                metrics.incr(f"write_behind.{self.name}.dropped")
+            if len(items) >= self.max_items:
+                self._urgent.add(key)
+                self._wake.set()
+        self._ensure_worker()
+
+    def request_flush(self, key):
+        """Ask the worker to flush `key` now, without waiting for it."""
+        with self._lock:
+            if key not in self._pending:
+                return
+            self._urgent.add(key)
+        self._wake.set()
+        self._ensure_worker()
+
+    def flush_all(self):
+        """Flush everything synchronously in the calling thread (shutdown, CLI)."""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self._flush_key(key)
+
+    def pending_count(self):
+        with self._lock:
+            return sum(len(items) for items in self._pending.values())
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'write-behind-{self.name}', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush_all)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+            for key in self._due_keys():
+                self._flush_key(key)
+
+    def _due_at(self, key):
+        """When `key` should be flushed: its retry time after a failure, else interval after its oldest item."""
+        if key in self._retry_at:
+            return self._retry_at[key]
+        return self._since[key] + self.flush_interval
+
+    def _due_keys(self):
+        """Keys to flush now: urgent ones and those past their due time, except failed keys still backing off."""
+        now = time.monotonic()
+        with self._lock:
+            keys = [
+                key for key in self._pending
+                if self._due_at(key) <= now or (key in self._urgent and key not in self._retry_at)
+            ]
+            self._urgent.difference_update(keys)
+        return keys
+
+    def _next_wait(self):
+        """Seconds until the next key is due."""
+        with self._lock:
+            if not self._pending:
+                return self.flush_interval
+            next_due = min(self._due_at(key) for key in self._pending)
+        return max(0.0, next_due - time.monotonic())
+
+    def _flush_key(self, key):
+        with self._lock:
+            items = self._pending.pop(key, None)
+            self._since.pop(key, None)
+        if not items:
+            return
+
+        try:
+            with self.app.app_context():
+                self.flush_fn(key, items)
+            metrics.incr(f"write_behind.{self.name}.flushes")
+            metrics.observe(f"write_behind.{self.name}.batch_size", len(items))
+            with self._lock:
+                self._failures.pop(key, None)
+                self._retry_at.pop(key, None)
+        except Exception as e:
+            metrics.incr(f"write_behind.{self.name}.errors")
+            failures = self._failures[key] = self._failures.get(key, 0) + 1
+            if self.max_retries is not None and failures > self.max_retries:
+                logger.error(f"Write-behind flush of {len(items)} items for {key} failed {failures} times, dropping them: {e}")
+                metrics.incr(f"write_behind.{self.name}.dropped", len(items))
+                with self._lock:
+                    self._failures.pop(key, None)
+                    self._retry_at.pop(key, None)
+                return
+            backoff = min(self.retry_backoff * 2 ** (failures - 1), MAX_RETRY_BACKOFF_SECONDS)
+            logger.error(f"Write-behind flush of {len(items)} items for {key} failed, retrying in {backoff:.1f}s: {e}")
+            with self._lock:
+                # Keep the original order: failed items go before anything added since.
+                self._pending[key] = items + self._pending.get(key, [])
+                self._pending.move_to_end(key, last=False)
+                self._since[key] = time.monotonic()
+                self._retry_at[key] = self._since[key] + backoff
@@ -0,0 +1,120 @@
+"""
+Compare ASR backends on a fixed local corpus: real-time factor and word error rate.
+
+The corpus is a directory of audio files, each with a reference transcript
+next to it using the same stem (answer_01.webm + answer_01.txt).
+
+    cd Server
+    python -m benchmarks.bench_asr corpus/ --backends whisper,faster-whisper,onnx \\
+        --model base --compute-type int8 --threads 4 --language en
+
+RTF = transcription wall time / audio duration (lower is better, < 1 is
+faster than real time). The first file per backend is treated as a warm-up
+and excluded from the timings.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from app.services import asr
+from app.services.audio import duration_seconds, load_audio
+
+AUDIO_EXTENSIONS = ('.webm', '.mp3', '.wav', '.m4a', '.ogg', '.flac')
+
+
+def normalize(text):
+    return re.sub(r"[^a-z0-9' ]+", ' ', text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_corpus(corpus_dir):
+    corpus = []
+    for filename in sorted(os.listdir(corpus_dir)):
+        stem, ext = os.path.splitext(filename)
+        reference_path = os.path.join(corpus_dir, stem + '.txt')
+        if ext.lower() in AUDIO_EXTENSIONS and os.path.exists(reference_path):
+            with open(reference_path, encoding='utf-8') as f:
+                reference = f.read()
+            samples = load_audio(os.path.join(corpus_dir, filename))
+            corpus.append((filename, samples, reference))
+    return corpus
+
+
+def bench_backend(settings, corpus):
+    load_started = time.perf_counter()
+    backend = asr.get_backend(settings)
+    load_seconds = time.perf_counter() - load_started
+
+    backend.transcribe(corpus[0][1])  # warm-up
+
+    audio_seconds = transcribe_seconds = 0.0
+    errors = []
+    for filename, samples, reference in corpus:
+        started = time.perf_counter()
+        result = backend.transcribe(samples)
+        transcribe_seconds += time.perf_counter() - started
+        audio_seconds += duration_seconds(samples)
+        errors.append(word_error_rate(reference, result['text']))
+
+    return {
+        'load_seconds': load_seconds,
+        'rtf': transcribe_seconds / audio_seconds if audio_seconds else 0.0,
+        'wer': sum(errors) / len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus_dir')
+    parser.add_argument('--backends', default=','.join(asr.BACKENDS))
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--compute-type', default='int8')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--beam-size', type=int, default=None)
+    parser.add_argument('--temperatures', default='0.0', help='comma-separated fallback schedule')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus_dir)
+    if not corpus:
+        print(f"No audio/transcript pairs found in {args.corpus_dir}")
+        return 1
+    total_audio = sum(duration_seconds(s) for _, s, _ in corpus)
+    print(f"corpus: {len(corpus)} files, {total_audio:.1f}s of audio\n")
+    print(f"{'backend':<16}{'load (s)':>10}{'RTF':>10}{'WER':>10}")
+
+    for backend_name in args.backends.split(','):
+        settings = {
+            'backend': backend_name,
+            'model_name': args.model,
+            'threads': args.threads,
+            'language': args.language or None,
+            'beam_size': args.beam_size,
+            'temperatures': tuple(float(t) for t in args.temperatures.split(',')),
+            'compute_type': args.compute_type,
+        }
+        try:
+            r = bench_backend(settings, corpus)
+        except ImportError as e:
+            print(f"{backend_name:<16}{'skipped: ' + str(e):>30}")
+            continue
+        print(f"{backend_name:<16}{r['load_seconds']:>10.2f}{r['rtf']:>10.3f}{r['wer']:>10.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
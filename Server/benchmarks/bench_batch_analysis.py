@@ -0,0 +1,101 @@
+"""
+Per-answer cost of grading a practice round one answer at a time vs. in one
+batched Gemini call (/api/hr/analyze/batch).
+
+Answers come from a JSON file of {"question": ..., "transcript": ...} objects,
+or, without one, from QuestionBank (each model answer stands in for the
+candidate's transcript). Only the LLM stage is measured; transcription is the
+same either way.
+
+    cd Server
+    python -m benchmarks.bench_batch_analysis --answers round.json --sizes 1,3,5
+    python -m benchmarks.bench_batch_analysis --dry-run   # prompt tokens only, no API calls
+
+Prompt tokens are tiktoken estimates; when Gemini reports usage, the billed
+input/output token counts are shown as well.
+"""
+import argparse
+import json
+import sys
+import time
+
+from app import create_app
+from app.models.hr_models import QuestionBank
+from app.routes import hr_routes
+from app.services import llm
+
+
+def load_answers(path):
+    if path:
+        with open(path, encoding='utf-8') as f:
+            return [(a['question'], a['transcript']) for a in json.load(f)]
+    return [(q.question_text, q.model_answer) for q in QuestionBank.query.all()]
+
+
+def as_batch_item(question, transcript):
+    return {'question': question, 'text': transcript, 'audio_duration': None,
+            'pause_stats': None, 'speech_metrics': None, 'relevance': None}
+
+
+def call(model, prompt, generation_config):
+    started = time.perf_counter()
+    response = model.generate_content(prompt, generation_config=generation_config)
+    elapsed = time.perf_counter() - started
+    usage = getattr(response, 'usage_metadata', None)
+    billed = (usage.prompt_token_count, usage.candidates_token_count) if usage else (0, 0)
+    return elapsed, billed
+
+
+def bench_size(model, answers):
+    single = {'seconds': 0.0, 'estimated': 0, 'billed_in': 0, 'billed_out': 0}
+    for question, transcript in answers:
+        prompt, config, report = hr_routes.build_gemini_request(transcript, question)
+        single['estimated'] += report['total']
+        if model is not None:
+            elapsed, (billed_in, billed_out) = call(model, prompt, config)
+            single['seconds'] += elapsed
+            single['billed_in'] += billed_in
+            single['billed_out'] += billed_out
+
+    batch = {'seconds': 0.0, 'estimated': 0, 'billed_in': 0, 'billed_out': 0}
+    prompt, config, report = hr_routes.build_batch_gemini_request([as_batch_item(q, t) for q, t in answers])
+    batch['estimated'] = report['total']
+    if model is not None:
+        batch['seconds'], (batch['billed_in'], batch['billed_out']) = call(model, prompt, config)
+    return single, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--answers', help='JSON list of {"question", "transcript"} objects')
+    parser.add_argument('--sizes', default='1,3,5', help='comma-separated round sizes')
+    parser.add_argument('--dry-run', action='store_true', help='count prompt tokens without calling Gemini')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        answers = load_answers(args.answers)
+        if not answers:
+            print("No answers: pass --answers or seed QuestionBank.")
+            return 1
+
+        model = None if args.dry_run else llm.get_model(hr_routes.GEMINI_MODEL_NAME)
+        if model is None and not args.dry_run:
+            print("Gemini is not configured (GEMINI_API_KEY); showing prompt tokens only.\n")
+
+        print(f"{'answers':>8}{'mode':>8}{'est. in/ans':>13}{'billed in/ans':>15}{'out/ans':>9}{'s/ans':>8}")
+        for size in (int(s) for s in args.sizes.split(',')):
+            if size > len(answers):
+                print(f"{size:>8}  skipped: only {len(answers)} answers available")
+                continue
+            single, batch = bench_size(model, answers[:size])
+            for mode, r in (('single', single), ('batch', batch)):
+                print(f"{size:>8}{mode:>8}{r['estimated'] / size:>13.0f}{r['billed_in'] / size:>15.0f}"
+                      f"{r['billed_out'] / size:>9.0f}{r['seconds'] / size:>8.2f}")
+            saved = 1 - batch['estimated'] / single['estimated'] if single['estimated'] else 0.0
+            print(f"{'':>8}{'saved':>8}{saved * 100:>12.0f}%\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Throughput vs. latency of the dynamic transcription scheduler.
+
+Simulates N concurrent clients, each submitting the corpus clips back to
+back, for every (max_batch_size, max_wait_ms) combination, and compares
+against unbatched transcription (batch size 1). Results are printed as a
+table, written to CSV and, if matplotlib is installed, charted to PNG.
+
+    cd Server
+    python -m benchmarks.bench_batching corpus/ --clients 8 \\
+        --batch-sizes 1,4,8 --wait-ms 0,25,50,100 --out batching.csv
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import threading
+import time
+
+from app.services import asr
+from app.services.audio import load_audio
+from app.services.transcription_scheduler import TranscriptionScheduler
+from benchmarks.bench_asr import AUDIO_EXTENSIONS
+
+
+def load_clips(corpus_dir):
+    return [
+        load_audio(os.path.join(corpus_dir, f))
+        for f in sorted(os.listdir(corpus_dir))
+        if os.path.splitext(f)[1].lower() in AUDIO_EXTENSIONS
+    ]
+
+
+def run_load(scheduler, clips, clients, rounds):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(rounds):
+            for clip in clips:
+                started = time.perf_counter()
+                scheduler.transcribe(clip)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'mean_batch': scheduler.items / scheduler.batches if scheduler.batches else 0,
+    }
+
+
+def chart(rows, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed; skipping chart.")
+        return
+    fig, ax = plt.subplots()
+    for batch_size in sorted({r['max_batch_size'] for r in rows}):
+        series = [r for r in rows if r['max_batch_size'] == batch_size]
+        ax.plot([r['p95_ms'] for r in series], [r['throughput'] for r in series], marker='o',
+                label=f"max batch {batch_size}")
+        for r in series:
+            ax.annotate(f"{r['max_wait_ms']}ms", (r['p95_ms'], r['throughput']), fontsize=7)
+    ax.set_xlabel('p95 latency (ms)')
+    ax.set_ylabel('throughput (clips/s)')
+    ax.set_title('Transcription scheduler: throughput vs latency')
+    ax.legend()
+    fig.savefig(path, dpi=120)
+    print(f"chart written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus_dir')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--batch-sizes', default='1,4,8')
+    parser.add_argument('--wait-ms', default='0,25,50,100')
+    parser.add_argument('--backend', default='whisper')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--out', default='batching.csv')
+    args = parser.parse_args()
+
+    clips = load_clips(args.corpus_dir)
+    if not clips:
+        print(f"No audio files found in {args.corpus_dir}")
+        return 1
+
+    settings = dict(asr.DEFAULT_SETTINGS, backend=args.backend, model_name=args.model,
+                    language='en', temperatures=(0.0,))
+    backend = asr.get_backend(settings)
+    backend.transcribe(clips[0])  # warm-up
+
+    rows = []
+    print(f"{'batch':>6}{'wait ms':>9}{'clips/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'avg batch':>11}")
+    for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+        for wait_ms in (int(w) for w in args.wait_ms.split(',')):
+            if batch_size == 1 and wait_ms:
+                continue  # waiting is pointless without batching
+            scheduler = TranscriptionScheduler(lambda: backend, max_batch_size=batch_size, max_wait_ms=wait_ms)
+            r = run_load(scheduler, clips, args.clients, args.rounds)
+            r.update(max_batch_size=batch_size, max_wait_ms=wait_ms)
+            rows.append(r)
+            print(f"{batch_size:>6}{wait_ms:>9}{r['throughput']:>10.2f}{r['p50_ms']:>10.0f}"
+                  f"{r['p95_ms']:>10.0f}{r['mean_batch']:>11.1f}")
+
+    with open(args.out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nresults written to {args.out}")
+    chart(rows, os.path.splitext(args.out)[0] + '.png')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Measure cold create_app() time against STARTUP_TIME_BUDGET_SECONDS.
+
+Each run happens in a fresh interpreter so that import costs are included.
+Warm-up is disabled so only the synchronous boot path is measured.
+
+    cd Server
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+total = time.perf_counter() - started
+print(json.dumps({
+    'total_seconds': total,
+    'create_app_seconds': app.config['STARTUP_SECONDS'],
+    'budget_seconds': app.config['STARTUP_TIME_BUDGET_SECONDS'],
+}))
+"""
+
+
+def run_once():
+    env = dict(os.environ)
+    env['WARMUP_ON_STARTUP'] = 'false'
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    output = subprocess.check_output([sys.executable, '-c', CHILD_SCRIPT], cwd=SERVER_DIR, env=env)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    totals = [r['total_seconds'] for r in results]
+    budget = results[0]['budget_seconds']
+
+    print(f"runs:            {args.runs}")
+    print(f"import+create:   median {statistics.median(totals):.3f}s, max {max(totals):.3f}s")
+    print(f"create_app only: median {statistics.median(r['create_app_seconds'] for r in results):.3f}s")
+    print(f"budget:          {budget:.3f}s")
+
+    if max(totals) > budget:
+        print("FAIL: startup exceeded budget")
+        return 1
+    print("OK: startup within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
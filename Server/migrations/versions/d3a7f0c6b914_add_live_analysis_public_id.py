@@ -0,0 +1,41 @@
+"""Add live analysis public id
+
+Revision ID: d3a7f0c6b914
+Revises: b81f6d3e9a25
+Create Date: 2026-10-19 16:05:41.218903
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7f0c6b914'
+down_revision = 'b81f6d3e9a25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('live_analyses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('public_id', sa.String(length=32), nullable=True))
+
+    # Existing reports get a random id; their sequential ids are no longer exposed.
+    connection = op.get_bind()
+    live_analyses = sa.table('live_analyses', sa.column('id', sa.Integer), sa.column('public_id', sa.String))
+    for (analysis_id,) in connection.execute(sa.select(live_analyses.c.id)).fetchall():
+        connection.execute(
+            live_analyses.update().where(live_analyses.c.id == analysis_id).values(public_id=uuid.uuid4().hex)
+        )
+
+    with op.batch_alter_table('live_analyses', schema=None) as batch_op:
+        batch_op.alter_column('public_id', existing_type=sa.String(length=32), nullable=False)
+        batch_op.create_index(batch_op.f('ix_live_analyses_public_id'), ['public_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('live_analyses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_live_analyses_public_id'))
+        batch_op.drop_column('public_id')
@@ -37,6 +37,13 @@ document.addEventListener('DOMContentLoaded', () => {
     let isConversationActive = false; // Flag: true if an interview conversation is ongoing
     let restartRecognitionTimeout = null; // Stores a timeout ID for delayed recognition restarts
 
+    // --- Speculative Replies (opt-in) ---
+    // When true, interim speech results are streamed to the server as 'user_partial_input' so it can
+    // start preparing Eva's reply before the user finishes speaking (server must also enable it).
+    const SPECULATIVE_MODE = false;
+    const PARTIAL_INPUT_INTERVAL_MS = 300; // Minimum gap between two partial updates
+    let lastPartialSentAt = 0; // performance.now() of the last partial update
+
     // --- Speech Synthesis (Text-to-Speech) Variables ---
     const synth = window.speechSynthesis; // Browser's SpeechSynthesis API
     let aiSpeaking = false; // Flag: true if the AI is currently speaking
@@ -405,6 +412,12 @@ document.addEventListener('DOMContentLoaded', () => {
         resetStatus(); // Reset main status after analysis is displayed
     });
 
+    // Event fired when the server is overloaded and sheds this request
+    socket.on('busy', (data) => {
+        console.warn('Server busy:', data.message);
+        showStatus(`${data.message} (try again in about ${data.retryAfter}s)`, 'error');
+    });
+
     // Generic Socket.IO error handler
     socket.on('error', (data) => {
         console.error('Socket.IO Error:', data.message);
@@ -426,7 +439,7 @@ document.addEventListener('DOMContentLoaded', () => {
         
         const newRecognition = new SpeechRecognition();
         newRecognition.continuous = true; // Keep listening after a pause
-        newRecognition.interimResults = false; // Set to false for production to avoid sending partial results
+        newRecognition.interimResults = SPECULATIVE_MODE; // Interim results are only needed for speculative replies
         newRecognition.lang = 'en-US'; // Set language
         newRecognition.maxAlternatives = 1; // Only need the top alternative
 
@@ -441,12 +454,25 @@ document.addEventListener('DOMContentLoaded', () => {
         newRecognition.onresult = (event) => {
             console.log('SpeechRecognition onresult event:', event);
             let finalTranscript = '';
+            let interimTranscript = '';
             // Iterate through results to get the final transcript
             for (let i = event.resultIndex; i < event.results.length; ++i) {
                 if (event.results[i].isFinal) {
                     finalTranscript += event.results[i][0].transcript;
+                } else {
+                    interimTranscript += event.results[i][0].transcript;
                 }
             }
+
+            // Stream interim results (throttled) so the server can speculate on the reply
+            if (SPECULATIVE_MODE && !finalTranscript.trim() && interimTranscript.trim()) {
+                const now = performance.now();
+                if (now - lastPartialSentAt >= PARTIAL_INPUT_INTERVAL_MS) {
+                    lastPartialSentAt = now;
+                    socket.emit('user_partial_input', { text: interimTranscript.trim() });
+                }
+                return;
+            }
             
             // Process only non-empty final transcripts
             if (finalTranscript.trim().length > 0) {
@@ -595,7 +621,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 endConversationButton.disabled = false;
                 
                 console.log('Emitting start_conversation to server.');
-                socket.emit('start_conversation'); // Inform server to start conversation and get first question
+                socket.emit('start_conversation', { speculative: SPECULATIVE_MODE }); // Inform server to start conversation and get first question
                 showStatus('Waiting for AI to start...', 'thinking'); // Show thinking state until AI responds
             })
             .catch(error => {
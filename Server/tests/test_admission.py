@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from app.services import admission
+
+
+def rejection(controller, user_key, timeout=None):
+    with pytest.raises(admission.Rejected) as info:
+        controller.acquire(user_key, timeout)
+    return info.value
+
+
+def test_second_request_of_a_user_gets_429():
+    gate = admission.AdmissionController('test', global_limit=4, per_user_limit=1)
+    admitted_at = gate.acquire('alice')
+    assert rejection(gate, 'alice').status == 429
+    gate.acquire('bob')
+    gate.release('alice', admitted_at)
+    gate.acquire('alice')
+    assert gate.status()['active'] == 2
+
+
+def test_full_server_without_queue_room_gets_503_with_retry_after():
+    gate = admission.AdmissionController('test', global_limit=1, max_queue=0)
+    gate.acquire('alice')
+    rejected = rejection(gate, 'bob')
+    assert rejected.status == 503
+    assert rejected.retry_after >= 1
+    assert rejected.to_dict() == {'error': rejected.reason, 'retryAfter': rejected.retry_after}
+
+
+def test_queued_request_is_admitted_when_a_slot_frees_up():
+    gate = admission.AdmissionController('test', global_limit=1, max_queue=1, queue_timeout_seconds=5)
+    admitted_at = gate.acquire('alice')
+    threading.Timer(0.1, gate.release, args=('alice', admitted_at)).start()
+    started = time.monotonic()
+    gate.acquire('bob')
+    assert 0.05 < time.monotonic() - started < 2
+    assert gate.status() == {'active': 1, 'waiting': 0, 'limit': 1, 'queue': 1}
+
+
+def test_queue_timeout_gets_503_and_frees_the_user():
+    gate = admission.AdmissionController('test', global_limit=1, max_queue=1)
+    gate.acquire('alice')
+    assert rejection(gate, 'bob', timeout=0.05).status == 503
+    assert rejection(gate, 'bob', timeout=0).status == 503
+    assert gate.status()['waiting'] == 0
+    assert 'bob' not in gate._per_user
+
+
+def test_none_key_counts_only_towards_the_global_limit():
+    gate = admission.AdmissionController('test', global_limit=2, per_user_limit=1)
+    background_at = gate.acquire(None, timeout=0)
+    gate.acquire('alice')
+    assert rejection(gate, None, timeout=0).status == 503
+    gate.release(None, background_at)
+    assert gate._per_user == {'alice': 1}
+
+
+def test_disabled_admission_admits_everything():
+    admission.configure({'ADMISSION_ENABLED': False})
+    try:
+        gate = admission.get('hr_analyze')
+        for _ in range(10):
+            gate.acquire('alice')
+    finally:
+        admission.configure({})
+
+
+def test_client_key_trusts_the_user_header_only_when_configured():
+    app = Flask(__name__)
+    headers = {'X-User-Id': 'u42'}
+    try:
+        with app.test_request_context(headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.7'}):
+            admission.configure({})
+            assert admission.client_key() == '10.0.0.7'
+            admission.configure({'ADMISSION_TRUST_USER_HEADER': True})
+            assert admission.client_key() == 'user:u42'
+    finally:
+        admission.configure({})
@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pytest
+
+from app.services.deadline import Deadline, DeadlineExceeded
+
+
+def test_run_returns_within_budget():
+    assert Deadline(1).run('stage', lambda x: x * 2, 21) == 42
+    assert Deadline(None).run('stage', lambda: 'no deadline') == 'no deadline'
+
+
+def test_expired_run_raises_and_release_waits_for_the_abandoned_thread():
+    finished = threading.Event()
+
+    def slow():
+        time.sleep(0.3)
+        finished.set()
+
+    deadline = Deadline(0.05)
+    with pytest.raises(DeadlineExceeded) as e:
+        deadline.run('transcribe', slow)
+    assert e.value.stage == 'transcribe'
+
+    released = threading.Event()
+    deadline.when_idle(released.set)
+    assert not released.is_set()
+    assert released.wait(2)
+    assert finished.is_set()
+
+
+def test_when_idle_calls_back_at_once_without_abandoned_work():
+    calls = []
+    Deadline(1).when_idle(lambda: calls.append(1))
+    assert calls == [1]
+
+
+def test_check_raises_after_expiry():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        deadline.check('llm')
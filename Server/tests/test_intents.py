@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from app.services import intents
+
+
+@pytest.fixture
+def matcher():
+    with open(intents.DEFAULT_RULES_PATH, encoding='utf-8') as f:
+        return intents.IntentMatcher(json.load(f))
+
+
+@pytest.fixture(autouse=True)
+def no_question_bank(monkeypatch):
+    intents.configure({})
+    monkeypatch.setattr(intents, 'bank_questions', lambda: [])
+    yield
+    intents.configure({})
+
+
+@pytest.mark.parametrize('message, intent', [
+    ('Okay.', 'acknowledgement'),
+    ('Um, sounds good', 'acknowledgement'),
+    ('Thank you so much, Eva!', 'thanks'),
+    ('Could you please repeat the question?', 'repeat'),
+    ("Sorry, I didn't catch that", 'repeat'),
+    ("I don't understand the question", 'clarify'),
+    ('Are you an AI?', 'meta'),
+    ("Let's move on", 'skip'),
+    ('Next question please', 'skip'),
+])
+def test_trivial_messages_match_their_intent(matcher, message, intent):
+    assert matcher.match(message) == intent
+
+
+@pytest.mark.parametrize('message', [
+    '',
+    'Okay so in my last role I led the migration to the new billing system',
+    'Yes, I worked on that for two years',
+    'I think the question is about teamwork',
+    'What I learned from that project was patience',
+])
+def test_real_answers_are_left_to_the_llm(matcher, message):
+    assert matcher.match(message) is None
+
+
+def test_every_intent_has_patterns_and_responses(matcher):
+    for name, intent in matcher.intents.items():
+        assert intent['patterns'] and intent['responses'], name
+        assert intent.get('action', 'next_question') in ('next_question', 'repeat_question', 'redirect')
+    assert matcher.fallback_questions
+
+
+def test_repeat_answers_with_the_last_question():
+    history = [('AI', 'Thanks for sharing. Why did you leave your last job?')]
+    assert intents.respond('can you repeat that', history) == 'Of course. Why did you leave your last job?'
+
+
+def test_skip_asks_a_question_not_asked_yet(matcher):
+    asked = matcher.fallback_questions[:-1]
+    history = [('AI', question) for question in asked]
+    reply = intents.respond('skip', history)
+    assert reply.endswith(matcher.fallback_questions[-1])
+
+
+def test_disabled_fast_path_answers_nothing():
+    intents.configure({'INTENT_FAST_PATH_ENABLED': False})
+    assert intents.respond('okay', []) is None
@@ -0,0 +1,61 @@
+import numpy as np
+
+from app.services import long_audio
+from app.services.audio import SAMPLE_RATE
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 150 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.random.default_rng(0).normal(0, 0.001, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def test_merge_text_drops_words_heard_in_both_overlapping_chunks():
+    merged = long_audio._merge_text('I worked on the billing', 'on the billing system for years.')
+    assert merged == 'I worked on the billing system for years.'
+
+
+def test_merge_text_keeps_repeats_at_a_pause_cut():
+    assert long_audio._merge_text('It was very', 'very hard.', overlapped=False) == 'It was very very hard.'
+    assert long_audio._merge_text('', 'First chunk.') == 'First chunk.'
+
+
+def test_split_at_silences_cuts_in_pauses():
+    samples = np.concatenate([tone(25), silence(2), tone(25), silence(2), tone(10)])
+    ranges = long_audio.split_at_silences(samples, chunk_seconds=30)
+    assert len(ranges) == 3
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(samples)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        # Chunks meet inside a pause, without overlap.
+        assert end == start
+        assert any(pause_start * SAMPLE_RATE <= start <= pause_end * SAMPLE_RATE
+                   for pause_start, pause_end in ((25, 27), (52, 54)))
+
+
+def test_split_at_silences_overlaps_continuous_speech():
+    samples = tone(70)
+    ranges = long_audio.split_at_silences(samples, chunk_seconds=30, overlap_seconds=1.0)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(samples)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end - start == 2 * SAMPLE_RATE
+
+
+def test_stitch_keeps_the_earlier_chunk_up_to_the_overlap_midpoint():
+    # Chunk 1 covers 0-31 s, chunk 2 starts at 29 s: midpoint 30 s.
+    ranges = [(0, 31 * SAMPLE_RATE), (29 * SAMPLE_RATE, 50 * SAMPLE_RATE)]
+    results = [
+        {'text': ' One two. Three.', 'language': 'en',
+         'segments': [{'start': 0.0, 'end': 20.0, 'text': ' One two.'}, {'start': 28.0, 'end': 30.5, 'text': ' Three.'}],
+         'words': [{'word': 'One', 'start': 1.0, 'end': 1.5}, {'word': 'Three', 'start': 29.6, 'end': 30.4}]},
+        {'text': ' Three. Four five.', 'language': 'en',
+         'segments': [{'start': 0.0, 'end': 1.0, 'text': ' Three.'}, {'start': 1.5, 'end': 10.0, 'text': ' Four five.'}],
+         'words': [{'word': 'Three', 'start': 0.6, 'end': 1.0}, {'word': 'Four', 'start': 1.5, 'end': 2.0}]},
+    ]
+    stitched = long_audio.stitch(results, ranges)
+    assert stitched['text'] == 'One two. Three. Four five.'
+    assert [s['start'] for s in stitched['segments']] == [0.0, 28.0, 30.5]
+    assert [(w['word'], w['start']) for w in stitched['words']] == [('One', 1.0), ('Three', 29.6), ('Four', 30.5)]
+    assert stitched['language'] == 'en'
@@ -0,0 +1,43 @@
+import threading
+import time
+
+from app.services import profiler
+from app.services.deadline import Deadline
+
+
+def busy(seconds):
+    ends = time.monotonic() + seconds
+    while time.monotonic() < ends:
+        pass
+    return 'done'
+
+
+def test_deadline_helper_thread_is_sampled_into_the_request_profile():
+    profile = profiler.start('test', 'header')
+    try:
+        assert Deadline(5).run('transcribe', busy, 0.3) == 'done'
+    finally:
+        profiler.stop(profile)
+    helper = [stack for stack in profile.stacks if stack.startswith('thread:deadline-transcribe;')]
+    assert helper and any('busy' in stack for stack in helper)
+    assert profiler.status()['active'] == 0
+
+
+def test_propagate_is_a_no_op_without_a_profile():
+    assert profiler.current() is None
+    assert profiler.propagate(busy) is busy
+
+
+def test_stop_detaches_helpers_still_running():
+    profile = profiler.start('test', 'header')
+    release = threading.Event()
+    thread = threading.Thread(target=profiler.propagate(release.wait), name='straggler')
+    thread.start()
+    time.sleep(0.05)
+    profiler.stop(profile)
+    samples = profile.samples
+    time.sleep(0.05)
+    release.set()
+    thread.join()
+    assert profile.samples == samples
+    assert profiler.status()['active'] == 0
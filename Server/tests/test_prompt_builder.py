@@ -0,0 +1,58 @@
+from app.services import prompt_builder as pb
+
+
+def words(n, word='interview'):
+    return ' '.join([word] * n)
+
+
+def test_truncate_to_tokens_keeps_head_or_tail_within_budget():
+    text = ' '.join(f"word{i}" for i in range(400))
+    head = pb.truncate_to_tokens(text, 50)
+    tail = pb.truncate_to_tokens(text, 50, keep='tail')
+    assert pb.count_tokens(head) <= 50 and head.startswith('word0 ') and head.endswith(pb.TRUNCATION_MARKER)
+    assert pb.count_tokens(tail) <= 50 and tail.endswith('word399') and tail.startswith(pb.TRUNCATION_MARKER.strip())
+    assert pb.truncate_to_tokens('short text', 50) == 'short text'
+    assert pb.truncate_to_tokens(text, 0) == ''
+
+
+def test_sections_that_fit_are_left_alone():
+    sections = [pb.Section('question', text='Why this role?'), pb.Section('resume', text=words(20), priority=pb.PRIORITY_RESUME)]
+    report = pb.fit_sections(sections, budget=1000).token_report()
+    assert report['trimmed'] == []
+    assert report['total'] == pb.count_tokens('Why this role?') + pb.count_tokens(words(20))
+
+
+def test_lowest_priority_section_is_trimmed_first():
+    sections = [
+        pb.Section('question', text=words(50, 'question')),
+        pb.Section('history', items=[words(30, f"turn{i}") for i in range(5)], priority=pb.PRIORITY_HISTORY),
+        pb.Section('resume', text=words(400, 'resume'), priority=pb.PRIORITY_RESUME, min_tokens=20),
+    ]
+    before = {s.name: s.tokens() for s in sections}
+    built = pb.fit_sections(sections, budget=before['question'] + before['history'] + 100, overhead_tokens=10)
+    report = built.token_report(overhead_tokens=10)
+    assert report['total'] <= report['budget']
+    assert report['trimmed'] == ['resume']
+    assert len(built.items('history')) == 5
+    assert built.text('question') == words(50, 'question')
+
+
+def test_history_loses_its_oldest_items_and_required_sections_are_kept():
+    history = [words(30, f"turn{i}") for i in range(5)]
+    sections = [
+        pb.Section('question', text=words(50, 'question')),
+        pb.Section('history', items=history, priority=pb.PRIORITY_HISTORY),
+        pb.Section('resume', text=words(400, 'resume'), priority=pb.PRIORITY_RESUME, min_tokens=20),
+    ]
+    budget = pb.count_tokens(words(50, 'question')) + 2 * pb.count_tokens(history[0]) + 20
+    built = pb.fit_sections(sections, budget)
+    assert built.items('history') == history[-2:]
+    assert pb.count_tokens(built.text('resume')) <= 20
+    assert built.token_report()['trimmed'] == ['history', 'resume']
+
+
+def test_required_sections_are_never_trimmed_even_over_budget():
+    sections = [pb.Section('question', text=words(200))]
+    built = pb.fit_sections(sections, budget=10)
+    assert built.text('question') == words(200)
+    assert built.token_report()['total'] > 10
@@ -0,0 +1,48 @@
+from app.services import relevance
+
+ANSWERS = {
+    'Tell me about a conflict with a colleague.':
+        'I disagreed with a colleague about the database migration plan. We scheduled a meeting, '
+        'compared the risks of both approaches, and agreed on a phased rollout with monitoring.',
+    'Why do you want this job?':
+        'The company builds accessible healthcare software. My experience with patient scheduling '
+        'systems matches the role, and I want to grow into technical leadership.',
+    'Describe your hobbies.': 'Well, um, it is what it is.',
+}
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert relevance.tokenize("I was scheduling the meetings, and we agreed.") == ['schedul', 'meeting', 'agre']
+
+
+def test_on_topic_answer_scores_higher_than_off_topic():
+    index = relevance.RelevanceIndex(ANSWERS)
+    question = 'Tell me about a conflict with a colleague.'
+    on_topic = index.score(question, 'My colleague and I disagreed on the migration, so we met, compared risks '
+                                     'and chose a phased rollout.')
+    off_topic = index.score(question, 'I enjoy healthcare software and want to grow as a leader.')
+    assert on_topic['score'] > off_topic['score']
+    assert on_topic['similarity'] > off_topic['similarity']
+    assert 'migration' in on_topic['matchedKeywords']
+    assert 'migration' in off_topic['missingKeywords']
+    assert len(off_topic['missingKeyPoints']) <= relevance.MAX_MISSING_POINTS
+
+
+def test_empty_transcript_scores_zero():
+    result = relevance.RelevanceIndex(ANSWERS).score('Why do you want this job?', '')
+    assert result['similarity'] == 0.0
+    assert result['keywordCoverage'] == 0.0
+    assert result['score'] == 0.0
+
+
+def test_unknown_question_or_answer_without_keywords_scores_none():
+    index = relevance.RelevanceIndex(ANSWERS)
+    assert index.score('What is your salary expectation?', 'A fair one.') is None
+    assert index.score('Describe your hobbies.', 'I like hiking.') is None
+
+
+def test_describe_mentions_missing_terms():
+    index = relevance.RelevanceIndex(ANSWERS)
+    text = relevance.describe(index.score('Why do you want this job?', 'I like the company.'))
+    assert text.startswith('The answer covers ')
+    assert 'healthcare' in text
@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.services import speech_metrics
+
+
+def test_filler_words_and_phrases_are_counted():
+    stats = speech_metrics.filler_stats("Um, I was, you know, the uh lead. I mean it worked.", 30)
+    assert stats['topFillers'] == {'um': 1, 'you know': 1, 'uh': 1, 'i mean': 1}
+    assert stats['fillerCount'] == 4
+    assert stats['fillersPerMinute'] == 8.0
+    assert stats['fillersPer100Words'] == round(100 * 4 / 12, 2)
+
+
+def test_contextual_fillers_only_count_when_set_off():
+    stats = speech_metrics.filler_stats(
+        "Like, it was, like, hard. Basically we shipped it. I would like to build the kind of projects I actually enjoy.", 60)
+    assert stats['topFillers'] == {'like': 2, 'basically': 1}
+
+
+def test_filler_stats_of_empty_transcript():
+    stats = speech_metrics.filler_stats('', 0)
+    assert stats['fillerCount'] == 0
+    assert stats['fillersPer100Words'] == 0.0
+    assert stats['fillersPerMinute'] == 0.0
+
+
+def test_pause_distribution_bins_gaps_between_words():
+    starts = np.array([0.0, 1.1, 2.0, 3.5, 6.0])
+    ends = np.array([1.0, 1.7, 2.5, 3.9, 6.5])
+    pauses = speech_metrics.pause_distribution(starts, ends)
+    # Gaps: 0.1 (not a pause), 0.3, 1.0, 2.1.
+    assert pauses['pauseCount'] == 3
+    assert pauses['totalPauseSeconds'] == 3.4
+    assert pauses['maxPauseSeconds'] == 2.1
+    assert pauses['histogram'] == {'0.25-0.5s': 1, '0.5-1s': 0, '1-2s': 1, '2s+': 1}
+    assert pauses['longPauseCount'] == int(np.sum(np.array([0.3, 1.0, 2.1]) >= speech_metrics.LONG_PAUSE_SECONDS))
+
+
+def test_pause_distribution_of_a_single_word():
+    pauses = speech_metrics.pause_distribution(np.array([0.0]), np.array([0.5]))
+    assert pauses['pauseCount'] == 0
+    assert pauses['meanPauseSeconds'] == 0.0
+
+
+def test_compute_speech_metrics_falls_back_to_the_transcript_without_words():
+    samples = np.zeros(16000 * 6, dtype=np.float32)
+    result = speech_metrics.compute_speech_metrics(samples, {'text': 'one two three um four five six', 'words': []})
+    assert result['source'] == 'transcript'
+    assert result['wordCount'] == 7
+    assert result['speakingRateWpm'] == 70.0
+    assert result['pauses'] is None
+    assert result['fillerCount'] == 1
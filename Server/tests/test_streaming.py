@@ -0,0 +1,48 @@
+import json
+
+from app.services import streaming
+
+DOCUMENT = {
+    'overallScore': 7,
+    'tutoringPlan': {
+        'fluency': {'score': 6, 'tips': ['Slow down', 'Use "pauses" {deliberately}']},
+        'clarity': {'score': 8, 'tips': []},
+    },
+    'notes': {'ignored': {'a': 1}},
+}
+
+
+def feed_in_pieces(parser, text, size):
+    sections = []
+    for i in range(0, len(text), size):
+        sections.extend(parser.feed(text[i:i + size]))
+    return sections
+
+
+def test_sections_are_reported_whatever_the_chunking():
+    text = json.dumps(DOCUMENT)
+    expected = [
+        ('tutoringPlan', 'fluency', DOCUMENT['tutoringPlan']['fluency']),
+        ('tutoringPlan', 'clarity', DOCUMENT['tutoringPlan']['clarity']),
+    ]
+    for size in (1, 3, 17, len(text)):
+        assert feed_in_pieces(streaming.SectionStreamParser(['tutoringPlan']), text, size) == expected
+
+
+def test_section_is_reported_as_soon_as_it_closes():
+    text = json.dumps(DOCUMENT)
+    end_of_fluency = text.index('"clarity"')
+    parser = streaming.SectionStreamParser(['tutoringPlan'])
+    assert [key for _, key, _ in parser.feed(text[:end_of_fluency])] == ['fluency']
+    assert [key for _, key, _ in parser.feed(text[end_of_fluency:])] == ['clarity']
+
+
+def test_fenced_json_with_several_parent_sections():
+    text = '```json\n' + json.dumps(DOCUMENT, indent=2) + '\n```'
+    sections = feed_in_pieces(streaming.SectionStreamParser(['tutoringPlan', 'notes']), text, 5)
+    assert [(parent, key) for parent, key, _ in sections] == [
+        ('tutoringPlan', 'fluency'), ('tutoringPlan', 'clarity'), ('notes', 'ignored')]
+
+
+def test_sse_event_format():
+    assert streaming.sse_event('section', {'a': 1}) == 'event: section\ndata: {"a": 1}\n\n'
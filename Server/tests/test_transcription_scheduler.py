@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+
+from app.services.asr import ASRBackend
+from app.services.transcription_scheduler import TranscriptionScheduler
+
+
+class FakeBackend(ASRBackend):
+    """Batches arrays of up to 10 samples; clips marked with a negative first sample fail the quality check."""
+
+    name = 'fake'
+
+    def __init__(self):
+        super().__init__('fake', word_timestamps=False)
+        self.batches = []
+        self.single = []
+        self.threads = set()
+
+    def can_batch(self, audio):
+        return not isinstance(audio, str) and len(audio) <= 10
+
+    def decode_batch(self, audios):
+        self.batches.append(len(audios))
+        return [None if audio[0] < 0 else {'text': f'batched {len(audio)}'} for audio in audios]
+
+    def transcribe(self, audio):
+        self.single.append(len(audio))
+        self.threads.add(threading.current_thread().name)
+        return {'text': f'single {len(audio)}'}
+
+
+def run_concurrently(scheduler, clips):
+    results = [None] * len(clips)
+
+    def client(i):
+        results[i] = scheduler.transcribe(clips[i], timeout=5)
+
+    threads = [threading.Thread(target=client, args=(i,), name=f'client-{i}') for i in range(len(clips))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batchable_clips_share_one_batch():
+    backend = FakeBackend()
+    scheduler = TranscriptionScheduler(lambda: backend, max_batch_size=8, max_wait_ms=200)
+    results = run_concurrently(scheduler, [np.ones(5, dtype=np.float32)] * 4)
+    assert [r['text'] for r in results] == ['batched 5'] * 4
+    assert sum(backend.batches) == 4 and backend.single == []
+
+
+def test_long_clips_and_failed_results_run_in_the_caller_thread():
+    backend = FakeBackend()
+    scheduler = TranscriptionScheduler(lambda: backend, max_batch_size=8, max_wait_ms=200)
+    failing = -np.ones(5, dtype=np.float32)
+    clips = [np.ones(5, dtype=np.float32), np.ones(5, dtype=np.float32), failing, np.ones(50, dtype=np.float32)]
+    results = run_concurrently(scheduler, clips)
+    assert [r['text'] for r in results] == ['batched 5', 'batched 5', 'single 5', 'single 50']
+    # Never on the scheduler's worker thread.
+    assert all(name.startswith('client-') for name in backend.threads)
+
+
+def test_backend_without_batching_transcribes_directly():
+    backend = FakeBackend()
+    backend.can_batch = lambda audio: False
+    scheduler = TranscriptionScheduler(lambda: backend)
+    assert scheduler.transcribe(np.ones(5, dtype=np.float32))['text'] == 'single 5'
+    assert scheduler._thread is None
+
+
+def test_transcribe_batch_redoes_unbatchable_and_failed_inputs():
+    backend = FakeBackend()
+    clips = [np.ones(3, dtype=np.float32), -np.ones(3, dtype=np.float32), np.ones(20, dtype=np.float32)]
+    assert [r['text'] for r in backend.transcribe_batch(clips)] == ['batched 3', 'single 3', 'single 20']
@@ -0,0 +1,56 @@
+import numpy as np
+
+from app.services import vad
+from app.services.audio import SAMPLE_RATE
+
+
+def tone(seconds, amplitude=0.3, modulation_hz=None):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = amplitude * np.sin(2 * np.pi * 150 * t)
+    if modulation_hz:
+        # Syllable-like loudness changes of about 20 dB.
+        signal *= 0.55 + 0.45 * np.sin(2 * np.pi * modulation_hz * t)
+    return signal.astype(np.float32)
+
+
+def noise(seconds, level=0.001, seed=0):
+    return np.random.default_rng(seed).normal(0, level, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def test_all_speech_is_kept():
+    for samples in (tone(10), tone(10, modulation_hz=4)):
+        result = vad.analyze_speech(samples)
+        assert not result['is_silent']
+        assert result['speech_seconds'] > 9.9
+        assert len(result['samples']) == len(samples)
+        assert result['pause_stats']['pauseCount'] == 0
+
+
+def test_mostly_speech_keeps_quiet_syllables():
+    samples = np.concatenate([noise(0.5), tone(9, modulation_hz=4), noise(0.5)])
+    result = vad.analyze_speech(samples)
+    assert not result['is_silent']
+    assert result['speech_seconds'] > 8.9
+    assert result['pause_stats']['leadingSilenceSeconds'] < 0.6
+
+
+def test_silence_around_and_between_speech_is_trimmed():
+    samples = np.concatenate([noise(2), tone(3, modulation_hz=4), noise(3), tone(3), noise(2)])
+    result = vad.analyze_speech(samples, max_pause_seconds=0.8)
+    assert 5.9 < result['speech_seconds'] < 6.2
+    assert result['pause_stats']['pauseCount'] == 1
+    assert result['pause_stats']['longPauseCount'] == 1
+    # Leading/trailing silence dropped, the 3 s pause shortened to 0.8 s.
+    assert len(result['samples']) / SAMPLE_RATE < 7.5
+
+
+def test_noise_and_digital_silence_are_silent():
+    assert vad.analyze_speech(noise(3))['is_silent']
+    assert vad.analyze_speech(np.zeros(SAMPLE_RATE, dtype=np.float32))['is_silent']
+
+
+def test_to_original_time_maps_through_compressed_pauses():
+    samples = np.concatenate([noise(2), tone(2), noise(3), tone(2)])
+    result = vad.analyze_speech(samples, max_pause_seconds=0.8)
+    second_start_new = result['spans'][1][2]
+    assert abs(vad.to_original_time(second_start_new, result['spans']) - result['spans'][1][0]) < 1e-6
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from flask import Flask
+
+from app.services.write_behind import WriteBehindBuffer
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_failed_key_is_retried_while_new_keys_keep_arriving():
+    flushed = []
+    attempts = {'bad': 0}
+    lock = threading.Lock()
+
+    def flush(key, items):
+        if key == 'bad':
+            attempts['bad'] += 1
+            if attempts['bad'] < 3:
+                raise RuntimeError('database unavailable')
+        with lock:
+            flushed.append(key)
+
+    # max_items=1: every add wakes the worker for that key only.
+    buffer = WriteBehindBuffer('test', flush, max_items=1, flush_interval_seconds=10.0,
+                               max_retries=5, retry_backoff_seconds=0.05)
+    buffer.configure(Flask(__name__))
+    buffer.add('bad', 'row')
+
+    n = 0
+    deadline = time.monotonic() + 3.0
+    while 'bad' not in flushed and time.monotonic() < deadline:
+        buffer.add(f'good-{n}', 'row')
+        n += 1
+        time.sleep(0.005)
+
+    assert 'bad' in flushed
+    assert attempts['bad'] == 3
+    assert wait_for(lambda: buffer.pending_count() == 0)
+
+
+def test_failed_key_is_dropped_after_max_retries():
+    attempts = []
+
+    def flush(key, items):
+        attempts.append(key)
+        raise RuntimeError('constraint violation')
+
+    buffer = WriteBehindBuffer('test', flush, max_items=1, flush_interval_seconds=10.0,
+                               max_retries=2, retry_backoff_seconds=0.01)
+    buffer.configure(Flask(__name__))
+    buffer.add('bad', 'row')
+
+    assert wait_for(lambda: buffer.pending_count() == 0)
+    assert attempts == ['bad'] * 3
+
+
+def test_idle_key_is_flushed_by_age_while_another_key_is_busy():
+    flushed = []
+    buffer = WriteBehindBuffer('test', lambda key, items: flushed.append(key),
+                               max_items=2, flush_interval_seconds=0.2)
+    buffer.configure(Flask(__name__))
+    buffer.add('quiet', 'row')
+
+    deadline = time.monotonic() + 1.0
+    while 'quiet' not in flushed and time.monotonic() < deadline:
+        buffer.add('busy', 'row')
+        time.sleep(0.01)
+
+    assert 'quiet' in flushed